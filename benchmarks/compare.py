@@ -0,0 +1,63 @@
+"""
+Compare two benchmark result files (see benchmarks/run.py).
+
+    python -m benchmarks.compare BASE.json NEW.json [--threshold 1.2] [--min-ms 1.0]
+
+Cases are matched on (size, benchmark, case) and compared on their median.
+A case regresses when NEW is more than ``threshold`` times slower than BASE and
+also at least ``min-ms`` slower, so sub-millisecond jitter is not reported.
+Exits with status 1 if any case regressed.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+Key = Tuple[str, str, str]
+
+
+def _load(path: Path) -> Dict[Key, Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {(r["size"], r["benchmark"], r["case"]): r for r in report["results"]}
+
+
+def compare(base: Path, new: Path, threshold: float = 1.2, min_ms: float = 1.0) -> List[Dict[str, Any]]:
+    """One row per case found in both files, with the ratio of the medians"""
+    old_results, new_results = _load(base), _load(new)
+    rows = []
+    for key in old_results.keys() & new_results.keys():
+        before, after = old_results[key]["median_ms"], new_results[key]["median_ms"]
+        ratio = after / before if before else float("inf") if after else 1.0
+        rows.append({
+            "size": key[0], "benchmark": key[1], "case": key[2],
+            "base_ms": before, "new_ms": after, "ratio": ratio,
+            "regression": ratio > threshold and after - before >= min_ms,
+        })
+    order = {size: i for i, size in enumerate(dict.fromkeys(k[0] for k in old_results))}
+    rows.sort(key=lambda r: (order.get(r["size"], len(order)), r["benchmark"], r["case"]))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--min-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    rows = compare(args.base, args.new, args.threshold, args.min_ms)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['size']:<5} {row['benchmark']:<18} {row['case']:<45} "
+              f"{row['base_ms']:>10.3f} -> {row['new_ms']:>10.3f} ms  x{row['ratio']:.2f}{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{len(rows)} cases compared, {regressions} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Synthetic JEE cutoff datasets for the benchmarks.
+
+Rows have the shape written by create_10000_colleges.py (and the field set of
+create_massive_db.py): the same college tiers, branch counts, category
+multipliers and rank noise. Larger sizes repeat the college list under
+numbered names, with fresh noise per copy, so every size has the same mix of
+states, tiers and rank ranges.
+"""
+
+import json
+import random
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import create_10000_colleges as shapes
+from json_to_sql import create_database
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+@contextmanager
+def _seeded(seed: int) -> Iterator[None]:
+    # The generators of create_10000_colleges.py draw from the global random module
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+
+def generate_cutoffs(rows: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """``rows`` JEE cutoff rows, the same for the same seed"""
+    cutoffs: List[Dict[str, Any]] = []
+    with _seeded(seed):
+        colleges = shapes.generate_jee_colleges()
+        copy = 0
+        while len(cutoffs) < rows:
+            batch = colleges if copy == 0 else [dict(c, name=f"{c['name']} #{copy}") for c in colleges]
+            cutoffs.extend(shapes.generate_cutoffs(batch, shapes.jee_branches, "jee"))
+            copy += 1
+    # A sample rather than the first rows, which would all be from the first states
+    return random.Random(seed).sample(cutoffs, rows)
+
+
+def write_json(cutoffs: List[Dict[str, Any]], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cutoffs, f, ensure_ascii=False)
+
+
+def build_database(cutoffs: List[Dict[str, Any]], path: Path) -> None:
+    """SQLite database with the schema of json_to_sql.py, filled in bulk"""
+    conn = create_database(str(path))
+    try:
+        colleges: Dict[tuple, str] = {}
+        for row in cutoffs:
+            colleges.setdefault((row["college"], row["location"]), row["college_type"])
+        conn.executemany(
+            "INSERT INTO colleges (name, state, ownership) VALUES (?, ?, ?)",
+            [(name, state, ownership) for (name, state), ownership in colleges.items()],
+        )
+        ids = {(name, state): cid for cid, name, state in conn.execute("SELECT id, name, state FROM colleges")}
+        conn.executemany(
+            """INSERT INTO college_ranks (college_id, exam_type, year, branch, opening_rank, closing_rank, category, quota, location)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                (ids[(r["college"], r["location"])], r["exam_type"], r["year"], r["branch"],
+                 r["opening_rank"], r["closing_rank"], r["category"], r["quota"], r["location"])
+                for r in cutoffs
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,250 @@
+"""
+Offline benchmarks of the predictor, college search and the at-rank SQL.
+
+    python -m benchmarks.run                                   # 10k, 100k and 1m rows
+    python -m benchmarks.run --sizes 10k,250000 --repeat 3 --out /tmp/bench.json
+    python -m benchmarks.compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+
+Everything runs in-process on synthetic data (benchmarks/datasets.py), with
+the prediction cache disabled so every call does the full work. Results are
+written as JSON, by default to benchmarks/results/<commit>.json.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from benchmarks.datasets import SIZES, build_database, generate_cutoffs, write_json
+from routers import db_colleges, search
+from utils.match_logic_optimized import CollegePredictorOptimized
+from utils.prediction_cache import PredictionCache
+
+RANKS = (1000, 10000, 50000, 200000, 600000)
+STATES = ["Karnataka", "Delhi"]
+
+# Keyword arguments of predict_colleges, on top of exam and rank
+PREDICT_FILTERS: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "category=OBC": {"category": "OBC"},
+    "states": {"states": STATES},
+    "ownership=government": {"ownership": "government"},
+    "tolerance=10": {"tolerance_percent": 10.0},
+    "category=SC+states+ownership=private": {"category": "SC", "states": STATES, "ownership": "private"},
+    "limit=10000": {"limit": 10000},
+}
+
+# Query parameters of /db/colleges/at-rank, on top of rank
+AT_RANK_FILTERS: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "category=OBC": {"category": "OBC"},
+    "states": {"states": ",".join(STATES)},
+    "ownership=government": {"ownership": "government"},
+    "tolerance=10": {"tolerance_percent": 10.0},
+    "rank_range": {"range": True},
+}
+
+NAME_QUERIES = ("Government Engineering College Karnataka - 12", "Institute of Technology", "Nonexistent Academy")
+SEARCH_QUERIES = ("Government Engineering College Karnataka", "Nonexistent Academy")
+
+
+def _measure(fn: Callable[[], Any], repeat: int, budget: float, warmup: bool = True) -> Tuple[Dict[str, Any], Any]:
+    """Timings of up to ``repeat`` calls, stopping early once ``budget`` seconds are spent"""
+    if warmup:
+        fn()
+    times: List[float] = []
+    result = None
+    started = time.perf_counter()
+    while len(times) < repeat:
+        t = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t)
+        if time.perf_counter() - started > budget:
+            break
+    times.sort()
+    p95 = times[min(len(times) - 1, math.ceil(0.95 * len(times)) - 1)]
+    return {
+        "runs": len(times),
+        "min_ms": round(times[0] * 1000, 3),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "max_ms": round(times[-1] * 1000, 3),
+    }, result
+
+
+def _single(seconds: float) -> Dict[str, Any]:
+    """Timings of a step that is only run once"""
+    ms = round(seconds * 1000, 3)
+    return {"runs": 1, "min_ms": ms, "median_ms": ms, "p95_ms": ms, "max_ms": ms}
+
+
+@contextmanager
+def _patched(obj: Any, name: str, value: Any) -> Iterator[None]:
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, old)
+
+
+@contextmanager
+def _cwd(path: Path) -> Iterator[None]:
+    # /search reads data/<exam>_cutoffs.json relative to the working directory
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def _at_rank(rank: int, filters: Dict[str, Any]) -> Dict[str, Any]:
+    ranged = filters.get("range")
+    # Called directly, so every query parameter needs a value
+    return asyncio.run(db_colleges.db_colleges_at_rank(
+        rank=rank, exam="jee", category=filters.get("category"), gender=None, quota=None, year=None,
+        states=filters.get("states"), ownership=filters.get("ownership"), include_no_rank=False,
+        tolerance_percent=filters.get("tolerance_percent", 0.0),
+        min_rank=rank // 2 if ranged else None, max_rank=rank * 2 if ranged else None,
+        limit=500, offset=0,
+    ))
+
+
+def run_size(label: str, rows: int, repeat: int, budget: float, seed: int, workdir: Path) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+
+    def record(benchmark: str, case: str, params: Dict[str, Any], timing: Dict[str, Any], count: Optional[int]):
+        results.append({"size": label, "rows": rows, "benchmark": benchmark, "case": case,
+                        "params": params, "results": count, **timing})
+        print(f"  {benchmark:<18} {case:<45} median {timing['median_ms']:>10.3f} ms  ({timing['runs']} runs)")
+
+    print(f"[{label}] generating {rows:,} rows")
+    cutoffs = generate_cutoffs(rows, seed)
+    write_json(cutoffs, workdir / "data" / "jee_cutoffs.json")
+    db_path = workdir / "colleges.db"
+    if db_path.exists():
+        db_path.unlink()
+    build_database(cutoffs, db_path)
+
+    # Cleaning and indexing, as a data load does after parsing the JSON
+    predictor = CollegePredictorOptimized(load_on_init=False)
+    predictor.prediction_cache = PredictionCache(max_entries=0)
+    started = time.perf_counter()
+    predictor._store_exam_data("jee", predictor._clean_cutoff_data(cutoffs, "jee"), "full")
+    elapsed = time.perf_counter() - started
+    del cutoffs
+    record("load", "clean+index", {}, _single(elapsed), len(predictor.datasets["jee"].records))
+
+    for rank in RANKS:
+        for case, filters in PREDICT_FILTERS.items():
+            timing, preds = _measure(lambda: predictor.predict_colleges("jee", rank, **filters), repeat, budget)
+            record("predict_colleges", f"rank={rank} {case}", dict(filters, rank=rank), timing, len(preds))
+
+    started = time.perf_counter()
+    names = predictor.college_name_index("jee")
+    record("name_index", "build", {}, _single(time.perf_counter() - started), len(names.names))
+    for query in NAME_QUERIES:
+        timing, found = _measure(lambda: names.matching_names(query), repeat, budget)
+        record("name_index", f"query={query}", {"query": query}, timing, len(found))
+
+    # The /search router reads and scans the JSON file on every call
+    with _cwd(workdir):
+        for query in SEARCH_QUERIES:
+            timing, found = _measure(
+                lambda: asyncio.run(search.search_colleges(query=query, exam="jee", limit=100)),
+                repeat, budget, warmup=False,
+            )
+            record("search", f"query={query}", {"query": query}, timing, found["total_found"])
+
+    with _patched(db_colleges, "DB_PATH", db_path):
+        for rank in RANKS:
+            for case, filters in AT_RANK_FILTERS.items():
+                timing, found = _measure(lambda: _at_rank(rank, filters), repeat, budget)
+                record("db_at_rank", f"rank={rank} {case}", dict(filters, rank=rank), timing, found["total"])
+    return results
+
+
+def size_rows(label: str) -> int:
+    """Rows of a size: one of SIZES or a plain row count"""
+    if label in SIZES:
+        return SIZES[label]
+    if label.isdigit() and int(label) > 0:
+        return int(label)
+    raise ValueError(f"unknown size {label!r}: use {', '.join(SIZES)} or a row count")
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30)
+    except Exception:
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def run(sizes: List[str], repeat: int = 5, budget: float = 10.0, seed: int = 0,
+        out: Optional[Path] = None) -> Dict[str, Any]:
+    commit = _git("rev-parse", "HEAD")
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sizes": sizes,
+            "repeat": repeat,
+            "budget_seconds": budget,
+            "seed": seed,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="collink-bench-") as tmp:
+        for label in sizes:
+            report["results"] += run_size(label, size_rows(label), repeat, budget, seed, Path(tmp))
+
+    out = out or ROOT / "benchmarks" / "results" / f"{(commit or 'local')[:12]}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"comma-separated: {', '.join(SIZES)} or row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per case")
+    parser.add_argument("--budget", type=float, default=10.0, help="stop repeating a case after this many seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    try:
+        for size in sizes:
+            size_rows(size)
+    except ValueError as e:
+        parser.error(str(e))
+    run(sizes, max(1, args.repeat), args.budget, args.seed, args.out)
+
+
+if __name__ == "__main__":
+    main()
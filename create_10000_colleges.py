@@ -2,9 +2,6 @@ import json
 import random
 import os
 
-# Create data directory if it doesn't exist
-os.makedirs('data', exist_ok=True)
-
 # Categories with rank multipliers
 categories = {
     "General": 1.0,
@@ -389,6 +386,8 @@ def main():
     
     # Save data
     print("\n💾 Saving Data Files...")
+    # Create data directory if it doesn't exist
+    os.makedirs('data', exist_ok=True)
     
     # Save JEE data
     with open('data/jee_10000_colleges.json', 'w', encoding='utf-8') as f:
@@ -1,21 +1,40 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+import asyncio
 import json
 import os
 from pathlib import Path
 
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, RequestMetrics, status_metrics
+from utils.stage_timer import ServerTimingMiddleware, StageStats
+
 # Import routers
-from routers import predict, college, search
+from routers import deps, predict, college, search
 from routers import features
 from routers import stats
 from routers import db_colleges
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the essential index before serving, then fill in full data in the background"""
+    await asyncio.to_thread(deps.predictor.load_essential_data)
+    if os.getenv("PRELOAD_FULL_DATA", "1") != "0":
+        deps.predictor.start_background_preload()
+    deps.data_watcher.start()
+    yield
+    deps.data_watcher.stop()
+    deps.prediction_pool.shutdown()
+    await deps.llm_client.aclose()
+
 app = FastAPI(
     title="Collink - College Predictor API",
     description="API for predicting colleges based on competitive exam ranks (JEE, NEET, IELTS)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -27,6 +46,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-stage timings of each request, sent as a Server-Timing header and aggregated per endpoint
+stage_stats = StageStats()
+app.add_middleware(ServerTimingMiddleware, stats=stage_stats)
+
+# Request latency histograms and in-flight gauges, exposed with the data status at /metrics
+request_metrics = RequestMetrics()
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 # Include routers
 app.include_router(predict.router, prefix="/api/v1", tags=["prediction"])
 app.include_router(college.router, prefix="/api/v1", tags=["college"])
@@ -86,6 +113,26 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "collink-api"}
 
+@app.get("/api/v1/timings")
+async def stage_timings():
+    """Per-endpoint request counts, average/max milliseconds per stage and average rows per phase"""
+    return stage_stats.snapshot()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request latencies, caches, datasets and the worker pool"""
+    body = request_metrics.render() + status_metrics(
+        deps.predictor.get_data_status(), deps.prediction_pool.stats(), deps.llm_client.stats()
+    )
+    return PlainTextResponse(body, media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/v1/ready")
+async def readiness_check(full: bool = Query(False, description="Only report ready once full data is loaded")):
+    """Readiness check: 200 once prediction data is loaded, 503 while warming up"""
+    report = deps.predictor.readiness()
+    ready = report["fully_loaded"] if full else report["ready"]
+    return JSONResponse(status_code=200 if ready else 503, content=dict(report, ready=ready))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,24 @@
+"""Process-wide services shared by the routers: the predictor, its worker pool,
+the data file watcher and the LLM client"""
+
+from fastapi import HTTPException
+
+from utils.data_watcher import DataFileWatcher
+from utils.llm_client import LLMClient
+from utils.match_logic_optimized import CollegePredictorOptimized
+from utils.worker_pool import PoolSaturatedError, WorkerPool
+
+# Initialize the optimized predictor. Data is loaded by the app's startup hook
+# (or lazily per exam by the first request), so importing this module stays cheap.
+predictor = CollegePredictorOptimized(load_essential_only=True, load_on_init=False)
+# Predictions are CPU-bound; run them off the event loop on a bounded pool
+prediction_pool = WorkerPool.from_env("PREDICTION")
+# Picks up scraper rewrites of data/*.json without a restart (started by the app's startup hook)
+data_watcher = DataFileWatcher.from_env(predictor)
+# Async LLM providers (AI picks fallback, /ai/chat): pooled connections, capped and cached
+llm_client = LLMClient.from_env()
+
+
+def pool_busy(error: PoolSaturatedError) -> HTTPException:
+    """503 with Retry-After for work the prediction pool did not admit"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
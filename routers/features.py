@@ -3,10 +3,10 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 import json
-import os
-import requests
 
-from utils.match_logic import CollegePredictor
+from routers.deps import llm_client, pool_busy, prediction_pool, predictor
+from routers.predict import MAX_BATCH_CANDIDATES
+from utils.worker_pool import PoolSaturatedError
 
 router = APIRouter()
 
@@ -124,37 +124,77 @@ class FuturePredictionRequest(BaseModel):
     category: str = "General"
     gender: str = "All"
     quota: str = "All India"
+    states: Optional[List[str]] = None
+    limit: Optional[int] = 500
+    per_college_limit: Optional[int] = 1
+    # What-if projections answered alongside the main one: each mock-score
+    # scenario is projected like mock_test_scores; projected_ranks are used as-is
+    mock_score_scenarios: Optional[List[List[int]]] = None
+    projected_ranks: Optional[List[int]] = None
+
+
+def _project_rank(current_rank: int, mock_test_scores: Optional[List[int]]) -> int:
+    """Simplified heuristic: average mock score improvement maps to rank reduction."""
+    if not mock_test_scores:
+        return current_rank
+    avg = sum(mock_test_scores) / max(1, len(mock_test_scores))
+    # Normalize assumed mock score out of 100 to an improvement factor
+    improvement = max(0.0, min(0.3, (avg - 60) / 200))  # up to 30% better
+    return max(1, int(current_rank * (1 - improvement)))
 
 
 @router.post("/predict/future")
 async def predict_future_college(req: FuturePredictionRequest):
     """Estimate potential colleges by projecting rank improvement using mock scores.
-    Simplified heuristic: average mock score improvement maps to rank reduction.
+    Extra scenarios are returned under "scenarios". Each distinct projected rank is
+    predicted once, all in a single predict_batch job that shares the filter views
+    but walks the index separately for every rank.
     """
     try:
-        projected_rank = req.current_rank
-        if req.mock_test_scores:
-            avg = sum(req.mock_test_scores) / max(1, len(req.mock_test_scores))
-            # Normalize assumed mock score out of 100 to an improvement factor
-            improvement = max(0.0, min(0.3, (avg - 60) / 200))  # up to 30% better
-            projected_rank = max(1, int(req.current_rank * (1 - improvement)))
-
-        predictor = CollegePredictor()
-        predictions = predictor.predict_colleges(
-            exam=req.exam.lower(),
-            rank=projected_rank,
-            category=req.category,
-            gender=req.gender,
-            quota=req.quota,
+        projected_rank = _project_rank(req.current_rank, req.mock_test_scores)
+        scenarios = [{"projected_rank": projected_rank, "mock_test_scores": req.mock_test_scores}]
+        for scores in req.mock_score_scenarios or []:
+            scenarios.append({"projected_rank": _project_rank(req.current_rank, scores), "mock_test_scores": scores})
+        for rank in req.projected_ranks or []:
+            scenarios.append({"projected_rank": rank, "mock_test_scores": None})
+        if len(scenarios) > MAX_BATCH_CANDIDATES:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_CANDIDATES} projections per request")
+        if any(s["projected_rank"] <= 0 for s in scenarios):
+            raise HTTPException(status_code=400, detail="Projected ranks must be positive numbers")
+
+        # Scenarios often land on the same rank; each distinct rank is predicted once.
+        # Their order does not matter: predict_batch walks the index separately per rank.
+        ranks = list(dict.fromkeys(s["projected_rank"] for s in scenarios))
+        candidates = [
+            {"rank": rank, "category": req.category, "quota": req.quota, "states": req.states} for rank in ranks
+        ]
+        results = await prediction_pool.run(
+            lambda: list(predictor.predict_batch(
+                exam=req.exam.lower(),
+                candidates=candidates,
+                limit=(req.limit or 500),
+                per_college_limit=(req.per_college_limit or 1),
+            ))
         )
+        by_rank = {ranks[pos]: preds for pos, preds in results}
+        for s in scenarios:
+            s["predictions"] = by_rank[s["projected_rank"]]
+            s["total_colleges"] = len(s["predictions"])
 
-        return {
+        response = {
             "exam": req.exam,
             "current_rank": req.current_rank,
             "projected_rank": projected_rank,
-            "predictions": predictions,
-            "total_colleges": len(predictions),
+            "predictions": scenarios[0]["predictions"],
+            "total_colleges": scenarios[0]["total_colleges"],
         }
+        if len(scenarios) > 1:
+            response["scenarios"] = scenarios[1:]
+        return response
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -410,48 +450,13 @@ async def ai_chat(req: ChatRequest):
             if example_msgs:
                 messages = [messages[0], *example_msgs, *messages[1:]]
 
-        if provider == "openai" and os.getenv("OPENAI_API_KEY"):
-            try:
-                payload = {
-                    "model": req.model or "gpt-4o-mini",
-                    "messages": [m.dict() for m in messages],
-                    "temperature": 0.2,
-                }
-                r = requests.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                    timeout=20,
-                )
-                r.raise_for_status()
-                data = r.json()
-                content = data["choices"][0]["message"]["content"]
-                return {"provider": "openai", "content": content}
-            except Exception as e:
-                # Fall through to local
-                pass
-
-        if provider == "google" and os.getenv("GOOGLE_API_KEY"):
-            try:
-                model = req.model or "gemini-1.5-flash-latest"
-                url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={os.getenv('GOOGLE_API_KEY')}"
-                # Convert messages to Gemini parts
-                contents = []
-                for m in messages:
-                    contents.append({"role": m.role, "parts": [{"text": m.content}]})
-                payload = {"contents": contents}
-                r = requests.post(url, json=payload, timeout=20)
-                r.raise_for_status()
-                data = r.json()
-                candidates = data.get("candidates", [])
-                content = candidates[0]["content"]["parts"][0]["text"] if candidates else ""
-                return {"provider": "google", "content": content}
-            except Exception:
-                # Fall through to local
-                pass
+        if provider in {p.name for p in llm_client.providers}:
+            # Only the requested provider; None (no key, busy, slow or failing) falls through to local
+            reply = await llm_client.complete(
+                [m.dict() for m in messages], providers=[provider], model=req.model
+            )
+            if reply:
+                return {"provider": reply[0], "content": reply[1]}
 
         # Local heuristic: answer by searching known data files for college names and composing a response
         user_text = "\n".join(m.content for m in messages if m.role == "user")
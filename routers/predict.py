@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
+import heapq
+import itertools
 import time
 import os
 import json
 from pathlib import Path
-import requests
+import asyncio
+from routers.deps import data_watcher, llm_client, pool_busy, prediction_pool, predictor
+from utils import stage_timer
 from utils.match_logic_optimized import CollegePredictorOptimized
+from utils.prediction_cursor import CursorError, StaleCursorError, decode_cursor, encode_cursor, query_key
+from utils.worker_pool import PoolSaturatedError
 
 router = APIRouter(tags=["predictions"])
 
-# Initialize the optimized predictor
-predictor = CollegePredictorOptimized(load_essential_only=True)
 
 class PredictionRequest(BaseModel):
     exam: str
@@ -25,6 +30,9 @@ class PredictionRequest(BaseModel):
     limit: Optional[int] = 10000
     per_college_limit: Optional[int] = 1
     ownership: Optional[str] = None  # "Any" | "Government" | "Private"
+    # Pagination: set page_size for the first page, then pass back next_cursor
+    page_size: Optional[int] = None
+    cursor: Optional[str] = None
 
 class PredictionResponse(BaseModel):
     exam: str
@@ -33,6 +41,7 @@ class PredictionResponse(BaseModel):
     predictions: List[dict]
     response_time: float
     data_source: str
+    next_cursor: Optional[str] = None
 
 
 # --- AI Picks ---
@@ -60,6 +69,7 @@ class AIPick(BaseModel):
     closing_rank: Optional[int] = None
     your_rank: int
     confidence_level: Optional[str] = None
+    admission_probability: Optional[float] = None
     category: Optional[str] = None
     quota: Optional[str] = None
     location: Optional[str] = None
@@ -75,10 +85,37 @@ class AIPicksResponse(BaseModel):
     response_time: float
     data_source: str
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DEFAULT_PAGE_SIZE = 100
+
+
+def _wants_stream(http_request: Request, stream: bool) -> bool:
+    return stream or NDJSON_MEDIA_TYPE in http_request.headers.get("accept", "")
+
+
+def _check_page_size(page_size: Optional[int]) -> None:
+    if page_size is not None and page_size <= 0:
+        raise HTTPException(status_code=400, detail="page_size must be a positive number")
+
+
+def _cursor_error_status(error: CursorError) -> int:
+    # A stale cursor was valid once; the client should restart from the first page
+    return 410 if isinstance(error, StaleCursorError) else 400
+
+
 @router.post("/predict", response_model=PredictionResponse)
-async def predict_colleges(request: PredictionRequest):
+async def predict_colleges(
+    request: PredictionRequest,
+    http_request: Request,
+    stream: bool = Query(False, description="Stream predictions as NDJSON while they are computed"),
+):
     """
-    Predict colleges based on exam rank and category
+    Predict colleges based on exam rank and category.
+    Set page_size to get one page plus next_cursor; pass next_cursor back as cursor
+    for the following page.
+    With ?stream=true or Accept: application/x-ndjson the predictions are streamed
+    one JSON object per line ({"event": "prediction", "data": {...}}) followed by
+    a final {"event": "end", ...} line.
     """
     start_time = time.time()
     
@@ -97,49 +134,121 @@ async def predict_colleges(request: PredictionRequest):
                 status_code=400, 
                 detail="Rank must be a positive number"
             )
+        _check_page_size(request.page_size)
         
-        # Get predictions using optimized predictor
-        predictions = predictor.predict_colleges(
-            exam=request.exam.lower(),
-            rank=request.rank,
-            category=request.category,
-            gender=request.gender,
-            quota=request.quota,
-            tolerance_percent=request.tolerance_percent,
-            states=request.states,
-            load_full_data=request.load_full_data,
-            limit=(request.limit or 10000),
-            per_college_limit=(request.per_college_limit or 1),
-            ownership=(request.ownership or None),
-        )
+        if _wants_stream(http_request, stream):
+            lines = prediction_pool.stream(_stream_predictions(request, start_time))
+            return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+        next_cursor = None
+        if request.page_size or request.cursor:
+            predictions, next_cursor = await prediction_pool.run(
+                predictor.predict_page,
+                exam=request.exam.lower(),
+                rank=request.rank,
+                category=request.category,
+                gender=request.gender,
+                quota=request.quota,
+                tolerance_percent=request.tolerance_percent,
+                states=request.states,
+                load_full_data=request.load_full_data,
+                limit=(request.limit or 10000),
+                per_college_limit=(request.per_college_limit or 1),
+                ownership=(request.ownership or None),
+                page_size=(request.page_size or DEFAULT_PAGE_SIZE),
+                cursor=request.cursor,
+            )
+        else:
+            # Get predictions using optimized predictor
+            predictions = await prediction_pool.run(
+                predictor.predict_colleges,
+                exam=request.exam.lower(),
+                rank=request.rank,
+                category=request.category,
+                gender=request.gender,
+                quota=request.quota,
+                tolerance_percent=request.tolerance_percent,
+                states=request.states,
+                load_full_data=request.load_full_data,
+                limit=(request.limit or 10000),
+                per_college_limit=(request.per_college_limit or 1),
+                ownership=(request.ownership or None),
+            )
         
         response_time = time.time() - start_time
         
-        # Determine data source
-        data_status = predictor.get_data_status()
-        data_source = data_status["data_loaded"].get(request.exam.lower(), "unknown")
-        
-        return PredictionResponse(
-            exam=request.exam.lower(),
-            rank=request.rank,
-            category=request.category,
-            predictions=predictions,
-            response_time=response_time,
-            data_source=data_source
-        )
+        with stage_timer.stage("respond"):
+            # Determine data source
+            data_status = predictor.get_data_status()
+            data_source = data_status["data_loaded"].get(request.exam.lower(), "unknown")
+
+            return PredictionResponse(
+                exam=request.exam.lower(),
+                rank=request.rank,
+                category=request.category,
+                predictions=predictions,
+                response_time=response_time,
+                data_source=data_source,
+                next_cursor=next_cursor,
+            )
         
     except HTTPException:
         raise
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
+    except CursorError as e:
+        raise HTTPException(status_code=_cursor_error_status(e), detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Internal server error: {str(e)}"
         )
 
+def _stream_predictions(request: PredictionRequest, start_time: float):
+    """NDJSON lines for a streamed /predict response (run under a prediction_pool.stream slot)"""
+    exam = request.exam.lower()
+    total = 0
+    error = None
+    try:
+        for prediction in predictor.iter_predictions(
+            exam=exam,
+            rank=request.rank,
+            category=request.category,
+            gender=request.gender,
+            quota=request.quota,
+            tolerance_percent=request.tolerance_percent,
+            states=request.states,
+            load_full_data=request.load_full_data,
+            limit=(request.limit or 10000),
+            per_college_limit=(request.per_college_limit or 1),
+            ownership=(request.ownership or None),
+        ):
+            total += 1
+            yield json.dumps({"event": "prediction", "data": prediction}) + "\n"
+    except Exception as e:
+        print(f"Error during streamed prediction: {e}")
+        error = str(e)
+
+    end = {
+        "event": "end",
+        "exam": exam,
+        "rank": request.rank,
+        "category": request.category,
+        "total": total,
+        "response_time": time.time() - start_time,
+        "data_source": predictor.get_data_status()["data_loaded"].get(exam, "unknown"),
+    }
+    if error:
+        end["error"] = error
+    yield json.dumps(end) + "\n"
+
 @router.get("/data-status")
 async def get_data_status():
     """Get current data loading status"""
-    return predictor.get_data_status()
+    status = predictor.get_data_status()
+    status["worker_pool"] = prediction_pool.stats()
+    status["data_watcher"] = data_watcher.stats()
+    return status
 
 # --- Combined predictions (multi-exam) ---
 class CombinedPredictionRequest(BaseModel):
@@ -152,36 +261,144 @@ class CombinedPredictionRequest(BaseModel):
     states: Optional[List[str]] = None
     limit: Optional[int] = 10000
     ownership: Optional[str] = None
+    page_size: Optional[int] = None
+    cursor: Optional[str] = None
+
+
+def _proximity(prediction: dict, rank: int) -> float:
+    """How far a prediction's closing rank is from the candidate's rank"""
+    closing = prediction.get("closing_rank")
+    return abs(closing - rank) if isinstance(closing, (int, float)) else float("inf")
+
+
+def _merge_by_proximity(per_exam: List[List[dict]], rank: int) -> Iterator[Tuple[int, dict]]:
+    """K-way merge of per-exam prediction lists into (exam position, prediction) pairs.
+    The closest head goes first (earlier exams win ties) and every exam keeps its own order."""
+    streams = [zip(itertools.repeat(i), preds) for i, preds in enumerate(per_exam)]
+    return heapq.merge(*streams, key=lambda item: _proximity(item[1], rank))
+
+
+def _exam_predictions(exam: str, request: CombinedPredictionRequest, limit: int) -> List[dict]:
+    preds = predictor.predict_colleges(
+        exam=exam,
+        rank=request.rank,
+        category=request.category,
+        gender=request.gender,
+        quota=request.quota,
+        tolerance_percent=request.tolerance_percent,
+        states=request.states,
+        load_full_data=False,
+        limit=limit,
+        ownership=(request.ownership or None),
+    )
+    for p in preds:
+        p["exam"] = exam
+    return preds
+
+
+def _exam_page(exam: str, request: CombinedPredictionRequest, limit: int, page_size: int, cursor: Optional[str]):
+    preds, next_cursor = predictor.predict_page(
+        exam=exam,
+        rank=request.rank,
+        category=request.category,
+        gender=request.gender,
+        quota=request.quota,
+        tolerance_percent=request.tolerance_percent,
+        states=request.states,
+        load_full_data=False,
+        limit=limit,
+        ownership=(request.ownership or None),
+        page_size=page_size,
+        cursor=cursor,
+    )
+    for p in preds:
+        p["exam"] = exam
+    return preds, next_cursor
+
+
+async def _combined_all(exams: List[str], request: CombinedPredictionRequest) -> List[dict]:
+    """The closest `limit` predictions across all exams, computed concurrently per exam"""
+    limit = max(1, request.limit or 10000)
+    per_exam = await asyncio.gather(
+        *(prediction_pool.run(_exam_predictions, exam, request, limit) for exam in exams)
+    )
+    with stage_timer.stage("merge"):
+        return [p for _, p in itertools.islice(_merge_by_proximity(per_exam, request.rank), limit)]
+
+
+async def _combined_page(exams: List[str], request: CombinedPredictionRequest):
+    """One page of the merged list. The cursor keeps every exam's own cursor (None until
+    the exam is first read, "" once it is exhausted) and the number of rows served."""
+    query = query_key(
+        "combined", exams, request.rank, request.category, request.quota, request.tolerance_percent,
+        sorted(request.states) if request.states else None, request.ownership, request.limit,
+    )
+    limit = max(1, request.limit or 10000)
+    cursors: List[Optional[str]] = [None] * len(exams)
+    served = 0
+    if request.cursor:
+        payload = decode_cursor(request.cursor)
+        if payload.get("q") != query:
+            raise CursorError("cursor was issued for a different query")
+        cursors, served = payload.get("c"), payload.get("n")
+        if (
+            not isinstance(cursors, list) or len(cursors) != len(exams)
+            or not all(c is None or isinstance(c, str) for c in cursors)
+            or not isinstance(served, int) or not 0 <= served < limit
+        ):
+            raise CursorError("malformed cursor")
+
+    page_size = min(request.page_size or DEFAULT_PAGE_SIZE, limit - served)
+    live = [i for i, c in enumerate(cursors) if c != ""]
+    # Every exam contributes at most a page; fetch them all concurrently
+    fetched = await asyncio.gather(
+        *(prediction_pool.run(_exam_page, exams[i], request, limit, page_size, cursors[i]) for i in live)
+    )
+    merged = _merge_by_proximity([preds for preds, _ in fetched], request.rank)
+    page, taken = [], [0] * len(live)
+    for j, p in itertools.islice(merged, page_size):
+        page.append(p)
+        taken[j] += 1
+
+    # Advance each exam's cursor past the rows it gave to this page
+    partial = []
+    for j, i in enumerate(live):
+        preds, next_cursor = fetched[j]
+        if taken[j] == len(preds):
+            cursors[i] = next_cursor or ""
+        elif taken[j]:
+            partial.append((j, i))
+    if partial:
+        resumed = await asyncio.gather(
+            *(prediction_pool.run(_exam_page, exams[i], request, limit, taken[j], cursors[i]) for j, i in partial)
+        )
+        for (j, i), (_, next_cursor) in zip(partial, resumed):
+            cursors[i] = next_cursor or ""
+
+    served += len(page)
+    if served >= limit or all(c == "" for c in cursors):
+        return page, None
+    return page, encode_cursor({"q": query, "c": cursors, "n": served})
 
 
 @router.post("/predict/combined")
 async def predict_combined(request: CombinedPredictionRequest):
-    """Run predictions across multiple exams and combine results with exam tags."""
+    """Run predictions across multiple exams concurrently and merge them by proximity
+    to the rank, returning at most `limit` predictions in total."""
     start_time = time.time()
     exams = [e.lower() for e in (request.exams or [])]
     valid = {"jee", "neet", "ielts"}
     exams = [e for e in exams if e in valid]
     if not exams:
         raise HTTPException(status_code=400, detail="No valid exams provided. Use any of: jee, neet, ielts")
+    _check_page_size(request.page_size)
 
-    combined: List[dict] = []
+    next_cursor = None
     try:
-        for exam in exams:
-            preds = predictor.predict_colleges(
-                exam=exam,
-                rank=request.rank,
-                category=request.category,
-                gender=request.gender,
-                quota=request.quota,
-                tolerance_percent=request.tolerance_percent,
-                states=request.states,
-                load_full_data=False,
-                limit=(request.limit or 10000),
-                ownership=(request.ownership or None),
-            )
-            for p in preds:
-                p["exam"] = exam
-            combined.extend(preds)
+        if request.page_size or request.cursor:
+            combined, next_cursor = await _combined_page(exams, request)
+        else:
+            combined = await _combined_all(exams, request)
 
         response_time = time.time() - start_time
         return {
@@ -191,25 +408,202 @@ async def predict_combined(request: CombinedPredictionRequest):
             "predictions": combined,
             "response_time": response_time,
             "total": len(combined),
+            "next_cursor": next_cursor,
         }
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
+    except CursorError as e:
+        raise HTTPException(status_code=_cursor_error_status(e), detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- Batch predictions (many candidates, one exam) ---
+MAX_BATCH_CANDIDATES = 10000
+
+
+class BatchCandidate(BaseModel):
+    id: Optional[str] = None
+    rank: int
+    category: str = "General"
+    quota: str = "All India"
+    states: Optional[List[str]] = None
+
+
+class BatchPredictionRequest(BaseModel):
+    exam: str
+    candidates: List[BatchCandidate]
+    tolerance_percent: float = 0.0
+    load_full_data: bool = False
+    limit: Optional[int] = 100
+    per_college_limit: Optional[int] = 1
+    ownership: Optional[str] = None
+
+
+@router.post("/predict/batch")
+async def predict_batch(request: BatchPredictionRequest):
+    """Predict colleges for many candidates of one exam in a single call.
+    Candidates sharing category/quota/states are answered together, reusing the
+    filter views; each rank is then answered by its own proximity walk.
+    Streams one NDJSON line per candidate, tagged with its index (and id) in the
+    request, since lines follow the filter groups rather than the request order.
+    """
+    exam = request.exam.lower()
+    if exam not in ["jee", "neet", "ielts", "cat"]:
+        raise HTTPException(status_code=400, detail="Invalid exam type. Must be one of: jee, neet, ielts, cat")
+    if not request.candidates:
+        raise HTTPException(status_code=400, detail="No candidates provided")
+    if len(request.candidates) > MAX_BATCH_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_CANDIDATES} candidates per batch")
+    bad = [i for i, c in enumerate(request.candidates) if c.rank <= 0]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Rank must be a positive number (candidates {bad[:10]})")
+
+    candidates = [c.dict() for c in request.candidates]
+
+    def lines():
+        for pos, preds in predictor.predict_batch(
+            exam=exam,
+            candidates=candidates,
+            tolerance_percent=request.tolerance_percent,
+            load_full_data=request.load_full_data,
+            limit=(request.limit or 100),
+            per_college_limit=(request.per_college_limit or 1),
+            ownership=(request.ownership or None),
+        ):
+            c = request.candidates[pos]
+            yield json.dumps({
+                "index": pos,
+                "id": c.id,
+                "exam": exam,
+                "rank": c.rank,
+                "category": c.category,
+                "total": len(preds),
+                "predictions": preds,
+            }) + "\n"
+
+    try:
+        body = prediction_pool.stream(lines())
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
+    return StreamingResponse(body, media_type=NDJSON_MEDIA_TYPE)
+
+
+MAX_SWEEP_STEPS = 2000
+
+
+class SweepRequest(BaseModel):
+    exam: str
+    rank_from: int
+    rank_to: int
+    step: int = 1000
+    category: str = "General"
+    quota: str = "All India"
+    tolerance_percent: float = 0.0
+    states: Optional[List[str]] = None
+    load_full_data: bool = False
+    ownership: Optional[str] = None
+    # A college is within reach of a rank while one of its eligible cutoffs is at most rank + window
+    window: int = 20000
+
+
+@router.post("/predict/sweep")
+async def predict_sweep(request: SweepRequest):
+    """What-if rank slider: step from rank_from to rank_to (either direction) and
+    report, per step, the colleges that came within reach and those that dropped out.
+    The first step lists every college within reach as entered.
+    """
+    exam = request.exam.lower()
+    if exam not in ["jee", "neet", "ielts", "cat"]:
+        raise HTTPException(status_code=400, detail="Invalid exam type. Must be one of: jee, neet, ielts, cat")
+    if request.rank_from <= 0 or request.rank_to <= 0:
+        raise HTTPException(status_code=400, detail="Rank must be a positive number")
+    if request.step <= 0:
+        raise HTTPException(status_code=400, detail="Step must be a positive number")
+    if request.window < 0:
+        raise HTTPException(status_code=400, detail="Window must not be negative")
+    direction = 1 if request.rank_to >= request.rank_from else -1
+    ranks = range(request.rank_from, request.rank_to + direction, direction * request.step)
+    if len(ranks) > MAX_SWEEP_STEPS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SWEEP_STEPS} steps per sweep")
+
+    start_time = time.time()
+    try:
+        steps = await prediction_pool.run(
+            lambda: list(predictor.sweep_ranks(
+                exam=exam,
+                ranks=ranks,
+                category=request.category,
+                quota=request.quota,
+                tolerance_percent=request.tolerance_percent,
+                states=request.states,
+                load_full_data=request.load_full_data,
+                ownership=(request.ownership or None),
+                window=request.window,
+            ))
+        )
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    return {
+        "exam": exam,
+        "category": request.category,
+        "window": request.window,
+        "steps": steps,
+        "response_time": time.time() - start_time,
+    }
+
 @router.post("/preload-data/{exam}")
 async def preload_exam_data(exam: str):
     """Preload full data for a specific exam"""
     try:
-        predictor.preload_full_data(exam)
+        await prediction_pool.run(predictor.preload_full_data, exam)
         return {"message": f"Full data preloaded for {exam}", "status": "success"}
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Error preloading data: {str(e)}"
         )
 
+@router.post("/reload-data")
+async def reload_data(exam: Optional[str] = None):
+    """Rebuild loaded exams from the current data files and swap them in without downtime"""
+    known = set(predictor.ESSENTIAL_DATA_FILES) | set(predictor.FULL_DATA_FILES)
+    if exam is not None and exam.lower() not in known:
+        raise HTTPException(status_code=400, detail=f"Invalid exam type. Use one of: {', '.join(sorted(known))}")
+    exams = [exam.lower()] if exam else sorted(predictor.datasets)
+
+    reloaded, skipped = [], []
+    for name in exams:
+        try:
+            # Reloads parse whole files; keep them off the event loop and out of the prediction pool
+            done = await asyncio.to_thread(predictor.reload_exam, name)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error reloading {name} data (previous data is still served): {str(e)}"
+            )
+        (reloaded if done else skipped).append(name)
+    return {
+        "reloaded": reloaded,
+        "skipped": skipped,  # not loaded yet; they will read the current files when first used
+        "data_version": predictor.data_version,
+        "status": "success",
+    }
+
 @router.get("/performance-test")
 async def performance_test():
     """Test API performance with sample queries"""
+    try:
+        return await prediction_pool.run(_performance_test)
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
+
+
+def _performance_test() -> Dict[str, Any]:
     results = {}
     
     # Test JEE prediction
@@ -257,8 +651,16 @@ def _compute_ai_score(base: Dict[str, Any], user_rank: int, states: Optional[Lis
         else:
             reasons.append("Near the closing rank range")
 
-    # Confidence boost (from predictor)
-    if confidence_level == "high":
+    # Confidence boost (from predictor): the modelled admission probability when the
+    # row has one, else the confidence level
+    probability = base.get("admission_probability")
+    if probability is not None:
+        score += 20 * probability
+        if probability >= 0.8:
+            reasons.append(f"High admission probability ({probability:.0%}) from past cutoffs")
+        elif probability >= 0.5:
+            reasons.append(f"Moderate admission probability ({probability:.0%}) from past cutoffs")
+    elif confidence_level == "high":
         score += 20
         reasons.append("High confidence based on historical data")
     elif confidence_level == "medium":
@@ -286,69 +688,29 @@ def _compute_ai_score(base: Dict[str, Any], user_rank: int, states: Optional[Lis
     return max(0.0, min(100.0, score)), reasons
 
 
-def _llm_generate_colleges(prompt: str) -> List[str]:
-    """Query OpenAI or Google Gemini to get a list of college suggestions. Falls back to empty list."""
-    # Try OpenAI first
+async def _llm_generate_colleges(prompt: str) -> List[str]:
+    """Ask the configured LLM providers (OpenAI, then Google Gemini) for college suggestions.
+    Falls back to empty list."""
     try:
-        if os.getenv("OPENAI_API_KEY"):
-            payload = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": "You are an assistant helping with Indian college recommendations. Reply with a numbered list of colleges only."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.2,
-            }
-            r = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=20,
-            )
-            r.raise_for_status()
-            data = r.json()
-            content = data["choices"][0]["message"]["content"]
-            lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
-            names: List[str] = []
-            for ln in lines:
-                # remove list numbers/bullets
-                ln = ln.lstrip("-• ")
-                ln = ln.split(".", 1)[-1].strip() if ln[:2].isdigit() else ln
-                if ln:
-                    names.append(ln)
-            return names[:20]
+        reply = await llm_client.complete([
+            {"role": "system", "content": "You are an assistant helping with Indian college recommendations. Reply with a numbered list of colleges only."},
+            {"role": "user", "content": prompt},
+        ])
     except Exception:
-        pass
+        reply = None
+    return _parse_college_list(reply[1]) if reply else []
 
-    # Try Google Gemini
-    try:
-        if os.getenv("GOOGLE_API_KEY"):
-            model = "gemini-1.5-flash-latest"
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={os.getenv('GOOGLE_API_KEY')}"
-            contents = [
-                {"role": "user", "parts": [{"text": "You are an assistant helping with Indian college recommendations. Reply with a numbered list of colleges only."}]},
-                {"role": "user", "parts": [{"text": prompt}]},
-            ]
-            r = requests.post(url, json={"contents": contents}, timeout=20)
-            r.raise_for_status()
-            data = r.json()
-            candidates = data.get("candidates", [])
-            text = candidates[0]["content"]["parts"][0]["text"] if candidates else ""
-            lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-            names: List[str] = []
-            for ln in lines:
-                ln = ln.lstrip("-• ")
-                ln = ln.split(".", 1)[-1].strip() if ln[:2].isdigit() else ln
-                if ln:
-                    names.append(ln)
-            return names[:20]
-    except Exception:
-        pass
 
-    return []
+def _parse_college_list(text: str) -> List[str]:
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    names: List[str] = []
+    for ln in lines:
+        # remove list numbers/bullets
+        ln = ln.lstrip("-• ")
+        ln = ln.split(".", 1)[-1].strip() if ln[:2].isdigit() else ln
+        if ln:
+            names.append(ln)
+    return names[:20]
 
 
 def _local_suggest_colleges(exam: str, states: Optional[List[str]], limit: int = 20) -> List[str]:
@@ -413,52 +775,20 @@ def _local_suggest_colleges(exam: str, states: Optional[List[str]], limit: int =
     return names[:limit]
 
 
-def _norm_name(s: Optional[str]) -> str:
-    try:
-        return " ".join(((s or "").strip().lower()).split())
-    except Exception:
-        return (s or "").lower()
-
-
 def _enrich_college_name_with_dataset(predictor: CollegePredictorOptimized, exam: str, name: str, user_rank: int) -> Optional[Dict[str, Any]]:
     """Find the closest matching cutoff row for a given college name and attach ranks/branch/location.
     Returns a dict shaped like base prediction rows or None if not found.
     """
     try:
         ex = (exam or "").lower()
-        data = predictor.cutoff_data.get(ex) or []
-        if not data:
+        names = predictor.college_name_index(ex)
+        if names is None:
             return None
-        target = _norm_name(name)
-        # First pass: contains match on normalized names
-        candidates: List[Dict[str, Any]] = []
-        for row in data:
-            rc = row.get("college") or ""
-            if not rc:
-                continue
-            rc_norm = _norm_name(rc)
-            if target in rc_norm or rc_norm in target:
-                candidates.append(row)
-        # If no candidates, try loose token overlap (>=2 tokens)
-        if not candidates:
-            tks = set([t for t in target.split() if len(t) > 2])
-            if tks:
-                for row in data:
-                    rc = row.get("college") or ""
-                    rc_norm = _norm_name(rc)
-                    rset = set([t for t in rc_norm.split() if len(t) > 2])
-                    if len(tks.intersection(rset)) >= 2:
-                        candidates.append(row)
-        if not candidates:
+        # Names containing (or contained in) the given one, else sharing >=2 tokens;
+        # then the candidate whose closing_rank is nearest to user_rank
+        best = names.nearest_row(names.matching_names(name), user_rank)
+        if best is None:
             return None
-        # Choose candidate whose closing_rank is nearest to user_rank
-        def rank_gap(r):
-            cr = r.get("closing_rank") or 0
-            try:
-                return abs(int(cr) - int(user_rank)) if cr else 10**9
-            except Exception:
-                return 10**9
-        best = sorted(candidates, key=rank_gap)[0]
         # Build normalized prediction dict
         return {
             "college": best.get("college") or name,
@@ -497,6 +827,59 @@ def _default_colleges_for_exam(exam: str) -> List[str]:
         ]
     return ["College of Engineering", "National Institute of Technology", "Institute of Technology"]
 
+def _ai_windows(exam: str, rank: int) -> Tuple[int, int, int]:
+    """Adaptive proximity windows (near, far, very far) used to prioritize near-rank results"""
+    near_w, far_w, very_far_w = 20000, 80000, 120000
+    if exam == "neet":
+        near_w = 60000 if rank >= 100000 else 50000
+        far_w = 140000 if rank >= 100000 else 120000
+        very_far_w = 250000
+    else:
+        if rank >= 100000:
+            near_w, far_w, very_far_w = 50000, 120000, 200000
+    return near_w, far_w, very_far_w
+
+
+def _top_ai_candidates(
+    preds: Iterable[Dict[str, Any]], request: AIPicksRequest, windows: Tuple[int, int, int], limit: int
+) -> Tuple[List[Tuple[float, Dict[str, Any], List[str]]], int, int]:
+    """Best `limit` (ai_score, prediction, reasons) by score, from the tightest non-empty window.
+
+    Each prediction falls in the tightest window containing its closing rank (or
+    outside all of them). Only that window's candidates are kept, in a bounded
+    min-heap per window, and a window is dropped as soon as a tighter one has a
+    candidate. Equal scores keep the predictor's order. Also returns how many
+    predictions were seen and how many fell in the chosen window.
+    """
+    safe_rank = request.rank if isinstance(request.rank, (int, float)) and request.rank > 0 else None
+    heaps: List[List[Tuple[float, int, Dict[str, Any], List[str]]]] = [[] for _ in range(len(windows) + 1)]
+    counts = [0] * len(heaps)
+    best_tier = len(windows)
+    seen = 0
+    for seq, p in enumerate(preds):
+        seen += 1
+        closing = p.get("closing_rank") or 0
+        distance = abs(int(closing) - int(request.rank)) if closing else None
+        tier = next(
+            (t for t, w in enumerate(windows) if distance is not None and distance < int(w)), len(windows)
+        )
+        if tier > best_tier:
+            continue
+        best_tier = tier
+        counts[tier] += 1
+        # Attach user category to help scoring
+        p["user_category"] = request.category
+        ai_score, reasons = _compute_ai_score(p, int(safe_rank or p.get("your_rank") or 1), request.states)
+        item = (round(ai_score, 2), -seq, p, reasons)
+        heap = heaps[tier]
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+    ranked = sorted(heaps[best_tier], key=lambda item: item[:2], reverse=True)
+    return [(score, p, reasons) for score, _, p, reasons in ranked], seen, counts[best_tier]
+
+
 @router.post("/predict/ai", response_model=AIPicksResponse)
 async def predict_ai_picks(request: AIPicksRequest):
     """Return AI-ranked college picks based on rank and preferences."""
@@ -504,81 +887,11 @@ async def predict_ai_picks(request: AIPicksRequest):
     try:
         if request.exam.lower() not in ["jee", "neet", "ielts"]:
             raise HTTPException(status_code=400, detail="Invalid exam type. Use jee, neet or ielts")
+        limit = max(1, request.limit or 50)
 
-        # Get base predictions (broad set), then re-rank by AI score
-        try:
-            base_preds = predictor.predict_colleges(
-                exam=request.exam.lower(),
-                rank=request.rank,
-                category=request.category,
-                gender=request.gender,
-                quota=request.quota,
-                tolerance_percent=request.tolerance_percent,
-                states=request.states,
-                load_full_data=request.load_full_data,
-                limit=max(200, request.limit or 50),  # fetch more, then rank
-                per_college_limit=(request.per_college_limit or 1),
-                ownership=(request.ownership or None),
-            )
-        except Exception as e:
-            # Do not fail the endpoint; continue to LLM/local/curated fallbacks
-            try:
-                print(f"[AI Picks] predictor error: {e}")
-            except Exception:
-                pass
-            base_preds = []
-
-        # Apply adaptive proximity filters to prioritize near-rank results
-        ex = request.exam.lower()
-        near_w, far_w, very_far_w = 20000, 80000, 120000
-        if ex == "neet":
-            near_w = 60000 if request.rank >= 100000 else 50000
-            far_w = 140000 if request.rank >= 100000 else 120000
-            very_far_w = 250000
-        else:
-            if request.rank >= 100000:
-                near_w, far_w, very_far_w = 50000, 120000, 200000
-
-        def _within(item, w):
-            closing = item.get("closing_rank") or 0
-            return bool(closing) and abs(int(closing) - int(request.rank)) < int(w)
-
-        filtered = [p for p in base_preds if _within(p, near_w)]
-        if not filtered:
-            filtered = [p for p in base_preds if _within(p, far_w)]
-        if not filtered:
-            filtered = [p for p in base_preds if _within(p, very_far_w)]
-        if not filtered:
-            filtered = base_preds  # as-is if nothing matches windows
-
-        # Debug: log counts
-        try:
-            print(f"[AI Picks] exam={request.exam} rank={request.rank} cat={request.category} states={request.states} limit={request.limit} per_college_limit={request.per_college_limit}")
-            print(f"[AI Picks] base_preds_count={len(base_preds)} filtered_count={len(filtered)} windows(near={near_w},far={far_w},vfar={very_far_w})")
-        except Exception:
-            pass
-
-        picks: List[AIPick] = []
-        for p in filtered:
-            # Attach user category to help scoring
-            p["user_category"] = request.category
-            safe_rank = request.rank if isinstance(request.rank, (int, float)) and request.rank > 0 else (p.get("your_rank") or 1)
-            ai_score, reasons = _compute_ai_score(p, int(safe_rank), request.states)
-            picks.append(AIPick(
-                college=p.get("college", "Unknown"),
-                branch=p.get("branch"),
-                opening_rank=p.get("opening_rank"),
-                closing_rank=p.get("closing_rank"),
-                your_rank=p.get("your_rank", request.rank),
-                confidence_level=p.get("confidence_level") or p.get("confidence"),
-                category=p.get("category"),
-                quota=p.get("quota"),
-                location=p.get("location"),
-                ai_score=round(ai_score, 2),
-                match_reasons=reasons,
-            ))
-
-        # If no base picks, use LLM fallback to suggest college names
+        picks = await prediction_pool.run(_ai_base_picks, request, limit)
+        # If no base picks, use LLM fallback to suggest college names. The provider call is
+        # awaited here rather than on the pool, so a slow provider holds no worker thread.
         if not picks:
             prompt = (
                 f"Suggest top colleges for exam={request.exam.upper()} for a candidate with rank={request.rank}, "
@@ -586,54 +899,12 @@ async def predict_ai_picks(request: AIPicksRequest):
                 f"States preference: {', '.join(request.states or []) or 'Any'}. "
                 "Return a numbered list of college names only."
             )
-            names = _llm_generate_colleges(prompt)
-            if not names:
-                # Deterministic local dataset fallback
-                names = _local_suggest_colleges(request.exam.lower(), request.states, limit=max(10, request.limit or 20))
-            if not names:
-                # Final curated fallback
-                names = _default_colleges_for_exam(request.exam.lower())[: max(10, request.limit or 20)]
-            # Try to enrich each name with dataset match for ranks/branch/location
-            enriched: List[Dict[str, Any]] = []
-            for nm in names:
-                row = _enrich_college_name_with_dataset(predictor, request.exam.lower(), nm, request.rank)
-                if row:
-                    enriched.append(row)
-                else:
-                    enriched.append({
-                        "college": nm,
-                        "branch": None,
-                        "opening_rank": None,
-                        "closing_rank": None,
-                        "your_rank": request.rank,
-                        "confidence_level": "medium",
-                        "category": request.category,
-                        "quota": request.quota,
-                        "location": None,
-                    })
-            # Score enriched list
-            for i, p in enumerate(enriched):
-                p["user_category"] = request.category
-                ai_score, reasons = _compute_ai_score(p, int(request.rank), request.states)
-                if not reasons:
-                    reasons = ["Suggested by AI model as strong fit for your rank"]
-                picks.append(AIPick(
-                    college=p.get("college", "Unknown"),
-                    branch=p.get("branch"),
-                    opening_rank=p.get("opening_rank"),
-                    closing_rank=p.get("closing_rank"),
-                    your_rank=p.get("your_rank", request.rank),
-                    confidence_level=p.get("confidence_level") or p.get("confidence") or "medium",
-                    category=p.get("category"),
-                    quota=p.get("quota"),
-                    location=p.get("location"),
-                    ai_score=max(0.0, min(100.0, (72.0 - i) if ai_score == 0 else ai_score)),
-                    match_reasons=reasons,
-                ))
+            with stage_timer.stage("llm"):
+                names = await _llm_generate_colleges(prompt)
+            picks = await prediction_pool.run(_ai_fallback_picks, request, names)
 
         # Sort by score desc and trim to limit
         picks.sort(key=lambda x: x.ai_score, reverse=True)
-        limit = max(1, request.limit or 50)
         picks = picks[:limit]
 
         response_time = time.time() - start_time
@@ -648,12 +919,119 @@ async def predict_ai_picks(request: AIPicksRequest):
             response_time=response_time,
             data_source=data_source,
         )
+    except PoolSaturatedError as e:
+        raise pool_busy(e)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def _ai_base_picks(request: AIPicksRequest, limit: int) -> List[AIPick]:
+    """Best `limit` picks scored from the predictor's results (the base predictions)"""
+    # Score the base predictions (broad set) as they are produced, keeping only the best
+    ex = request.exam.lower()
+    windows = _ai_windows(ex, request.rank)
+    try:
+        base_preds = predictor.iter_predictions(
+            exam=ex,
+            rank=request.rank,
+            category=request.category,
+            gender=request.gender,
+            quota=request.quota,
+            tolerance_percent=request.tolerance_percent,
+            states=request.states,
+            load_full_data=request.load_full_data,
+            limit=max(200, request.limit or 50),  # fetch more, then rank
+            per_college_limit=(request.per_college_limit or 1),
+            ownership=(request.ownership or None),
+        )
+        ranked, base_count, filtered_count = _top_ai_candidates(base_preds, request, windows, limit)
+    except Exception as e:
+        # Do not fail the endpoint; continue to LLM/local/curated fallbacks
+        try:
+            print(f"[AI Picks] predictor error: {e}")
+        except Exception:
+            pass
+        ranked, base_count, filtered_count = [], 0, 0
+
+    # Debug: log counts
+    try:
+        near_w, far_w, very_far_w = windows
+        print(f"[AI Picks] exam={request.exam} rank={request.rank} cat={request.category} states={request.states} limit={request.limit} per_college_limit={request.per_college_limit}")
+        print(f"[AI Picks] base_preds_count={base_count} filtered_count={filtered_count} windows(near={near_w},far={far_w},vfar={very_far_w})")
+    except Exception:
+        pass
+
+    # Pydantic objects only for the picks that made the cut
+    return [
+        AIPick(
+            college=p.get("college", "Unknown"),
+            branch=p.get("branch"),
+            opening_rank=p.get("opening_rank"),
+            closing_rank=p.get("closing_rank"),
+            your_rank=p.get("your_rank", request.rank),
+            confidence_level=p.get("confidence_level") or p.get("confidence"),
+            admission_probability=p.get("admission_probability"),
+            category=p.get("category"),
+            quota=p.get("quota"),
+            location=p.get("location"),
+            ai_score=ai_score,
+            match_reasons=reasons,
+        )
+        for ai_score, p, reasons in ranked
+    ]
+
+
+def _ai_fallback_picks(request: AIPicksRequest, names: List[str]) -> List[AIPick]:
+    """Picks for suggested college names (LLM, else local data, else curated), enriched from the dataset"""
+    picks: List[AIPick] = []
+    if not names:
+        # Deterministic local dataset fallback
+        names = _local_suggest_colleges(request.exam.lower(), request.states, limit=max(10, request.limit or 20))
+    if not names:
+        # Final curated fallback
+        names = _default_colleges_for_exam(request.exam.lower())[: max(10, request.limit or 20)]
+    # Try to enrich each name with dataset match for ranks/branch/location
+    enriched: List[Dict[str, Any]] = []
+    for nm in names:
+        row = _enrich_college_name_with_dataset(predictor, request.exam.lower(), nm, request.rank)
+        if row:
+            enriched.append(row)
+        else:
+            enriched.append({
+                "college": nm,
+                "branch": None,
+                "opening_rank": None,
+                "closing_rank": None,
+                "your_rank": request.rank,
+                "confidence_level": "medium",
+                "category": request.category,
+                "quota": request.quota,
+                "location": None,
+            })
+    # Score enriched list
+    for i, p in enumerate(enriched):
+        p["user_category"] = request.category
+        ai_score, reasons = _compute_ai_score(p, int(request.rank), request.states)
+        if not reasons:
+            reasons = ["Suggested by AI model as strong fit for your rank"]
+        picks.append(AIPick(
+            college=p.get("college", "Unknown"),
+            branch=p.get("branch"),
+            opening_rank=p.get("opening_rank"),
+            closing_rank=p.get("closing_rank"),
+            your_rank=p.get("your_rank", request.rank),
+            confidence_level=p.get("confidence_level") or p.get("confidence") or "medium",
+            category=p.get("category"),
+            quota=p.get("quota"),
+            location=p.get("location"),
+            ai_score=max(0.0, min(100.0, (72.0 - i) if ai_score == 0 else ai_score)),
+            match_reasons=reasons,
+        ))
+    return picks
+
+
 @router.get("/predict/ai/diagnose")
 async def ai_picks_diagnose(exam: str = "neet", states: Optional[str] = None, limit: int = 20):
     """Diagnostic: report data status, provider availability, and local suggestions.
@@ -676,6 +1054,7 @@ async def ai_picks_diagnose(exam: str = "neet", states: Optional[str] = None, li
             "openai": bool(os.getenv("OPENAI_API_KEY")),
             "google": bool(os.getenv("GOOGLE_API_KEY")),
         },
+        "llm_client": llm_client.stats(),
         "local_sample_count": len(local_sample),
         "local_sample": local_sample[:10],
     }
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test batched confidence scores and the admission probability model
+"""
+
+import sys
+import os
+import random
+import numpy as np
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import admission_model
+from utils.cutoff_index import CutoffIndex
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+
+def _row(college, closing, year=None, opening=None, category="General", location=None):
+    row = {"college": college, "branch": "CSE", "category": category, "quota": "All India",
+           "opening_rank": closing if opening is None else opening, "closing_rank": closing}
+    if year:
+        row["year"] = year
+    if location:
+        row["location"] = location
+    return row
+
+
+def test_batched_confidence_matches_the_per_row_formula():
+    rng = random.Random(3)
+    rows = []
+    for _ in range(500):
+        opening = rng.choice([0, rng.randint(1, 5000)])
+        rows.append(_row("C", rng.choice([opening, rng.randint(1, 5000)]), opening=opening))
+    rows += [_row("Float", 100.5, opening=10), _row("None", None, opening=5), {"college": "Bare"}]
+    index = CutoffIndex(rows)
+    predictor = CollegePredictorOptimized(load_on_init=False)
+    all_rows = np.arange(len(rows))
+    for rank in (1, 700, 2500, 6000):
+        scores = index.confidence_scores(all_rows, rank)
+        for row, score in zip(rows, scores.tolist()):
+            expected = predictor._calculate_confidence(rank, row.get("closing_rank", 0), row.get("opening_rank", 0))
+            assert score != score or score == expected
+        # Rows whose raw ranks are not plain ints are left to the per-row formula
+        assert np.isnan(scores[-3:-1]).all() and not np.isnan(scores[-1])
+
+
+def test_admission_probability_follows_the_cutoff_history():
+    rows = [
+        _row("Stable", 1000, 2021), _row("Stable", 1010, 2022), _row("Stable", 990, 2023),
+        _row("Rising", 800, 2021), _row("Rising", 1000, 2022), _row("Rising", 1400, 2023),
+        _row("Single", 1000, 2023),
+        _row("Stable", 5000, 2023, category="SC"),
+        _row("Unranked", 0),
+    ]
+    index = CutoffIndex(rows)
+    p = lambda i, rank: float(index.admission_probability(np.array([i]), rank)[0])
+    # Rows of one (college, branch, category, quota) share a model; other categories do not
+    assert p(0, 1000) == p(2, 1000) and p(7, 1000) > 0.99
+    assert p(0, 500) > 0.99 and p(0, 2000) < 0.01
+    assert p(0, 950) > p(0, 1000) > p(0, 1050)
+    # The most recent years weigh most, and a noisy or short history is less certain
+    assert p(3, 1100) > 0.5
+    assert p(3, 700) < p(0, 700) and p(6, 700) < p(0, 700)
+    assert np.isnan(index.admission_probability(np.array([8]), 100)[0])
+    assert abs(float(admission_model.probability(1000, np.log([1000.0]), np.array([0.2]))[0]) - 0.5) < 1e-6
+
+    predictor = CollegePredictorOptimized(load_on_init=False)
+    predictor._store_exam_data("jee", rows, "full")
+    for pred in predictor.predict_colleges("jee", 950, limit=10, per_college_limit=3):
+        assert pred["admission_probability"] is None or 0.0 <= pred["admission_probability"] <= 1.0
+
+
+def test_campuses_of_one_name_have_their_own_models():
+    rows = [
+        _row("ICFAI University", 1000, 2022, location="Dehradun, Uttarakhand"),
+        _row("ICFAI University", 1000, 2023, location="Dehradun, Uttarakhand"),
+        _row("ICFAI University", 9000, 2022, location="Jaipur, Rajasthan"),
+        _row("ICFAI University", 9000, 2023, location="Jaipur, Rajasthan"),
+    ]
+    index = CutoffIndex(rows)
+    p = index.admission_probability(np.arange(4), 3000)
+    # Pooled into one group, both campuses would get the same model
+    assert p[0] == p[1] and p[2] == p[3]
+    assert p[0] < 0.01 and p[2] > 0.99
+
+
+def test_probabilities_are_calibrated_on_a_held_out_year():
+    """P(next closing rank >= r), evaluated at the held-out year's actual closing
+    rank, is uniform when the model's spread is right"""
+    rng = np.random.default_rng(0)
+    groups = 3000
+    base = rng.uniform(np.log(100), np.log(200000), groups)
+    spread = rng.uniform(0.05, 0.2, groups)
+    history = rng.integers(1, 5, groups)
+    group_ids = np.repeat(np.arange(groups), history)
+    years = np.concatenate([np.arange(2024 - h, 2024) for h in history])
+    closing = np.round(np.exp(base[group_ids] + rng.normal(0, spread[group_ids]))).astype(np.int64)
+    mu, sigma = admission_model.fit(group_ids, years, closing)
+
+    first = np.searchsorted(group_ids, np.arange(groups))
+    held_out = np.exp(base + rng.normal(0, spread))
+    pit = np.array([
+        admission_model.probability(rank, mu[i:i + 1], sigma[i:i + 1])[0] for rank, i in zip(held_out, first)
+    ])
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        assert abs(np.mean(pit < q) - q) < 0.04, (q, np.mean(pit < q))
+
+
+if __name__ == "__main__":
+    test_batched_confidence_matches_the_per_row_formula()
+    test_admission_probability_follows_the_cutoff_history()
+    test_campuses_of_one_name_have_their_own_models()
+    test_probabilities_are_calibrated_on_a_held_out_year()
+    print("✅ Admission model tests passed")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test top-k selection of AI picks
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from routers.predict import AIPicksRequest, _top_ai_candidates
+
+
+def _pred(college, closing_rank, confidence_level="High"):
+    return {"college": college, "closing_rank": closing_rank, "opening_rank": 1,
+            "confidence_level": confidence_level, "category": "General", "quota": "All India"}
+
+
+def test_top_candidates_come_from_the_tightest_window():
+    request = AIPicksRequest(exam="jee", rank=10000, limit=2)
+    preds = [
+        _pred("Far", 60000),
+        _pred("Near low", 12000, "Low"),
+        _pred("Near high", 25000),
+        _pred("Near tie", 25000),
+        _pred("No rank", None),
+    ]
+    ranked, seen, filtered = _top_ai_candidates(iter(preds), request, (20000, 80000, 120000), limit=2)
+    # Same scores keep the predictor's order; the far row is never considered
+    assert [p["college"] for _, p, _ in ranked] == ["Near high", "Near tie"]
+    assert ranked[0][0] >= ranked[1][0]
+    assert (seen, filtered) == (5, 3)
+
+
+def test_falls_back_to_wider_windows():
+    request = AIPicksRequest(exam="jee", rank=10000, limit=5)
+    preds = [_pred("Very far", 125000), _pred("Far", 60000), _pred("Unranked", None)]
+    ranked, _, filtered = _top_ai_candidates(iter(preds), request, (20000, 80000, 120000), limit=5)
+    assert [p["college"] for _, p, _ in ranked] == ["Far"]
+    assert filtered == 1
+
+    ranked, _, _ = _top_ai_candidates(iter([_pred("Unranked", None)]), request, (20000, 80000, 120000), limit=5)
+    assert [p["college"] for _, p, _ in ranked] == ["Unranked"]
+
+
+if __name__ == "__main__":
+    test_top_candidates_come_from_the_tightest_window()
+    test_falls_back_to_wider_windows()
+    print("✅ AI picks tests passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the offline benchmark suite on a tiny dataset
+"""
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks import compare, datasets, run
+
+
+def test_generated_datasets_are_reproducible():
+    rows = datasets.generate_cutoffs(500, seed=7)
+    assert len(rows) == 500 and rows == datasets.generate_cutoffs(500, seed=7)
+    assert rows != datasets.generate_cutoffs(500, seed=8)
+    # Sampled across the whole college list, not just its first states
+    assert len({row["location"] for row in rows}) > 20
+    assert all(row["opening_rank"] < row["closing_rank"] for row in rows)
+    # Larger than one pass over the colleges: repeated under numbered names
+    assert any(" #1" in row["college"] for row in datasets.generate_cutoffs(200000, seed=7))
+
+
+def test_run_writes_comparable_results():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "bench.json"
+        run.run(["2000"], repeat=1, budget=1.0, out=out)
+        with open(out) as f:
+            report = json.load(f)
+        assert report["meta"]["sizes"] == ["2000"]
+        benchmarks = {r["benchmark"] for r in report["results"]}
+        assert benchmarks == {"load", "predict_colleges", "name_index", "search", "db_at_rank"}
+        for result in report["results"]:
+            assert result["rows"] == 2000 and result["runs"] >= 1 and result["median_ms"] >= 0
+        assert any(r["benchmark"] == "db_at_rank" and r["results"] for r in report["results"])
+        assert any(r["benchmark"] == "search" and r["results"] for r in report["results"])
+
+        # A file compared with itself has no regressions; a slower copy does
+        assert not any(row["regression"] for row in compare.compare(out, out))
+        for result in report["results"]:
+            result["median_ms"] = result["median_ms"] * 2 + 5
+        slower = Path(tmp) / "slower.json"
+        with open(slower, "w") as f:
+            json.dump(report, f)
+        assert all(row["regression"] for row in compare.compare(out, slower))
+        assert compare.main([str(out), str(slower)]) == 1
+
+
+def test_importing_the_datasets_has_no_side_effects():
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        code = f"import sys; sys.path.insert(0, {root!r}); import benchmarks.datasets"
+        subprocess.run([sys.executable, "-c", code], cwd=tmp, check=True)
+        # e.g. no data/ directory created by the generator module it borrows from
+        assert os.listdir(tmp) == []
+
+
+if __name__ == "__main__":
+    test_generated_datasets_are_reproducible()
+    test_run_writes_comparable_results()
+    test_importing_the_datasets_has_no_side_effects()
+    print("✅ Benchmark suite tests passed")
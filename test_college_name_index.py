@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test the college-name index used to enrich AI pick suggestions
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.college_name_index import CollegeNameIndex
+
+RECORDS = [
+    {"college": "Indian Institute of Technology Bombay", "branch": "CSE", "closing_rank": 66},
+    {"college": "Indian Institute of Technology Bombay", "branch": "EE", "closing_rank": 300},
+    {"college": "Indian  Institute of Technology Delhi", "branch": "CSE", "closing_rank": 115},
+    {"college": "National Institute of Technology Trichy", "branch": "CSE", "closing_rank": 1500},
+    {"college": "IIT", "branch": "Unknown", "closing_rank": None},
+]
+
+
+def _lookup(index, name, rank):
+    row = index.nearest_row(index.matching_names(name), rank)
+    return (row["college"], row["branch"]) if row else None
+
+
+def test_substring_and_token_matches():
+    index = CollegeNameIndex(RECORDS)
+    assert _lookup(index, "XYZ University", 100) is None
+    assert _lookup(index, "Institute of Technology Bombay", 250) == ("Indian Institute of Technology Bombay", "EE")
+    # The only name found is "IIT", contained in the query; its row has no rank but still wins
+    assert _lookup(index, "IIT Delhi", 100) == ("IIT", "Unknown")
+    assert _lookup(index, "institute technology delhi", 100) == ("Indian  Institute of Technology Delhi", "CSE")
+    # Token overlap needs two shared tokens of 3+ characters
+    assert _lookup(index, "National Technology Campus", 1) == ("National Institute of Technology Trichy", "CSE")
+
+
+def test_nearest_rank_breaks_ties_by_dataset_order():
+    index = CollegeNameIndex(RECORDS)
+    assert _lookup(index, "Technology", 90) == ("Indian Institute of Technology Bombay", "CSE")
+    assert _lookup(index, "Technology", 1000) == ("National Institute of Technology Trichy", "CSE")
+    assert _lookup(index, "Technology", "not a rank") == ("Indian Institute of Technology Bombay", "CSE")
+
+
+if __name__ == "__main__":
+    test_substring_and_token_matches()
+    test_nearest_rank_breaks_ties_by_dataset_order()
+    print("✅ College name index tests passed")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test merged multi-exam predictions from /api/v1/predict/combined
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+
+QUERY = {"exams": ["jee", "neet"], "rank": 500, "category": "General"}
+
+
+def _distance(p):
+    return abs(p["closing_rank"] - QUERY["rank"])
+
+
+def test_combined_respects_global_limit_and_keeps_exam_order():
+    with TestClient(main.app) as client:
+        everything = client.post("/api/v1/predict/combined", json=QUERY).json()["predictions"]
+        limited = client.post("/api/v1/predict/combined", json={**QUERY, "limit": 5}).json()["predictions"]
+
+    assert {p["exam"] for p in everything} == {"jee", "neet"}
+    assert limited == everything[:5]
+    for exam in ("jee", "neet"):
+        alone = [p for p in everything if p["exam"] == exam]
+        with TestClient(main.app) as client:
+            single = client.post("/api/v1/predict/combined", json={**QUERY, "exams": [exam]}).json()["predictions"]
+        assert [(p["college"], p["branch"]) for p in alone] == [(p["college"], p["branch"]) for p in single]
+    # The closer of the two exams' best rows comes first
+    firsts = [next(p for p in everything if p["exam"] == exam) for exam in ("jee", "neet")]
+    assert _distance(everything[0]) == min(_distance(p) for p in firsts)
+
+
+def test_combined_pages_concatenate_to_the_merged_list():
+    with TestClient(main.app) as client:
+        everything = client.post("/api/v1/predict/combined", json={**QUERY, "limit": 12}).json()["predictions"]
+        pages, cursor = [], None
+        while True:
+            body = client.post(
+                "/api/v1/predict/combined", json={**QUERY, "limit": 12, "page_size": 5, "cursor": cursor}
+            ).json()
+            pages.extend(body["predictions"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert len(pages) == len(everything) <= 12
+        assert [(p["exam"], p["college"], p["branch"]) for p in pages] == [
+            (p["exam"], p["college"], p["branch"]) for p in everything
+        ]
+
+        other = client.post("/api/v1/predict/combined", json={**QUERY, "rank": 501, "cursor": cursor or "x"})
+        assert other.status_code == 400
+
+        # Page sizes below one are rejected on both paths instead of failing or being clamped
+        for page_size in (0, -5):
+            combined = client.post("/api/v1/predict/combined", json={**QUERY, "page_size": page_size})
+            assert combined.status_code == 400 and "page_size" in combined.json()["detail"]
+            single = client.post("/api/v1/predict", json={"exam": "jee", "rank": 500, "page_size": page_size})
+            assert single.status_code == 400
+        negative_limit = client.post("/api/v1/predict/combined", json={**QUERY, "limit": -3, "page_size": 2})
+        assert negative_limit.status_code == 200 and len(negative_limit.json()["predictions"]) == 1
+
+
+if __name__ == "__main__":
+    test_combined_respects_global_limit_and_keeps_exam_order()
+    test_combined_pages_concatenate_to_the_merged_list()
+    print("✅ Combined prediction tests passed")
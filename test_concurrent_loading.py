@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test that concurrent requests share a single full-data load per exam
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+
+def test_full_data_is_loaded_once_under_concurrency():
+    """Many threads asking for full data trigger exactly one load and one publish"""
+    predictor = CollegePredictorOptimized(load_essential_only=True)
+    version = predictor.data_version["jee"]
+
+    loads = []
+    original = predictor._load_full_data_locked
+
+    def counting_load(exam):
+        loads.append(exam)
+        original(exam)
+
+    predictor._load_full_data_locked = counting_load
+
+    barrier = threading.Barrier(8)
+    results, errors = [], []
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results.append(predictor.predict_colleges("jee", 5000 + i, "General", load_full_data=True, limit=20))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, errors
+    assert loads == ["jee"], loads
+    assert predictor.data_loaded["jee"] == "full"
+    assert predictor.data_version["jee"] == version + 1
+    assert all(results)
+
+
+if __name__ == "__main__":
+    test_full_data_is_loaded_once_under_concurrency()
+    print("✅ Concurrent loading tests passed")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Test that the columnar cutoff index answers exactly like the original
+per-row eligibility check and proximity sort
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+from pathlib import Path
+import numpy as np
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cutoff_index import CutoffIndex, normalize_ownership_filter
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+CATEGORIES = ["General", "EWS", "OBC", "SC", "ST", "Foo"]
+QUOTAS = ["All India", "Home State", "X"]
+OWNERSHIPS = [None, "Any", "Government", "govt", "Private", "weird", ""]
+LOCATIONS = ["Pune, Maharashtra", "Maharashtra", "Surat, Gujarat", "Gujarat", "Delhi", "Panaji, Goa", ""]
+OWNERSHIP_VALUES = [None, "Government", "Private", "Deemed", "Central Govt", "Trust", "unknown"]
+
+
+def _rows(n, seed):
+    """Cutoff rows with few distinct closing ranks (many ties) and colleges that repeat"""
+    rng = random.Random(seed)
+    closings = [rng.randint(1, 300000) for _ in range(max(5, n // 8))]
+    rows = []
+    for i in range(n):
+        closing = rng.choice(closings)
+        row = {
+            "college": f"College {rng.randint(1, n // 6 + 1)}",
+            "branch": rng.choice(["CSE", "ECE", "ME", "Civil"]),
+            "category": rng.choice(CATEGORIES),
+            "quota": rng.choice(QUOTAS[:2]),
+            "opening_rank": rng.randint(1, closing),
+            "closing_rank": closing,
+            "location": rng.choice(LOCATIONS),
+            "year": rng.choice([2022, 2023, 2024]),
+        }
+        ownership = rng.choice(OWNERSHIP_VALUES)
+        if ownership:
+            row[rng.choice(["ownership", "college_type", "type"])] = ownership
+        rows.append(row)
+    return rows
+
+
+def _predictor(rows, exam="jee"):
+    predictor = CollegePredictorOptimized(load_on_init=False)
+    predictor.shared_store = None
+    predictor._store_exam_data(exam, predictor._clean_cutoff_data(rows, exam), "full")
+    return predictor
+
+
+def _reference(predictor, exam, rank, category="General", gender="All", quota="All India",
+               tolerance_percent=0.0, states=None, limit=300, per_college_limit=1, ownership=None):
+    """The original predict_colleges: per-row filters and full sorts, no loading"""
+    records = predictor.datasets[exam].records
+    own = (ownership or "").strip().lower()
+    if own in ("any", ""):
+        own = ""
+
+    def ownership_ok(c):
+        if not own:
+            return True
+        raw = (c.get("ownership") or c.get("ownership_type") or c.get("college_type")
+               or c.get("type") or c.get("management") or c.get("institute_type") or "")
+        val = str(raw).strip().lower()
+        if not val:
+            return False
+        is_gov = any(t in val for t in ["government", "govt", "public", "central", "state", "national"])
+        is_prv = any(t in val for t in ["private", "self", "deemed", "trust"]) and not is_gov
+        if own.startswith("gov") or own == "government" or own == "public":
+            return is_gov
+        if own.startswith("priv"):
+            return is_prv
+        return True
+
+    def state_ok(c):
+        if not states:
+            return True
+        loc = c.get("location") or ""
+        cutoff_state = loc.split(",")[-1].strip() if "," in loc else loc
+        return cutoff_state in states if cutoff_state else False
+
+    all_cutoffs_no_state = [c for c in records if ownership_ok(c)]
+    all_cutoffs = [c for c in records if state_ok(c) and ownership_ok(c)]
+    distance = lambda x: abs(x.get("closing_rank", 0) - rank)
+
+    strict_matches = [c for c in all_cutoffs
+                      if predictor._is_rank_eligible(c, rank, category, gender, quota, tolerance_percent)]
+    strict_matches.sort(key=distance)
+
+    predictions, seen_keys, counts = [], set(), {}
+    cap = max(1, min(limit, 10000))
+    per_college_limit = max(1, int(per_college_limit))
+
+    def add_cutoff(c):
+        k = (c.get("college", "").lower(), c.get("branch", "").lower())
+        if k in seen_keys:
+            return
+        college_key = c.get("college", "").strip().lower()
+        if college_key and counts.get(college_key, 0) >= per_college_limit:
+            return
+        predictions.append(c)
+        seen_keys.add(k)
+        if college_key:
+            counts[college_key] = counts.get(college_key, 0) + 1
+
+    def fill(cutoffs, window):
+        for c in cutoffs:
+            if len(predictions) >= cap:
+                break
+            if window is None or distance(c) < window:
+                add_cutoff(c)
+
+    near, far, very_far = 20000, 80000, 120000
+    if exam == "neet":
+        near, far, very_far = (60000, 140000, 250000) if rank >= 100000 else (50000, 120000, 250000)
+    elif rank >= 100000:
+        near, far, very_far = 50000, 120000, 200000
+
+    fill(strict_matches, None)
+    relaxed = sorted(all_cutoffs, key=distance)
+    fill(relaxed, near)
+    fill(relaxed, far)
+    if states:
+        relaxed_ns = sorted(all_cutoffs_no_state, key=distance)
+        fill(relaxed_ns, near)
+        fill(relaxed_ns, far)
+    fill(sorted(all_cutoffs_no_state, key=distance), very_far)
+    return predictions
+
+
+def _keys(rows):
+    return [(r["college"], r["branch"], r["category"], r["quota"], r["closing_rank"], r["location"]) for r in rows]
+
+
+def _assert_parity(predictor, exam="jee", **query):
+    expected = _reference(predictor, exam, **query)
+    actual = predictor.predict_colleges(exam, **query)
+    assert _keys(actual) == _keys(expected), query
+    # Batched confidence matches the per-row formula on the same rows
+    for pred, row in zip(actual, expected):
+        score = predictor._calculate_confidence(query["rank"], row.get("closing_rank", 0), row.get("opening_rank", 0))
+        assert pred["confidence_score"] == score
+
+
+def test_rank_mask_matches_per_row_eligibility():
+    rows = _rows(400, seed=1)
+    # Rows the cleaner keeps but whose ranks are odd: floats and equal opening/closing
+    rows += [dict(rows[0], closing_rank=1000.5, opening_rank=10), dict(rows[1], opening_rank=rows[1]["closing_rank"])]
+    predictor = _predictor(rows)
+    index = predictor.datasets["jee"].index
+    records = index.records
+    all_rows = np.arange(len(records))
+    for tolerance in (0.0, 5.0, 12.5, 33.3):
+        # Ranks on both sides of every tolerance boundary
+        boundaries = [int(r.get("closing_rank") * (1 + tolerance / 100)) for r in records[:60]]
+        for rank in sorted(set(boundaries + [b + 1 for b in boundaries] + [1, 150000])):
+            mask = index.rank_ok_mask(all_rows, rank, tolerance)
+            expected = [
+                predictor._is_rank_eligible(r, rank, r.get("category", "General"), "All", "All India", tolerance)
+                for r in records
+            ]
+            assert mask.tolist() == expected, (rank, tolerance)
+
+
+def test_category_quota_and_ownership_filters_match_the_reference():
+    predictor = _predictor(_rows(600, seed=2))
+    rng = random.Random(2)
+    for _ in range(150):
+        _assert_parity(
+            predictor,
+            rank=rng.choice([1, 5000, 50000, 99999, 100000, 150000, rng.randint(1, 320000)]),
+            category=rng.choice(CATEGORIES),
+            quota=rng.choice(QUOTAS),
+            tolerance_percent=rng.choice([0.0, 5.0, 12.5]),
+            ownership=rng.choice(OWNERSHIPS),
+            limit=rng.choice([1, 10, 50, 300]),
+            per_college_limit=rng.choice([1, 2, 5]),
+        )
+    assert normalize_ownership_filter("Any") is None and normalize_ownership_filter("") is None
+
+
+def test_proximity_walk_is_a_stable_sort_by_distance():
+    rng = random.Random(3)
+    # A run of equal closing ranks much wider than the walk's first block
+    closing = [rng.choice([100, 5000, 5000, 5001, 4999, 9000]) for _ in range(600)] + [5000] * 700
+    rows = [{"college": f"C{i}", "branch": "CSE", "closing_rank": c} for i, c in enumerate(closing)]
+    index = CutoffIndex(rows)
+    view = index.view(index.select_buckets())
+    for rank in (1, 100, 4999, 5000, 5001, 7000, 20000):
+        expected = sorted(range(len(rows)), key=lambda i: abs(closing[i] - rank))
+        walk = view.walk(rank)
+        # Growing windows continue the same walk; a window excludes rows at exactly its distance
+        visited = []
+        for window in (1, 2, 4000, None):
+            batch = [int(i) for ids in walk.rows(window) for i in ids]
+            if window is not None:
+                assert all(abs(closing[i] - rank) < window for i in batch)
+            visited += batch
+        assert visited == expected, rank
+
+
+def test_ties_and_window_edges_match_the_reference():
+    rng = random.Random(4)
+    for exam in ("jee", "neet"):
+        rows = _rows(500, seed=4)
+        # Rows at exactly the near/far window distances from the queried ranks
+        for rank in (30000, 120000):
+            for gap in (20000, 50000, 60000, 80000, 120000, 140000):
+                rows.append(dict(rows[rng.randrange(len(rows))], closing_rank=rank + gap, opening_rank=1,
+                                 college=f"Edge {rank} {gap}"))
+        predictor = _predictor(rows, exam)
+        closings = sorted({r["closing_rank"] for r in rows})
+        for _ in range(60):
+            rank = rng.choice([30000, 120000] + closings)
+            _assert_parity(predictor, exam, rank=rank, category=rng.choice(CATEGORIES),
+                           limit=rng.choice([5, 50, 10000]), per_college_limit=rng.choice([1, 3]))
+
+
+def test_state_filters_and_their_fallbacks_match_the_reference():
+    predictor = _predictor(_rows(700, seed=5))
+    rng = random.Random(5)
+    pool = ["Maharashtra", "Gujarat", "Delhi", "Goa", "Nowhere", "Pune", ""]
+    for _ in range(120):
+        _assert_parity(
+            predictor,
+            rank=rng.choice([1, 20000, 100000, rng.randint(1, 320000)]),
+            category=rng.choice(CATEGORIES),
+            quota=rng.choice(QUOTAS),
+            states=rng.choice([None, [], rng.sample(pool, rng.randint(1, 3))]),
+            ownership=rng.choice(OWNERSHIPS),
+            limit=rng.choice([3, 40, 10000]),
+            per_college_limit=rng.choice([1, 2]),
+        )
+
+
+def test_thin_coverage_loads_full_data_before_answering():
+    with tempfile.TemporaryDirectory() as tmp:
+        essential, extra = _rows(300, seed=6), _rows(900, seed=7)
+        for row in extra:
+            row["college"] = "Full " + row["college"]
+        for name, rows in (("base.json", essential), ("extra.json", extra)):
+            with open(Path(tmp) / name, "w") as f:
+                json.dump(rows, f)
+
+        predictor = CollegePredictorOptimized(load_on_init=False)
+        predictor.shared_store = None
+        predictor.data_path = Path(tmp)
+        predictor.ESSENTIAL_DATA_FILES = {"jee": ["base.json"]}
+        predictor.FULL_DATA_FILES = {"jee": ["extra.json"]}
+        predictor.load_essential_data(["jee"])
+        assert predictor.datasets["jee"].status == "essential"
+
+        # Fewer than 1000 rows pass the filters, so the query first loads the full data
+        actual = predictor.predict_colleges("jee", 50000, states=["Gujarat"], limit=10000)
+        assert predictor.datasets["jee"].status == "full"
+        assert len(predictor.datasets["jee"].records) > len(essential)
+        expected = _reference(predictor, "jee", 50000, states=["Gujarat"], limit=10000)
+        assert _keys(actual) == _keys(expected)
+        assert any(p["college"].startswith("Full ") for p in actual)
+
+
+if __name__ == "__main__":
+    test_rank_mask_matches_per_row_eligibility()
+    test_category_quota_and_ownership_filters_match_the_reference()
+    test_proximity_walk_is_a_stable_sort_by_distance()
+    test_ties_and_window_edges_match_the_reference()
+    test_state_filters_and_their_fallbacks_match_the_reference()
+    test_thin_coverage_loads_full_data_before_answering()
+    print("✅ Cutoff index parity tests passed")
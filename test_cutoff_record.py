@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the compact cutoff records kept by the optimized predictor
+"""
+
+import sys
+import os
+import json
+import pickle
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cutoff_record import CutoffRecord
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+
+def _row(college, rank, **extra):
+    return {
+        "college": college,
+        "branch": "".join(["Computer Science ", "and Engineering"]),
+        "category": "General",
+        "quota": "All India",
+        "location": "Pune, Maharashtra",
+        "closing_rank": rank,
+        **extra,
+    }
+
+
+def test_record_reads_like_its_source_row():
+    row = _row("COEP", 1200, ownership="Government", fees=[1, 2])
+    record = CutoffRecord(row)
+    assert dict(record) == row and record == row
+    assert record["ownership"] == "Government" and record.get("year") is None
+    assert "year" not in record and "fees" in record and len(record) == len(row)
+    assert json.loads(json.dumps(dict(record))) == row
+    assert pickle.loads(pickle.dumps(record)) == row
+    try:
+        record.college = "Other"
+        assert False, "records are read-only"
+    except AttributeError:
+        pass
+
+
+def test_cleaned_rows_share_strings_and_dataset_timestamp():
+    predictor = CollegePredictorOptimized(load_on_init=False)
+    raw = [_row("COEP", 1200), _row("VJTI", 1500), _row("VJTI", -1)]
+    records = predictor._clean_cutoff_data(raw, "jee")
+    assert len(records) == 2
+    assert records[0].branch is records[1].branch
+    assert "last_updated" not in records[0]
+
+    predictor._store_exam_data("jee", records, "full")
+    predictions = predictor.predict_colleges("jee", 1000, limit=10)
+    assert len(predictions) == 2
+    stamps = {p["last_updated"] for p in predictions}
+    assert stamps == {predictor.datasets["jee"].last_updated}
+
+
+if __name__ == "__main__":
+    test_record_reads_like_its_source_row()
+    test_cleaned_rows_share_strings_and_dataset_timestamp()
+    print("✅ Cutoff record tests passed")
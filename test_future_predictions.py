@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test /api/v1/predict/future projections and what-if scenarios
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from routers.predict import predictor
+
+QUERY = {"exam": "jee", "current_rank": 2000, "category": "General", "limit": 20}
+
+
+def _rows(predictions):
+    return [(p["college"], p["branch"], p["closing_rank"]) for p in predictions]
+
+
+def test_projection_matches_the_shared_predictor():
+    with TestClient(main.app) as client:
+        body = client.post("/api/v1/predict/future", json={**QUERY, "mock_test_scores": [80, 100]}).json()
+        plain = client.post("/api/v1/predict/future", json=QUERY).json()
+
+    # Average 90 -> 15% better
+    assert body["projected_rank"] == 1700 and plain["projected_rank"] == 2000
+    assert "scenarios" not in body
+    expected = predictor.predict_colleges("jee", 1700, category="General", limit=20)
+    assert _rows(body["predictions"]) == _rows(expected)
+    assert body["total_colleges"] == len(expected)
+
+
+def test_scenarios_are_answered_in_one_call():
+    scenarios = [[60], [100, 100], [80, 100]]
+    with TestClient(main.app) as client:
+        body = client.post(
+            "/api/v1/predict/future",
+            json={**QUERY, "mock_score_scenarios": scenarios, "projected_ranks": [1700, 900]},
+        ).json()
+        bad = client.post("/api/v1/predict/future", json={**QUERY, "projected_ranks": [0]})
+
+    assert [s["projected_rank"] for s in body["scenarios"]] == [2000, 1600, 1700, 1700, 900]
+    assert body["scenarios"][1]["mock_test_scores"] == [100, 100]
+    for s in body["scenarios"]:
+        expected = predictor.predict_colleges("jee", s["projected_rank"], category="General", limit=20)
+        assert _rows(s["predictions"]) == _rows(expected)
+    assert bad.status_code == 400
+
+
+if __name__ == "__main__":
+    test_projection_matches_the_shared_predictor()
+    test_scenarios_are_answered_in_one_call()
+    print("✅ Future prediction tests passed")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test hot reloading of changed cutoff data files
+"""
+
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.data_watcher import DataFileWatcher
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+
+def _write(path: Path, colleges):
+    records = [
+        {"college": name, "branch": "CSE", "category": "General", "quota": "All India",
+         "closing_rank": rank, "opening_rank": rank // 2, "year": 2024}
+        for name, rank in colleges
+    ]
+    path.write_text(json.dumps(records))
+    # Give every write a distinct mtime, however coarse the filesystem clock is
+    mtime = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+def _predictor(data_dir: Path) -> CollegePredictorOptimized:
+    predictor = CollegePredictorOptimized(load_essential_only=True, load_on_init=False)
+    predictor.data_path = data_dir
+    predictor.shared_store = None
+    return predictor
+
+
+def _colleges(predictor, exam):
+    return {p["college"] for p in predictor.predict_colleges(exam, 1000, "General", limit=50)}
+
+
+def test_reload_swaps_only_the_changed_exam():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        _write(data_dir / "jee_massive_cutoffs.json", [("IIT A", 2000)])
+        _write(data_dir / "neet_massive_cutoffs.json", [("AIIMS A", 2000)])
+        predictor = _predictor(data_dir)
+        predictor.load_essential_data(["jee", "neet"])
+        assert _colleges(predictor, "jee") == {"IIT A"}
+        versions = predictor.data_version
+
+        _write(data_dir / "jee_massive_cutoffs.json", [("IIT A", 2000), ("IIT B", 3000)])
+        assert predictor.reload_exam("jee") is True
+        assert _colleges(predictor, "jee") == {"IIT A", "IIT B"}
+        assert predictor.data_version == {"jee": versions["jee"] + 1, "neet": versions["neet"]}
+        assert predictor.reload_exam("ielts") is False  # never loaded
+
+
+def test_watcher_waits_for_stable_files_and_ignores_identical_rewrites():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        source = data_dir / "jee_massive_cutoffs.json"
+        _write(source, [("IIT A", 2000)])
+        predictor = _predictor(data_dir)
+        predictor.load_essential_data(["jee"])
+        watcher = DataFileWatcher(predictor, interval=0)
+        assert watcher.poll_once() == []  # baseline
+
+        _write(source, [("IIT A", 2000)])
+        assert watcher.poll_once() == [] and watcher.poll_once() == []
+        assert predictor.data_version["jee"] == 1
+        assert watcher.stats()["unchanged_rewrites"] == 1
+
+        _write(source, [("IIT C", 4000)])
+        assert watcher.poll_once() == []  # may still be being written
+        assert watcher.poll_once() == ["jee"]
+        assert _colleges(predictor, "jee") == {"IIT C"}
+
+        # A half-written file keeps the old data in place
+        source.write_text('[{"college": "IIT')
+        os.utime(source, ns=(source.stat().st_mtime_ns + 10**9,) * 2)
+        watcher.poll_once()
+        assert watcher.poll_once() == []
+        assert "jee" in watcher.stats()["errors"]
+        assert _colleges(predictor, "jee") == {"IIT C"}
+        print(f"Watcher stats: {watcher.stats()}")
+
+
+if __name__ == "__main__":
+    test_reload_swaps_only_the_changed_exam()
+    test_watcher_waits_for_stable_files_and_ignores_identical_rewrites()
+    print("✅ Hot reload tests passed")
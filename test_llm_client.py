@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test the async LLM provider client with local stub providers
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.llm_client import LLMClient, LLMProvider, StubProvider
+
+
+class NamedStub(StubProvider):
+    def __init__(self, name, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+
+
+def _ask(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_repeated_prompts_are_served_from_cache():
+    stub = NamedStub("a", reply="1. IIT Bombay")
+    client = LLMClient(providers=[stub])
+
+    async def main():
+        first = await client.complete(_ask("Top colleges for  rank 500"))
+        again = await client.complete(_ask("top colleges for rank 500 "))
+        together = await asyncio.gather(*(client.complete(_ask(f"other {i % 2}")) for i in range(6)))
+        await client.aclose()
+        return first, again, together
+
+    first, again, together = asyncio.run(main())
+    assert first == again == ("a", "1. IIT Bombay")
+    assert len(together) == 6 and all(together)
+    # One call for the repeated prompt and one per distinct concurrent prompt
+    assert stub.calls == 3
+    assert client.stats()["shared_inflight"] == 4
+
+
+def test_slow_or_failing_providers_are_hedged():
+    slow = NamedStub("slow", reply="slow answer", delay=1.0)
+    fast = NamedStub("fast", reply="fast answer")
+    broken = NamedStub("broken", fail=True)
+    client = LLMClient(providers=[slow, fast], hedge_after=0.05)
+    failover = LLMClient(providers=[broken, fast], hedge_after=5)
+    deadline = LLMClient(providers=[slow], timeout=0.05)
+
+    async def main():
+        return (
+            await client.complete(_ask("hedge")),
+            await failover.complete(_ask("failover")),
+            await deadline.complete(_ask("deadline")),
+        )
+
+    hedged, failed_over, timed_out = asyncio.run(main())
+    assert hedged == ("fast", "fast answer")
+    assert client.stats()["hedges"] == 1
+    assert failed_over == ("fast", "fast answer")
+    assert failover.stats()["failures"] == {"broken": 1}
+    assert timed_out is None
+
+
+def test_busy_provider_is_skipped_instead_of_queued():
+    slow = NamedStub("slow", reply="answer", delay=0.2)
+    client = LLMClient(providers=[slow], max_concurrency=1)
+
+    async def main():
+        return await asyncio.gather(client.complete(_ask("one")), client.complete(_ask("two")))
+
+    one, two = asyncio.run(main())
+    assert one == ("slow", "answer") and two is None
+    assert client.stats()["shed"] == {"slow": 1}
+    print(f"LLM client stats: {client.stats()}")
+
+
+def test_waiters_survive_a_cancelled_owner():
+    stub = NamedStub("a", reply="answer", delay=0.1)
+    client = LLMClient(providers=[stub])
+
+    async def main():
+        owner = asyncio.ensure_future(client.complete(_ask("shared")))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.ensure_future(client.complete(_ask("shared"))) for _ in range(2)]
+        leaver = asyncio.ensure_future(client.complete(_ask("shared")))
+        await asyncio.sleep(0.01)
+        # A waiter's own cancellation still propagates and leaves the shared call running
+        leaver.cancel()
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        results = await asyncio.gather(owner, leaver, *waiters, return_exceptions=True)
+        await client.aclose()
+        return results
+
+    owner, leaver, *waiters = asyncio.run(main())
+    assert isinstance(owner, asyncio.CancelledError) and isinstance(leaver, asyncio.CancelledError)
+    # One waiter takes over the call, the other shares it
+    assert waiters == [("a", "answer"), ("a", "answer")]
+    assert stub.calls == 2
+
+
+def test_providers_must_implement_complete():
+    class Incomplete(LLMProvider):
+        name = "incomplete"
+
+    try:
+        Incomplete()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("a provider without complete() should not be instantiable")
+
+
+def test_hedges_count_started_calls_only():
+    providers = [NamedStub(name, reply=name, delay=0.3) for name in ("a", "b", "c")]
+    client = LLMClient(providers=providers, hedge_after=0.02)
+
+    reply = asyncio.run(client.complete(_ask("slow")))
+    assert reply == ("a", "a")
+    # Two calls run at most, so only "b" was started as a hedge despite many timeouts
+    assert client.stats()["hedges"] == 1
+    assert [p.calls for p in providers] == [1, 1, 0]
+
+
+def test_cancelled_provider_calls_give_their_slot_back():
+    stub = NamedStub("a", reply="answer")
+    client = LLMClient(providers=[stub], max_concurrency=1)
+
+    async def main():
+        owner = asyncio.ensure_future(client.complete(_ask("first")))
+        await asyncio.sleep(0)
+        # The provider call has been created but has not run its first step yet
+        for task in asyncio.all_tasks():
+            if task is not owner and task is not asyncio.current_task():
+                task.cancel()
+        first = await owner
+        second = await client.complete(_ask("second"))
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first is None and second == ("a", "answer")
+    assert stub.calls == 1 and client.stats()["shed"] == {}
+
+
+if __name__ == "__main__":
+    test_repeated_prompts_are_served_from_cache()
+    test_slow_or_failing_providers_are_hedged()
+    test_busy_provider_is_skipped_instead_of_queued()
+    test_waiters_survive_a_cancelled_owner()
+    test_hedges_count_started_calls_only()
+    test_cancelled_provider_calls_give_their_slot_back()
+    test_providers_must_implement_complete()
+    print("✅ LLM client tests passed")
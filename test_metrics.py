@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the Prometheus /metrics endpoint
+"""
+
+import sys
+import os
+import re
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from utils.metrics import Histogram, format_metric
+import main
+
+
+def _sample(text, name, **labels):
+    for line in text.splitlines():
+        if line.startswith(name + "{") or line.startswith(name + " "):
+            found = dict(re.findall(r'(\w+)="([^"]*)"', line.split(" ")[0]))
+            if all(found.get(k) == v for k, v in labels.items()):
+                return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("/a",), value)
+    text = histogram.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert _sample(text, "latency_seconds_bucket", route="/a", le="0.1") == 2
+    assert _sample(text, "latency_seconds_bucket", route="/a", le="1.0") == 3
+    assert _sample(text, "latency_seconds_bucket", route="/a", le="+Inf") == 4
+    assert _sample(text, "latency_seconds_count", route="/a") == 4
+    assert abs(_sample(text, "latency_seconds_sum", route="/a") - 3.65) < 1e-9
+    assert format_metric("x", "gauge", "X", [({"name": 'a"b'}, 1)]).endswith('x{name="a\\"b"} 1\n')
+
+
+def test_metrics_endpoint_reports_real_traffic():
+    with TestClient(main.app) as client:
+        for rank in (5000, 5000):
+            assert client.post("/api/v1/predict", json={"exam": "jee", "rank": rank}).status_code == 200
+        client.get("/api/v1/college/Some%20College")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+
+        route = {"method": "POST", "route": "/api/v1/predict", "status": "2xx"}
+        assert _sample(text, "collink_http_request_duration_seconds_count", **route) >= 2
+        assert _sample(text, "collink_http_request_duration_seconds_bucket", le="+Inf", **route) >= 2
+        assert _sample(text, "collink_http_request_duration_seconds_count", route="/api/v1/college/{college_name}")
+        # The scrape itself is the one request in flight
+        assert _sample(text, "collink_http_requests_in_flight", method="GET") == 1
+        assert _sample(text, "collink_http_requests_in_flight", method="POST") == 0
+
+        assert _sample(text, "collink_prediction_cache_hits_total") >= 1
+        assert _sample(text, "collink_prediction_cache_misses_total") >= 1
+        assert _sample(text, "collink_dataset_records", exam="jee") > 0
+        assert _sample(text, "collink_dataset_load_seconds", exam="jee") is not None
+        assert _sample(text, "collink_worker_pool_queue_depth") == 0
+        assert _sample(text, "collink_worker_pool_jobs_total", outcome="completed") >= 2
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_metrics_endpoint_reports_real_traffic()
+    print("✅ Metrics tests passed")
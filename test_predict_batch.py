@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the NDJSON batch prediction endpoint /api/v1/predict/batch
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from routers import predict
+
+CANDIDATES = [
+    {"id": "a", "rank": 5000, "category": "General"},
+    {"id": "b", "rank": 900, "category": "OBC"},
+    {"id": "c", "rank": 120000, "category": "General"},
+    {"rank": 40000, "category": "SC", "states": ["Maharashtra"]},
+    {"id": "e", "rank": 900, "category": "OBC"},
+]
+
+
+def _lines(response):
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    text = response.text
+    # One JSON document per line, each terminated by a newline
+    assert text.endswith("\n")
+    return [json.loads(line) for line in text.split("\n")[:-1]]
+
+
+def test_batch_lines_are_tagged_with_their_candidate():
+    with TestClient(main.app) as client:
+        response = client.post("/api/v1/predict/batch", json={"exam": "jee", "candidates": CANDIDATES, "limit": 20})
+        assert response.status_code == 200
+        lines = _lines(response)
+
+    assert sorted(line["index"] for line in lines) == list(range(len(CANDIDATES)))
+    # Lines follow the filter groups: the OBC candidates come after the first General group
+    assert [line["index"] for line in lines] != list(range(len(CANDIDATES)))
+    for line in lines:
+        candidate = CANDIDATES[line["index"]]
+        assert line["id"] == candidate.get("id")
+        assert line["rank"] == candidate["rank"] and line["category"] == candidate["category"]
+        assert line["total"] == len(line["predictions"]) <= 20
+
+
+def test_each_batch_line_matches_a_single_prediction():
+    with TestClient(main.app) as client:
+        lines = _lines(client.post(
+            "/api/v1/predict/batch",
+            json={"exam": "jee", "candidates": CANDIDATES, "limit": 20, "tolerance_percent": 5.0},
+        ))
+        for line in lines:
+            candidate = {k: v for k, v in CANDIDATES[line["index"]].items() if k != "id"}
+            single = client.post(
+                "/api/v1/predict", json={"exam": "jee", "limit": 20, "tolerance_percent": 5.0, **candidate}
+            ).json()["predictions"]
+            assert line["predictions"] == single, candidate
+    assert any(line["predictions"] for line in lines)
+
+
+def test_batch_rejects_oversized_and_invalid_requests():
+    with TestClient(main.app) as client:
+        too_many = [{"rank": 100}] * (predict.MAX_BATCH_CANDIDATES + 1)
+        response = client.post("/api/v1/predict/batch", json={"exam": "jee", "candidates": too_many})
+        assert response.status_code == 400 and str(predict.MAX_BATCH_CANDIDATES) in response.json()["detail"]
+        assert client.post("/api/v1/predict/batch", json={"exam": "jee", "candidates": []}).status_code == 400
+        assert client.post("/api/v1/predict/batch", json={"exam": "gre", "candidates": CANDIDATES}).status_code == 400
+        bad_rank = client.post("/api/v1/predict/batch", json={"exam": "jee", "candidates": [{"rank": 0}]})
+        assert bad_rank.status_code == 400
+
+
+if __name__ == "__main__":
+    test_batch_lines_are_tagged_with_their_candidate()
+    test_each_batch_line_matches_a_single_prediction()
+    test_batch_rejects_oversized_and_invalid_requests()
+    print("✅ Batch prediction tests passed")
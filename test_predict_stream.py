@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the NDJSON streaming mode of /api/v1/predict
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from routers import predict
+
+REQUEST = {"exam": "jee", "rank": 5000, "category": "General", "limit": 20}
+
+
+def _lines(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(predict.NDJSON_MEDIA_TYPE)
+    assert response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.split("\n")[:-1]]
+
+
+def _pool_idle():
+    stats = predict.prediction_pool.stats()
+    return stats["pending"] == 0 and stats["running"] == 0
+
+
+def test_stream_query_parameter_matches_the_json_response():
+    with TestClient(main.app) as client:
+        expected = client.post("/api/v1/predict", json=REQUEST).json()["predictions"]
+        lines = _lines(client.post("/api/v1/predict?stream=true", json=REQUEST))
+
+    *predictions, end = lines
+    assert all(line["event"] == "prediction" for line in predictions)
+    assert [line["data"] for line in predictions] == expected
+    assert end["event"] == "end" and end["total"] == len(predictions)
+    assert end["exam"] == "jee" and end["rank"] == 5000 and end["category"] == "General"
+    assert end["response_time"] >= 0 and end["data_source"] != "unknown"
+    assert "error" not in end
+    assert _pool_idle()
+
+
+def test_accept_header_selects_the_stream():
+    with TestClient(main.app) as client:
+        lines = _lines(client.post("/api/v1/predict", json=REQUEST, headers={"Accept": predict.NDJSON_MEDIA_TYPE}))
+        assert lines[-1]["event"] == "end" and lines[-1]["total"] == len(lines) - 1
+        # Without the header or the parameter the response stays plain JSON
+        plain = client.post("/api/v1/predict", json=REQUEST)
+        assert plain.headers["content-type"].startswith("application/json")
+        # Request validation still answers with a status code, not a stream
+        bad = client.post("/api/v1/predict?stream=true", json=dict(REQUEST, rank=0))
+        assert bad.status_code == 400
+
+
+def test_generator_failure_ends_the_stream_with_an_error_line():
+    def failing_predictions(**kwargs):
+        yield {"college": "First College", "branch": "CSE"}
+        raise RuntimeError("index went away")
+
+    original = predict.predictor.iter_predictions
+    predict.predictor.iter_predictions = failing_predictions
+    try:
+        with TestClient(main.app) as client:
+            failed_before = predict.prediction_pool.stats()["failed"]
+            lines = _lines(client.post("/api/v1/predict?stream=true", json=REQUEST))
+            failed_after = predict.prediction_pool.stats()["failed"]
+    finally:
+        predict.predictor.iter_predictions = original
+
+    assert [line["event"] for line in lines] == ["prediction", "end"]
+    assert lines[0]["data"]["college"] == "First College"
+    assert lines[1]["total"] == 1 and lines[1]["error"] == "index went away"
+    # The error is reported in-band, so the slot closes as a completed job
+    assert failed_after == failed_before
+    assert _pool_idle()
+
+
+def test_abandoned_stream_releases_its_pool_slot():
+    def endless_predictions(**kwargs):
+        while True:
+            yield {"college": "Loop College", "branch": "CSE"}
+
+    original = predict.predictor.iter_predictions
+    predict.predictor.iter_predictions = endless_predictions
+    try:
+        # Driven directly: the test client reads a body to its end, a disconnecting client does not
+        lines = predict.prediction_pool.stream(predict._stream_predictions(predict.PredictionRequest(**REQUEST), 0.0))
+        assert json.loads(next(lines))["event"] == "prediction"
+        assert predict.prediction_pool.stats()["running"] == 1
+        lines.close()
+    finally:
+        predict.predictor.iter_predictions = original
+    assert _pool_idle()
+
+
+if __name__ == "__main__":
+    test_stream_query_parameter_matches_the_json_response()
+    test_accept_header_selects_the_stream()
+    test_generator_failure_ends_the_stream_with_an_error_line()
+    test_abandoned_stream_releases_its_pool_slot()
+    print("✅ Prediction streaming tests passed")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the prediction result cache in front of CollegePredictorOptimized
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.match_logic_optimized import CollegePredictorOptimized
+from utils.prediction_cache import PredictionCache
+
+
+def test_lru_eviction_and_invalidation():
+    """Entries are evicted least-recently-used first and can be dropped per exam"""
+    cache = PredictionCache(max_entries=2, ttl_seconds=0)
+    cache.put(("jee", 1), [{"a": 1}])
+    cache.put(("jee", 2), [{"a": 2}])
+    assert cache.get(("jee", 1)) == [{"a": 1}]
+    cache.put(("neet", 3), [{"a": 3}])
+    assert cache.get(("jee", 2)) is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate("jee")
+    assert cache.get(("jee", 1)) is None
+    assert cache.get(("neet", 3)) == [{"a": 3}]
+
+
+def test_predictions_are_cached_and_copied():
+    """Repeated requests hit the cache and callers get their own dicts"""
+    predictor = CollegePredictorOptimized(load_essential_only=True)
+    first = predictor.predict_colleges("jee", 5000, "General", limit=20)
+    first[0]["user_category"] = "OBC"
+
+    hits_before = predictor.prediction_cache.stats()["hits"]
+    second = predictor.predict_colleges("jee", 5000, "General", limit=20)
+    assert predictor.prediction_cache.stats()["hits"] == hits_before + 1
+    assert "user_category" not in second[0]
+    assert [p["college"] for p in first] == [p["college"] for p in second]
+
+    status = predictor.get_data_status()
+    assert status["prediction_cache"]["size"] >= 1
+    print(f"Cache stats: {status['prediction_cache']}")
+
+
+def test_reload_invalidates_cache():
+    """Replacing an exam's dataset bumps its version and drops its cached results"""
+    predictor = CollegePredictorOptimized(load_essential_only=True)
+    predictor.predict_colleges("neet", 1000, "General", limit=5)
+    version = predictor.data_version["neet"]
+
+    predictor._store_exam_data("neet", list(predictor.cutoff_data["neet"]), "full")
+    assert predictor.data_version["neet"] == version + 1
+    assert predictor.prediction_cache.stats()["size"] == 0
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_invalidation()
+    test_predictions_are_cached_and_copied()
+    test_reload_invalidates_cache()
+    print("✅ Prediction cache tests passed")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test cursor pagination of CollegePredictorOptimized results
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.match_logic_optimized import CollegePredictorOptimized
+from utils.prediction_cursor import (
+    MAX_CURSOR_BYTES, CursorError, StaleCursorError, WalkPosition, decode_cursor, encode_cursor,
+)
+
+
+def _keys(predictions):
+    return [(p["college"], p["branch"], p["closing_rank"]) for p in predictions]
+
+
+def test_pages_concatenate_to_full_result():
+    """Walking the cursors yields exactly the unpaged result list"""
+    predictor = CollegePredictorOptimized(load_essential_only=True)
+    for exam, rank in (("jee", 5000), ("neet", 1000)):
+        full = predictor.predict_colleges(exam, rank, "OBC", limit=200, per_college_limit=2)
+        pages, cursor = [], None
+        while True:
+            page, cursor = predictor.predict_page(
+                exam, rank, "OBC", limit=200, per_college_limit=2, page_size=3, cursor=cursor
+            )
+            pages.extend(page)
+            if cursor is None:
+                break
+        assert _keys(pages) == _keys(full), exam
+        print(f"{exam}: {len(full)} predictions paged in threes")
+
+
+def test_cursor_is_bound_to_query_and_data():
+    """A cursor is rejected for another query and once the dataset changes"""
+    predictor = CollegePredictorOptimized(load_essential_only=True)
+    _, cursor = predictor.predict_page("jee", 5000, page_size=1)
+    assert cursor is not None
+
+    for bad_cursor, kwargs in ((cursor, {"rank": 6000}), ("not-a-cursor", {"rank": 5000})):
+        try:
+            predictor.predict_page("jee", page_size=1, cursor=bad_cursor, **kwargs)
+        except CursorError:
+            pass
+        else:
+            raise AssertionError("cursor should have been rejected")
+
+    predictor._store_exam_data("jee", predictor.cutoff_data["jee"][:-1], "full")
+    try:
+        predictor.predict_page("jee", 5000, page_size=1, cursor=cursor)
+    except StaleCursorError:
+        pass
+    else:
+        raise AssertionError("stale cursor should have been rejected")
+
+
+def test_cursor_size_is_bounded_by_the_limit():
+    """Cursors grow with page depth up to the query's limit and no further"""
+    rng = random.Random(0)
+    rows = [
+        {"college": f"College {i}", "branch": "CSE", "category": "General", "quota": "All India",
+         "opening_rank": 1, "closing_rank": rng.randint(2, 1000000), "location": "Delhi"}
+        for i in range(30000)
+    ]
+    predictor = CollegePredictorOptimized(load_on_init=False)
+    predictor.shared_store = None
+    predictor._store_exam_data("jee", predictor._clean_cutoff_data(rows, "jee"), "full")
+
+    sizes, cursor, total = [], None, 0
+    while True:
+        page, cursor = predictor.predict_page("jee", 500000, limit=10000, page_size=500, cursor=cursor)
+        total += len(page)
+        if cursor is None:
+            break
+        sizes.append(len(cursor))
+    assert total == 10000 and len(sizes) == 19
+    # The deepest cursor carries 9500 rows and stays far below the decode limit
+    assert sizes == sorted(sizes) and sizes[-1] < 32 * 1024 < MAX_CURSOR_BYTES
+    print(f"deepest cursor: {sizes[-1]} bytes")
+
+    # A position claiming more rows than the limit is rejected
+    payload = decode_cursor(predictor.predict_page("jee", 500000, limit=3, page_size=1)[1])
+    forged = WalkPosition(payload["p"], tuple(payload["w"]), payload["o"], list(range(4)))
+    try:
+        predictor.predict_page("jee", 500000, limit=3, page_size=1,
+                               cursor=encode_cursor(dict(forged.to_payload(), q=payload["q"], d=payload["d"])))
+    except CursorError as e:
+        assert "out of range" in str(e)
+    else:
+        raise AssertionError("oversized cursor should have been rejected")
+
+
+if __name__ == "__main__":
+    test_pages_concatenate_to_full_result()
+    test_cursor_is_bound_to_query_and_data()
+    test_cursor_size_is_bounded_by_the_limit()
+    print("✅ Prediction cursor tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the rank sweep behind /api/v1/predict/sweep
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from utils.cutoff_index import CATEGORY_HIERARCHY, CutoffIndex
+from utils.rank_sweep import RankSweep
+
+
+def _records(n=3000, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        closing = rng.choice([0, rng.randint(1, 60000)])
+        records.append({
+            "college": f"College {rng.randint(1, 150)}",
+            "branch": rng.choice(["CSE", "ECE", "ME"]),
+            "category": rng.choice(list(CATEGORY_HIERARCHY)),
+            "quota": "All India",
+            "location": rng.choice(["Pune, Maharashtra", "Chennai, Tamil Nadu"]),
+            "opening_rank": 1,
+            "closing_rank": closing,
+        })
+    return records
+
+
+def _within_reach(records, rank, window, category, tolerance):
+    level = CATEGORY_HIERARCHY[category]
+    reach = set()
+    for r in records:
+        cutoff = r["closing_rank"] or r["opening_rank"]
+        if tolerance > 0:
+            cutoff = int(cutoff * (1 + tolerance / 100))
+        if CATEGORY_HIERARCHY[r["category"]] <= level and rank <= cutoff <= rank + window:
+            reach.add(r["college"])
+    return reach
+
+
+def test_steps_replay_to_the_reachable_set():
+    records = _records()
+    index = CutoffIndex(records)
+    for category, tolerance in (("General", 0.0), ("OBC", 10.0)):
+        view = index.view(index.select_buckets(None, None, category, "All India"))
+        sweep = RankSweep(index, view, tolerance)
+        ranks = list(range(500, 50001, 2500)) + list(range(48000, 0, -6000))
+        reach = set()
+        for step in sweep.steps(ranks, 4000):
+            assert not set(step["entered"]) & reach
+            assert set(step["left"]) <= reach
+            reach = (reach - set(step["left"])) | set(step["entered"])
+            assert reach == _within_reach(records, step["rank"], 4000, category, tolerance)
+            assert step["total_colleges"] == len(reach)
+
+
+def test_sweep_endpoint():
+    with TestClient(main.app) as client:
+        body = client.post(
+            "/api/v1/predict/sweep", json={"exam": "jee", "rank_from": 5000, "rank_to": 1000, "step": 1000}
+        ).json()
+        too_many = client.post(
+            "/api/v1/predict/sweep", json={"exam": "jee", "rank_from": 1, "rank_to": 10**7, "step": 1}
+        )
+        negative_window = client.post(
+            "/api/v1/predict/sweep", json={"exam": "jee", "rank_from": 5000, "rank_to": 1000, "window": -5}
+        )
+    assert [s["rank"] for s in body["steps"]] == [5000, 4000, 3000, 2000, 1000]
+    assert body["steps"][0]["left"] == []
+    assert too_many.status_code == 400
+    assert negative_window.status_code == 400 and "Window" in negative_window.json()["detail"]
+
+
+if __name__ == "__main__":
+    test_steps_replay_to_the_reachable_set()
+    test_sweep_endpoint()
+    print("✅ Rank sweep tests passed")
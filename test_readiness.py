@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test startup warm-up and the /api/v1/ready endpoint
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+
+def test_deferred_predictor_loads_exams_on_demand():
+    """Without load_on_init nothing is parsed until an exam is first queried"""
+    predictor = CollegePredictorOptimized(load_essential_only=True, load_on_init=False)
+    assert predictor.readiness()["ready"] is False
+
+    assert predictor.predict_colleges("jee", 5000, "General", limit=5)
+    assert predictor.readiness()["exams"]["jee"]["status"] != "missing"
+    assert predictor.readiness()["exams"]["cat"]["status"] == "missing"
+
+
+def test_ready_endpoint_reports_warmup():
+    """The startup hook loads essential data, then full data in the background"""
+    import main
+
+    with TestClient(main.app) as client:
+        report = client.get("/api/v1/ready").json()
+        assert report["ready"] is True
+        assert set(report["exams"]) == {"jee", "neet", "ielts", "cat"}
+
+        for _ in range(100):
+            response = client.get("/api/v1/ready", params={"full": True})
+            if response.status_code == 200:
+                break
+            time.sleep(0.05)
+        assert response.status_code == 200
+        assert response.json()["warmup"]["state"] == "done"
+        print(f"Readiness: {response.json()['exams']}")
+
+        assert client.get("/api/v1/health").status_code == 200
+
+
+if __name__ == "__main__":
+    test_deferred_predictor_loads_exams_on_demand()
+    test_ready_endpoint_reports_warmup()
+    print("✅ Readiness tests passed")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test cross-file deduplication of cutoff records at load time
+"""
+
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.match_logic_optimized import CollegePredictorOptimized
+
+
+def _row(college, location, closing_rank):
+    return {"college": college, "branch": "CSE", "category": "General", "quota": "All India",
+            "location": location, "closing_rank": closing_rank, "opening_rank": 1, "year": 2024}
+
+
+def test_duplicates_across_files_are_loaded_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        (data_dir / "jee_massive_cutoffs.json").write_text(json.dumps([
+            _row("IIT A", "Pune, Maharashtra", 1000),
+            _row("IIT A", "Hyderabad, Telangana", 2000),  # another campus, kept
+        ]))
+        (data_dir / "jee_10000_cutoffs.json").write_text(json.dumps([
+            _row("IIT A", "Pune, Maharashtra", 1000),
+            _row("IIT B", "Delhi", 3000),
+        ]))
+        (data_dir / "jee_cutoffs_extended.json").write_text(json.dumps([_row("IIT B", "Delhi", 3000)]))
+
+        predictor = CollegePredictorOptimized(load_essential_only=True, load_on_init=False)
+        predictor.data_path = data_dir
+        predictor.shared_store = None
+        predictor.load_essential_data(["jee"])
+        assert len(predictor.cutoff_data["jee"]) == 3
+        predictor.load_full_data("jee")
+        assert len(predictor.cutoff_data["jee"]) == 3
+
+        ingest = predictor.get_data_status()["ingest"]["jee"]
+        assert ingest["jee_10000_cutoffs.json"] == {"records": 2, "duplicates": 1}
+        assert ingest["jee_cutoffs_extended.json"] == {"records": 1, "duplicates": 1}
+        # Listed files that do not exist are reported as such, not as empty
+        assert ingest["jee_comprehensive_cutoffs.json"] == {"missing": True}
+        assert ingest["gujarat_colleges_jee.json"] == {"missing": True}
+        print(f"Ingest report: {ingest}")
+
+
+if __name__ == "__main__":
+    test_duplicates_across_files_are_loaded_once()
+    print("✅ Record dedup tests passed")
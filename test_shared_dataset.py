@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test memory-mapped cutoff datasets shared between predictor processes
+"""
+
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.match_logic_optimized import CollegePredictorOptimized
+from utils.shared_dataset import SharedDatasetStore, SharedRecords
+
+
+def _strip(predictions):
+    return [{k: v for k, v in p.items() if k != "last_updated"} for p in predictions]
+
+
+def test_shared_predictions_match_private_load():
+    """A predictor attached to the shared store answers exactly like a private one"""
+    with tempfile.TemporaryDirectory() as shared_dir:
+        private = CollegePredictorOptimized(load_essential_only=True)
+        shared = CollegePredictorOptimized(load_essential_only=True, shared_dir=shared_dir)
+        assert isinstance(shared.cutoff_data["jee"], SharedRecords)
+
+        for exam, rank in (("jee", 5000), ("neet", 1000), ("jee", 150000)):
+            expected = private.predict_colleges(exam, rank, "OBC", limit=50, per_college_limit=2)
+            got = shared.predict_colleges(exam, rank, "OBC", limit=50, per_college_limit=2)
+            assert _strip(got) == _strip(expected), exam
+        assert shared.cutoff_index["jee"].fingerprint == private.cutoff_index["jee"].fingerprint
+
+
+def test_second_process_attaches_without_building():
+    """Once compiled, later predictors only map the files"""
+    with tempfile.TemporaryDirectory() as shared_dir:
+        CollegePredictorOptimized(load_essential_only=True, shared_dir=shared_dir)
+
+        builds = []
+        original = SharedDatasetStore._write
+
+        def counting_write(self, directory, records, sources):
+            builds.append(directory.name)
+            original(self, directory, records, sources)
+
+        SharedDatasetStore._write = counting_write
+        try:
+            attached = CollegePredictorOptimized(load_essential_only=True, shared_dir=shared_dir)
+        finally:
+            SharedDatasetStore._write = original
+        assert builds == []
+        assert len(attached.cutoff_data["jee"]) > 0
+        print(f"Attached datasets: {attached.get_data_status()['record_counts']}")
+
+
+def test_read_only_snapshot_tracks_source_content():
+    """Snapshots survive a touch but are ignored once a source file's content changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "jee_test.json"
+        records = [{"college": "IIT X", "branch": "CSE", "closing_rank": 100, "opening_rank": 50}]
+        source.write_text(json.dumps(records))
+        build = lambda: [dict(r) for r in records]
+
+        SharedDatasetStore(Path(tmp) / "snapshots").load_or_build("jee-essential", [source], build)
+        snapshots = SharedDatasetStore(Path(tmp) / "snapshots", writable=False)
+
+        os.utime(source, (0, 0))
+        compiled = snapshots.load_or_build("jee-essential", [source], build)
+        assert compiled is not None and compiled[0][0]["college"] == "IIT X"
+
+        source.write_text(json.dumps(records + records))
+        assert snapshots.load_or_build("jee-essential", [source], build) is None
+
+
+if __name__ == "__main__":
+    test_shared_predictions_match_private_load()
+    test_second_process_attaches_without_building()
+    test_read_only_snapshot_tracks_source_content()
+    print("✅ Shared dataset tests passed")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test per-stage request timings (Server-Timing header and /api/v1/timings)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from utils import stage_timer
+from utils.stage_timer import StageStats, StageTimer
+import main
+
+
+def test_timed_iter_counts_rows_and_charges_only_production_time():
+    timer = StageTimer()
+    assert list(stage_timer.timed_iter(timer, "walk", range(5), "rows_walk")) == [0, 1, 2, 3, 4]
+    items = stage_timer.timed_iter(timer, "walk", iter(range(100)), "rows_walk")
+    next(items), next(items)
+    items.close()
+    assert timer.counts == {"rows_walk": 7} and timer.stages["walk"] >= 0.0
+
+    # Outside a request the helpers are no-ops
+    with stage_timer.stage("load"):
+        stage_timer.count("rows", 3)
+    assert stage_timer.current() is None
+
+    stats = StageStats()
+    stats.record("GET /x", timer)
+    stats.record("GET /x", StageTimer())
+    entry = stats.snapshot()["GET /x"]
+    assert entry["requests"] == 2 and entry["stages"]["walk"]["requests"] == 1
+    assert entry["avg_rows"] == {"rows_walk": 3.5}
+
+
+def test_predict_reports_stage_timings():
+    with TestClient(main.app) as client:
+        # A cached answer skips the candidate phases
+        main.predict.predictor.prediction_cache.invalidate()
+        response = client.post("/api/v1/predict", json={"exam": "jee", "rank": 5000})
+        assert response.status_code == 200
+        header = response.headers["server-timing"]
+        for part in ("strict;dur=", "respond;dur=", "total;dur=", "rows_strict;desc="):
+            assert part in header, header
+
+        client.get("/api/v1/college/Some%20College")
+        timings = client.get("/api/v1/timings").json()
+        entry = timings["POST /api/v1/predict"]
+        assert entry["requests"] >= 1 and "rows_strict" in entry["avg_rows"]
+        assert entry["stages"]["total"]["max_ms"] >= entry["stages"]["total"]["avg_ms"] > 0
+        # Endpoints are keyed by route template, not by the raw path
+        assert "GET /api/v1/college/{college_name}" in timings
+
+
+if __name__ == "__main__":
+    test_timed_iter_counts_rows_and_charges_only_production_time()
+    test_predict_reports_stage_timings()
+    print("✅ Stage timing tests passed")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test the bounded worker pool used to run predictions off the event loop
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.worker_pool import PoolSaturatedError, WorkerPool
+
+
+def test_event_loop_stays_responsive():
+    """Blocking work on the pool does not stall other coroutines"""
+    pool = WorkerPool(workers=1, max_pending=4)
+
+    async def main():
+        heavy = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        ticked = time.perf_counter() - start
+        await heavy
+        return ticked
+
+    ticked = asyncio.run(main())
+    assert ticked < 0.2, ticked
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+def test_admission_limit_rejects_excess_work():
+    """Work beyond max_pending is rejected and counted"""
+    pool = WorkerPool(workers=1, max_pending=2)
+
+    async def main():
+        jobs = [asyncio.ensure_future(pool.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            await pool.run(time.sleep, 0)
+        except PoolSaturatedError:
+            rejected = True
+        else:
+            rejected = False
+        pending = pool.stats()["pending"]
+        await asyncio.gather(*jobs)
+        return rejected, pending
+
+    rejected, pending = asyncio.run(main())
+    assert rejected
+    assert pending == 2
+    stats = pool.stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 2 and stats["pending"] == 0
+    print(f"Pool stats: {stats}")
+    pool.shutdown()
+
+
+def test_cancelled_callers_do_not_release_running_jobs():
+    """A job stays pending until it finishes, even if its caller was cancelled"""
+    pool = WorkerPool(workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        queued = asyncio.ensure_future(pool.run(time.sleep, 0))
+        while pool.stats()["running"] == 0:
+            await asyncio.sleep(0.01)
+        running.cancel()
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        # The queued job never starts; the running one still holds its slot
+        during = pool.stats()
+        release.set()
+        while pool.stats()["pending"]:
+            await asyncio.sleep(0.01)
+        return during
+
+    during = asyncio.run(main())
+    assert during["pending"] == 1 and during["running"] == 1
+    stats = pool.stats()
+    assert stats["running"] == 0 and stats["completed"] == 1 and stats["failed"] == 1
+    pool.shutdown()
+
+
+def test_slots_are_admitted_atomically():
+    """Concurrent slots never push the pool past max_pending"""
+    pool = WorkerPool(workers=1, max_pending=3)
+    start, release = threading.Barrier(8), threading.Event()
+    admitted, rejected = [], []
+
+    def stream():
+        start.wait()
+        try:
+            with pool.slot():
+                admitted.append(pool.stats()["pending"])
+                release.wait(5)
+        except PoolSaturatedError:
+            rejected.append(True)
+
+    threads = [threading.Thread(target=stream) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while len(admitted) + len(rejected) < 8:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(admitted) == 3 and len(rejected) == 5 and max(admitted) <= 3
+    assert pool.stats()["pending"] == 0 and pool.stats()["rejected"] == 5
+    pool.shutdown()
+
+
+def test_stream_takes_its_slot_before_the_first_item():
+    pool = WorkerPool(workers=1, max_pending=1)
+    body = pool.stream(iter(["a", "b"]))
+    # Admitted up front, so an overloaded response fails before it starts
+    assert pool.stats()["running"] == 1
+    try:
+        pool.stream(iter(["c"]))
+    except PoolSaturatedError:
+        pass
+    else:
+        raise AssertionError("a second stream should not be admitted")
+    assert list(body) == ["a", "b"] and pool.stats()["pending"] == 0
+    # A stream that is dropped unread still gives its slot back
+    unread = pool.stream(iter(["d"]))
+    del unread
+    assert pool.stats()["pending"] == 0 and pool.stats()["failed"] == 1
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_event_loop_stays_responsive()
+    test_admission_limit_rejects_excess_work()
+    test_cancelled_callers_do_not_release_running_jobs()
+    test_slots_are_admitted_atomically()
+    test_stream_takes_its_slot_before_the_first_item()
+    print("✅ Worker pool tests passed")
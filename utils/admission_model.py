@@ -0,0 +1,82 @@
+from typing import Tuple
+
+import numpy as np
+
+# Spread (in log closing rank) assumed when no cutoff has rows for two or more years
+DEFAULT_LOG_SPREAD = 0.1
+# Floor on the spread, so a perfectly stable history never yields certainty
+MIN_LOG_SPREAD = 0.02
+# Weight of the dataset-wide spread against a cutoff's own history, in years of data
+PRIOR_YEARS = 2.0
+# Each year back counts half as much as the one after it
+YEAR_DECAY = 0.5
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    """Complementary error function (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)"""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    tail = poly * np.exp(-z * z)
+    return np.where(x >= 0, tail, 2.0 - tail)
+
+
+def fit(group_ids: np.ndarray, years: np.ndarray, closing: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row (mu, sigma) of the next closing rank of each row's cutoff group, in log space.
+
+    A group is one (campus, branch, category, quota) cutoff across years. Its
+    next closing rank is modelled as log-normal: ``mu`` is the recency-weighted
+    mean of the group's log closing ranks, and ``sigma`` blends the group's own
+    year-to-year spread with the spread measured over every multi-year group of
+    the dataset, plus the uncertainty of ``mu`` itself. Rows without a closing
+    rank get NaN.
+    """
+    n = len(closing)
+    mu = np.full(n, np.nan)
+    sigma = np.full(n, np.nan)
+    ranked = closing > 0
+    if not ranked.any():
+        return mu, sigma
+
+    groups = group_ids[ranked]
+    log_closing = np.log(closing[ranked].astype(np.float64))
+    size = int(groups.max()) + 1
+    # Rows without a year count as the group's latest
+    year = years[ranked].astype(np.int64)
+    latest = np.zeros(size, dtype=np.int64)
+    np.maximum.at(latest, groups, year)
+    age = np.where(year > 0, latest[groups] - year, 0)
+    weight = YEAR_DECAY ** age
+
+    total = np.bincount(groups, weights=weight, minlength=size)
+    total_sq = np.bincount(groups, weights=weight * weight, minlength=size)
+    group_mu = np.bincount(groups, weights=weight * log_closing, minlength=size) / np.maximum(total, 1e-12)
+    residual = log_closing - group_mu[groups]
+    squares = np.bincount(groups, weights=weight * residual * residual, minlength=size)
+    # Effective number of observations behind each weighted mean, and the weight left
+    # for estimating the spread once the mean is fitted (reliability weights)
+    n_eff = total * total / np.maximum(total_sq, 1e-12)
+    dof = total - total_sq / np.maximum(total, 1e-12)
+
+    multi = n_eff > 1.0 + 1e-9
+    if multi.any():
+        # Unbiased within-group variance, pooled over every group with a history
+        pooled = float(np.sum(squares[multi]) / np.sum(dof[multi]))
+        prior_var = max(pooled, MIN_LOG_SPREAD ** 2)
+    else:
+        prior_var = DEFAULT_LOG_SPREAD ** 2
+    group_var = np.where(multi, squares / np.maximum(dof, 1e-12), 0.0)
+    history = np.where(multi, n_eff - 1.0, 0.0)
+    blended = (PRIOR_YEARS * prior_var + history * group_var) / (PRIOR_YEARS + history)
+    # The next year's spread plus the uncertainty of the weighted mean
+    predictive = np.sqrt(np.maximum(blended * (1.0 + 1.0 / np.maximum(n_eff, 1.0)), MIN_LOG_SPREAD ** 2))
+
+    mu[ranked] = group_mu[groups]
+    sigma[ranked] = predictive[groups]
+    return mu, sigma
+
+
+def probability(rank: float, mu: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+    """P(next closing rank >= rank) for each row; NaN where the row has no model"""
+    z = (np.log(max(float(rank), 1.0)) - mu) / (sigma * np.sqrt(2.0))
+    return 0.5 * _erfc(z)
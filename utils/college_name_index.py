@@ -0,0 +1,140 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Rows without a usable closing rank sort after every ranked row
+_NO_RANK_GAP = 10**9
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase with runs of whitespace collapsed to single spaces"""
+    try:
+        return " ".join(((name or "").strip().lower()).split())
+    except Exception:
+        return (name or "").lower()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _tokens(text: str) -> Set[str]:
+    return {t for t in text.split() if len(t) > 2}
+
+
+class CollegeNameIndex:
+    """Lookup of cutoff rows by (approximate) college name.
+
+    Holds every distinct normalized college name once, trigram postings to find
+    the names containing a query, token postings for the loose token-overlap
+    match, and each college's ranked rows sorted by closing rank so the row
+    nearest to a rank is found with a bisect.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]]):
+        self.records = records
+        self.names: List[str] = []
+        self.name_ids: Dict[str, int] = {}
+        ranked: List[List[Tuple[int, int]]] = []
+        self._first_unranked: List[Optional[int]] = []
+
+        for i, record in enumerate(records):
+            college = record.get("college") or ""
+            if not college:
+                continue
+            name = normalize_name(college)
+            nid = self.name_ids.get(name)
+            if nid is None:
+                nid = self.name_ids[name] = len(self.names)
+                self.names.append(name)
+                ranked.append([])
+                self._first_unranked.append(None)
+            closing = record.get("closing_rank") or 0
+            try:
+                closing = int(closing) if closing else None
+            except Exception:
+                closing = None
+            if closing is None:
+                if self._first_unranked[nid] is None:
+                    self._first_unranked[nid] = i
+            else:
+                ranked[nid].append((closing, i))
+
+        # (closing rank, row) pairs sorted, so equal ranks keep dataset order
+        self._closings: List[List[int]] = []
+        self._rows: List[List[int]] = []
+        for pairs in ranked:
+            pairs.sort()
+            self._closings.append([c for c, _ in pairs])
+            self._rows.append([i for _, i in pairs])
+
+        self._trigram_postings: Dict[str, List[int]] = {}
+        self._token_postings: Dict[str, List[int]] = {}
+        for nid, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                self._trigram_postings.setdefault(gram, []).append(nid)
+            for token in _tokens(name):
+                self._token_postings.setdefault(token, []).append(nid)
+
+    def matching_names(self, name: str) -> List[int]:
+        """Ids of the names containing, or contained in, ``name``; failing that,
+        of the names sharing at least two tokens (of 3+ characters) with it"""
+        target = normalize_name(name)
+        matches = self._names_containing(target)
+        # Names that are themselves a substring of the target (a blank name is in every one)
+        if "" in self.name_ids:
+            matches.add(self.name_ids[""])
+        for start in range(len(target)):
+            for end in range(start + 1, len(target) + 1):
+                nid = self.name_ids.get(target[start:end])
+                if nid is not None:
+                    matches.add(nid)
+        if matches:
+            return sorted(matches)
+
+        overlap: Dict[int, int] = {}
+        for token in _tokens(target):
+            for nid in self._token_postings.get(token, ()):
+                overlap[nid] = overlap.get(nid, 0) + 1
+        return sorted(nid for nid, shared in overlap.items() if shared >= 2)
+
+    def _names_containing(self, target: str) -> Set[int]:
+        grams = _trigrams(target)
+        if not grams:
+            return {nid for nid, name in enumerate(self.names) if target in name}
+        postings = sorted((self._trigram_postings.get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return {nid for nid in candidates if target in self.names[nid]}
+
+    def nearest_row(self, name_ids: List[int], rank: Any) -> Optional[Dict[str, Any]]:
+        """The row of the given colleges whose closing rank is nearest to ``rank``
+        (the earliest row in the dataset on ties), or None without candidates"""
+        try:
+            rank = int(rank)
+        except Exception:
+            rank = None
+        best: Optional[Tuple[int, int]] = None
+        for nid in name_ids:
+            closings, rows = self._closings[nid], self._rows[nid]
+            if closings and rank is not None:
+                at = bisect_left(closings, rank)
+                if at < len(closings):
+                    candidate = (closings[at] - rank, rows[at])
+                    best = candidate if best is None else min(best, candidate)
+                if at > 0:
+                    # First row of the run of the largest closing rank below `rank`
+                    below = bisect_left(closings, closings[at - 1])
+                    candidate = (rank - closings[below], rows[below])
+                    best = candidate if best is None else min(best, candidate)
+            else:
+                # Without a usable rank every row is equally far; keep the earliest
+                if rows:
+                    candidate = (_NO_RANK_GAP, min(rows))
+                    best = candidate if best is None else min(best, candidate)
+            if self._first_unranked[nid] is not None:
+                candidate = (_NO_RANK_GAP, self._first_unranked[nid])
+                best = candidate if best is None else min(best, candidate)
+        return self.records[best[1]] if best is not None else None
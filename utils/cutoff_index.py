@@ -0,0 +1,463 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Iterator, Sequence, Tuple
+
+import numpy as np
+
+from utils import admission_model
+
+# Category hierarchy: General is most competitive, ST is least competitive
+CATEGORY_HIERARCHY = {"General": 1, "EWS": 2, "OBC": 3, "SC": 4, "ST": 5}
+
+# Ownership classes derived from the free-text ownership fields
+OWN_UNKNOWN = 0
+OWN_GOVERNMENT = 1
+OWN_PRIVATE = 2
+OWN_OTHER = 3
+# Filter value for an unrecognized ownership request: keep any row that has ownership info
+OWN_KNOWN = -1
+
+OWNERSHIP_FIELDS = ("ownership", "ownership_type", "college_type", "type", "management", "institute_type")
+GOV_TOKENS = ("government", "govt", "public", "central", "state", "national")
+PRIVATE_TOKENS = ("private", "self", "deemed", "trust")
+
+
+def _as_rank(value: Any) -> int:
+    """Coerce a rank-like field to int, treating missing/invalid values as 0"""
+    try:
+        return int(value) if value else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def raw_ownership(record: Dict[str, Any]) -> Any:
+    """Return the first populated ownership-like field of a record"""
+    for field in OWNERSHIP_FIELDS:
+        value = record.get(field)
+        if value:
+            return value
+    return None
+
+
+def classify_ownership(raw: Any) -> int:
+    """Map a free-text ownership value onto one of the OWN_* classes"""
+    val = str(raw or "").strip().lower()
+    if not val:
+        return OWN_UNKNOWN
+    if any(t in val for t in GOV_TOKENS):
+        return OWN_GOVERNMENT
+    if any(t in val for t in PRIVATE_TOKENS):
+        return OWN_PRIVATE
+    return OWN_OTHER
+
+
+def normalize_ownership_filter(ownership: Optional[str]) -> Optional[int]:
+    """Translate a user ownership filter into an OWN_* class (None = no filtering)"""
+    own = (ownership or "").strip().lower()
+    if own in ("any", ""):
+        return None
+    if own.startswith("gov") or own == "public":
+        return OWN_GOVERNMENT
+    if own.startswith("priv"):
+        return OWN_PRIVATE
+    # Unrecognized ownership strings only skip rows without ownership info
+    return OWN_KNOWN
+
+
+def state_of(location: Any) -> str:
+    """Extract the state part of a "City, State" location string"""
+    loc = location or ""
+    return loc.split(",")[-1].strip() if "," in loc else loc
+
+
+class _Codes:
+    """Small string -> int interning table"""
+
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    @classmethod
+    def of(cls, values: List[Any]) -> "_Codes":
+        table = cls()
+        for value in values:
+            table.code(value)
+        return table
+
+    def code(self, value: Any) -> int:
+        c = self.codes.get(value)
+        if c is None:
+            c = len(self.values)
+            self.codes[value] = c
+            self.values.append(value)
+        return c
+
+
+class CutoffIndex:
+    """Struct-of-arrays view over one exam's cleaned cutoff records.
+
+    Built once per dataset load. Row ``i`` of every array describes
+    ``records[i]``, so request-time filtering runs as numpy masks and only the
+    rows that end up in a response are turned back into dicts.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]]):
+        n = len(records)
+
+        categories, quotas, states = _Codes(), _Codes(), _Codes()
+        pairs, colleges, sites = _Codes(), _Codes(), _Codes()
+
+        opening = np.zeros(n, dtype=np.int64)
+        closing = np.zeros(n, dtype=np.int64)
+        cutoff_rank = np.zeros(n, dtype=np.int64)
+        category_codes = np.zeros(n, dtype=np.int32)
+        quota_codes = np.zeros(n, dtype=np.int32)
+        state_codes = np.zeros(n, dtype=np.int32)
+        ownership_codes = np.zeros(n, dtype=np.int8)
+        pair_codes = np.zeros(n, dtype=np.int32)
+        college_codes = np.zeros(n, dtype=np.int32)
+        # (college, location, branch): one campus's course, unlike pair_codes which
+        # follow the per-name dedup of the result list
+        site_codes = np.zeros(n, dtype=np.int32)
+        years = np.zeros(n, dtype=np.int32)
+        # Rows whose raw opening/closing ranks (missing = 0) are plain ints, or both None;
+        # only for those do the integer columns reproduce the per-row confidence formula
+        exact_ranks = np.zeros(n, dtype=bool)
+
+        for i, r in enumerate(records):
+            o = _as_rank(r.get("opening_rank"))
+            c = _as_rank(r.get("closing_rank"))
+            opening[i] = o
+            closing[i] = c
+            # Eligibility prefers closing rank, then single "rank", then opening rank
+            single = _as_rank(r.get("rank"))
+            cutoff_rank[i] = c if c > 0 else (single if single > 0 else max(o, 0))
+            category_codes[i] = categories.code(r.get("category", "General"))
+            quota_codes[i] = quotas.code(r.get("quota", "All India"))
+            state_codes[i] = states.code(state_of(r.get("location")))
+            ownership_codes[i] = classify_ownership(raw_ownership(r))
+            college = r.get("college", "")
+            pair_codes[i] = pairs.code((college.lower(), r.get("branch", "").lower()))
+            college_key = college.strip().lower()
+            college_codes[i] = colleges.code(college_key) if college_key else -1
+            location = str(r.get("location") or "").strip().lower()
+            site_codes[i] = sites.code((college_key, location, r.get("branch", "").lower()))
+            years[i] = _as_rank(r.get("year"))
+            raw_opening, raw_closing = r.get("opening_rank", 0), r.get("closing_rank", 0)
+            exact_ranks[i] = (type(raw_opening) is int and type(raw_closing) is int) or (
+                raw_opening is None and raw_closing is None
+            )
+
+        # Closing-rank sorted order (stable, so equal ranks keep dataset order)
+        rank_order = np.argsort(closing, kind="stable")
+
+        # Buckets of rows sharing (category, quota, state, ownership). Rows are grouped
+        # by bucket and stay closing-rank sorted inside each bucket's segment.
+        keys = np.stack([category_codes, quota_codes, state_codes, ownership_codes.astype(np.int32)], axis=1)
+        bucket_keys, bucket_of_row = np.unique(keys.reshape(n, 4), axis=0, return_inverse=True)
+        bucket_of_row = bucket_of_row.reshape(-1).astype(np.int32)
+        bucket_sizes = np.bincount(bucket_of_row, minlength=len(bucket_keys))
+
+        # One admission model per (college campus, branch, category, quota) across years
+        group_keys = np.stack([site_codes, category_codes, quota_codes], axis=1)
+        _, group_ids = np.unique(group_keys.reshape(n, 3), axis=0, return_inverse=True)
+        admit_mu, admit_sigma = admission_model.fit(group_ids.reshape(-1), years, closing)
+
+        # Content checksum of the rank, dedup and filter columns; pagination cursors
+        # are only valid against an index with the same fingerprint
+        checksum = 0
+        for column in (closing, cutoff_rank, pair_codes, college_codes, keys):
+            checksum = zlib.crc32(np.ascontiguousarray(column).tobytes(), checksum)
+
+        columns = {
+            "opening": opening,
+            "closing": closing,
+            "cutoff_rank": cutoff_rank,
+            "category_codes": category_codes,
+            "quota_codes": quota_codes,
+            "state_codes": state_codes,
+            "ownership_codes": ownership_codes,
+            "pair_codes": pair_codes,
+            "college_codes": college_codes,
+            "exact_ranks": exact_ranks,
+            "admit_mu": admit_mu,
+            "admit_sigma": admit_sigma,
+            "rank_order": rank_order,
+            "sorted_closing": closing[rank_order],
+            "bucket_keys": bucket_keys,
+            "bucket_of_row": bucket_of_row,
+            "bucket_sizes": bucket_sizes,
+            "bucket_offsets": np.concatenate(([0], np.cumsum(bucket_sizes))),
+            "bucket_rows": rank_order[np.argsort(bucket_of_row[rank_order], kind="stable")],
+        }
+        tables = {"category": categories.values, "quota": quotas.values, "state": states.values}
+        self._setup(records, columns, tables, f"{n:x}-{checksum:08x}")
+
+    @classmethod
+    def from_columns(
+        cls,
+        records: Sequence[Dict[str, Any]],
+        columns: Dict[str, np.ndarray],
+        tables: Dict[str, List[Any]],
+        fingerprint: str,
+    ) -> "CutoffIndex":
+        """Rebuild an index from previously exported columns (e.g. memory-mapped files)"""
+        index = cls.__new__(cls)
+        index._setup(records, columns, tables, fingerprint)
+        return index
+
+    def _setup(
+        self,
+        records: Sequence[Dict[str, Any]],
+        columns: Dict[str, np.ndarray],
+        tables: Dict[str, List[Any]],
+        fingerprint: str,
+    ) -> None:
+        self.records = records
+        self.columns = columns
+        self.tables = tables
+        self.fingerprint = fingerprint
+
+        self.opening = columns["opening"]
+        self.closing = columns["closing"]
+        self.cutoff_rank = columns["cutoff_rank"]
+        self.category_codes = columns["category_codes"]
+        self.quota_codes = columns["quota_codes"]
+        self.state_codes = columns["state_codes"]
+        self.ownership_codes = columns["ownership_codes"]
+        self.pair_codes = columns["pair_codes"]
+        self.college_codes = columns["college_codes"]
+        self.exact_ranks = columns["exact_ranks"]
+        self.admit_mu = columns["admit_mu"]
+        self.admit_sigma = columns["admit_sigma"]
+
+        self.category_table = _Codes.of(tables["category"])
+        self.quota_table = _Codes.of(tables["quota"])
+        self.state_table = _Codes.of(tables["state"])
+        self.category_levels = np.array(
+            [CATEGORY_HIERARCHY.get(v, 1) for v in self.category_table.values], dtype=np.int8
+        )
+
+        self.rank_order = columns["rank_order"]
+        self.sorted_closing = columns["sorted_closing"]
+
+        bucket_keys = columns["bucket_keys"]
+        self.bucket_of_row = columns["bucket_of_row"]
+        self.bucket_category = bucket_keys[:, 0]
+        self.bucket_quota = bucket_keys[:, 1]
+        self.bucket_state = bucket_keys[:, 2]
+        self.bucket_ownership = bucket_keys[:, 3]
+        self.bucket_sizes = columns["bucket_sizes"]
+        self.bucket_offsets = columns["bucket_offsets"]
+        self.bucket_rows = columns["bucket_rows"]
+        # Recently merged narrow bucket selections, keyed by the selection mask
+        self._views: "OrderedDict[bytes, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._views_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _state_codes(self, states: List[str]) -> np.ndarray:
+        return np.array(
+            [self.state_table.codes[s] for s in states if s and s in self.state_table.codes], dtype=np.int32
+        )
+
+    def select_buckets(
+        self,
+        states: Optional[List[str]] = None,
+        ownership: Optional[int] = None,
+        category: Optional[str] = None,
+        quota: Optional[str] = None,
+    ) -> np.ndarray:
+        """Boolean mask over buckets matching the given filters (None = any)"""
+        selected = np.ones(len(self.bucket_sizes), dtype=bool)
+        if ownership == OWN_KNOWN:
+            selected &= self.bucket_ownership != OWN_UNKNOWN
+        elif ownership is not None:
+            selected &= self.bucket_ownership == ownership
+        if states:
+            selected &= np.isin(self.bucket_state, self._state_codes(states))
+        if category is not None:
+            # Users can apply to their own category or more competitive categories
+            user_level = CATEGORY_HIERARCHY.get(category, 1)
+            selected &= self.category_levels[self.bucket_category] <= user_level
+        if quota is not None and quota != "All India":
+            code = self.quota_table.codes.get(quota)
+            selected &= (self.bucket_quota == code) if code is not None else False
+        return selected
+
+    def count(self, states: Optional[List[str]], ownership: Optional[int]) -> int:
+        """Number of rows passing the state and ownership filters"""
+        return int(self.bucket_sizes[self.select_buckets(states, ownership)].sum())
+
+    def rank_ok_mask(self, rows: np.ndarray, rank: int, tolerance_percent: float = 0.0) -> np.ndarray:
+        """Rank part of CollegePredictorOptimized._is_rank_eligible for ``rows``"""
+        cutoff_rank = self.cutoff_rank[rows]
+        mask = cutoff_rank > 0
+        if tolerance_percent > 0:
+            cutoff_rank = (cutoff_rank * (1 + (tolerance_percent / 100))).astype(np.int64)
+        mask &= rank <= cutoff_rank
+        return mask
+
+    def confidence_scores(self, rows: np.ndarray, rank: int) -> np.ndarray:
+        """CollegePredictorOptimized._calculate_confidence for ``rows``; NaN where a row's
+        raw ranks are not plain ints and the per-row formula has to be used instead"""
+        opening = self.opening[rows]
+        closing = self.closing[rows]
+        span = closing - opening
+        with np.errstate(divide="ignore", invalid="ignore"):
+            position = np.clip((closing - rank) / span, 0.0, 1.0)
+        scores = np.where(span == 0, 1.0, np.where(span < 0, 0.5, position))
+        return np.where(self.exact_ranks[rows], scores, np.nan)
+
+    def admission_probability(self, rows: np.ndarray, rank: int) -> np.ndarray:
+        """Modelled chance that ``rank`` is within next year's closing rank; NaN without one"""
+        return admission_model.probability(rank, self.admit_mu[rows], self.admit_sigma[rows])
+
+    def view(self, buckets: np.ndarray) -> "RankView":
+        """Closing-rank ordered view over the rows of the selected buckets"""
+        if buckets.all():
+            return RankView(self.sorted_closing, self.rank_order)
+
+        if int(self.bucket_sizes[buckets].sum()) > len(self) // 8:
+            # Broad selections: walk the global order and skip rows outside the buckets
+            def in_buckets(rows: np.ndarray) -> np.ndarray:
+                return buckets[self.bucket_of_row[rows]]
+
+            return RankView(self.sorted_closing, self.rank_order, in_buckets)
+
+        sorted_closing, order = self._merged_view(buckets)
+        return RankView(sorted_closing, order)
+
+    def _merged_view(self, buckets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Merge the (already sorted) segments of narrow bucket selections into one view"""
+        key = np.packbits(buckets).tobytes()
+        with self._views_lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+
+        offsets = self.bucket_offsets
+        segments = [self.bucket_rows[offsets[b]:offsets[b + 1]] for b in np.flatnonzero(buckets)]
+        rows = np.concatenate(segments) if segments else np.zeros(0, dtype=self.rank_order.dtype)
+        closing = self.closing[rows]
+        order = np.lexsort((rows, closing))
+        view = (closing[order], rows[order])
+        # Views are shared by request threads; the cache itself is guarded
+        with self._views_lock:
+            self._views[key] = view
+            while len(self._views) > 64:
+                self._views.popitem(last=False)
+        return view
+
+
+class RankView:
+    """Rows ordered by closing rank, optionally restricted by a row filter"""
+
+    def __init__(
+        self,
+        sorted_closing: np.ndarray,
+        order: np.ndarray,
+        accept: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ):
+        self.sorted_closing = sorted_closing
+        self.order = order
+        self.accept = accept
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def walk(self, rank: int, accept: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> "ProximityWalk":
+        """Start an outward walk from ``rank``; ``accept`` further filters the visited rows"""
+        view_accept, extra_accept = self.accept, accept
+        if view_accept is not None and extra_accept is not None:
+            def accept(rows: np.ndarray) -> np.ndarray:
+                mask = view_accept(rows)
+                return mask & extra_accept(rows) if mask.any() else mask
+
+        return ProximityWalk(self.sorted_closing, self.order, rank, accept or view_accept)
+
+
+class ProximityWalk:
+    """Visit rows in order of |closing_rank - rank|, nearest first.
+
+    The walk starts at the bisect position of ``rank`` in the sorted closing
+    ranks and merges outwards, so the cost of a request depends on how many
+    rows are visited rather than on the dataset size. Ties are broken by row
+    id, which reproduces a stable sort of the rows by distance. Successive
+    calls to ``rows`` with growing windows continue where the previous call
+    stopped, since every closer row has already been offered to the caller.
+    """
+
+    def __init__(
+        self,
+        sorted_closing: np.ndarray,
+        order: np.ndarray,
+        rank: int,
+        accept: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ):
+        self.sorted_closing = sorted_closing
+        self.order = order
+        self.rank = rank
+        self.accept = accept
+        # Positions [left, right) of the sorted arrays have already been visited
+        self.left = self.right = int(np.searchsorted(sorted_closing, rank, side="left"))
+        self.block = 256
+        # (left, right, block) before the step that produced the latest batch;
+        # restoring it replays that batch, which is how a paged walk resumes
+        self.batch_start: Optional[Tuple[int, int, int]] = None
+
+    def restore(self, left: int, right: int, block: int) -> None:
+        """Reposition the walk at a step previously reported in ``batch_start``"""
+        if not (0 <= left <= right <= len(self.sorted_closing)) or block < 1:
+            raise ValueError("walk position out of range")
+        self.left, self.right, self.block = left, right, block
+
+    def rows(self, window: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Yield batches of unvisited, accepted row ids with distance < window (None = unbounded)"""
+        closing, n, rank = self.sorted_closing, len(self.sorted_closing), self.rank
+        limit = np.inf if window is None else window
+        while self.left > 0 or self.right < n:
+            start = (self.left, self.right, self.block)
+            # Nearest unvisited distance on each side; stop once outside the window
+            nearest = min(
+                rank - closing[self.left - 1] if self.left > 0 else np.inf,
+                closing[self.right] - rank if self.right < n else np.inf,
+            )
+            if nearest >= limit:
+                return
+
+            lo = max(0, self.left - self.block)
+            hi = min(n, self.right + self.block)
+            left_dist = rank - closing[lo:self.left][::-1]
+            right_dist = closing[self.right:hi] - rank
+            # Unfetched rows are at least as far as the last fetched row on their side
+            bound = min(
+                left_dist[-1] if lo > 0 else np.inf,
+                right_dist[-1] if hi < n else np.inf,
+                limit,
+            )
+            n_left = int(np.searchsorted(left_dist, bound, side="left"))
+            n_right = int(np.searchsorted(right_dist, bound, side="left"))
+            if n_left == 0 and n_right == 0:
+                # A run of equal ranks wider than the block; fetch more next time
+                self.block *= 2
+                continue
+
+            rows = np.concatenate((
+                self.order[self.left - n_left:self.left][::-1],
+                self.order[self.right:self.right + n_right],
+            ))
+            dist = np.concatenate((left_dist[:n_left], right_dist[:n_right]))
+            self.left -= n_left
+            self.right += n_right
+            self.block = min(self.block * 2, 65536)
+
+            rows = rows[np.lexsort((rows, dist))]
+            if self.accept is not None:
+                rows = rows[self.accept(rows)]
+            if len(rows):
+                self.batch_start = start
+                yield rows
@@ -0,0 +1,81 @@
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+# Marks a field the source row did not have, so keys() matches the original dict
+_MISSING = object()
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class CutoffRecord(Mapping):
+    """One cleaned cutoff row, read like the dict it was built from.
+
+    The fields every row has live in slots instead of a per-row dict, and
+    their string values are interned: names such as "Computer Science and
+    Engineering", "All India" or a city are stored once per process however
+    many rows repeat them. Any other fields of the source row are kept in
+    ``extra`` (None when there are none).
+    """
+
+    FIELDS = (
+        "college", "branch", "category", "quota", "location", "exam_type",
+        "opening_rank", "closing_rank", "year",
+    )
+    __slots__ = FIELDS + ("extra",)
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, row: Dict[str, Any]):
+        extra: Optional[Dict[str, Any]] = None
+        for key, value in row.items():
+            if key in self._FIELD_SET:
+                continue
+            if extra is None:
+                extra = {}
+            extra[_intern(key)] = _intern(value)
+        for field in self.FIELDS:
+            object.__setattr__(self, field, _intern(row.get(field, _MISSING)))
+        object.__setattr__(self, "extra", extra)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Rows are shared by every request reading a published dataset
+        raise AttributeError("cutoff records are read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Same as Mapping.get without the exception round trip; this is on the hot path
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING  # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self.FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CutoffRecord({dict(self)!r})"
+
+    def __reduce__(self):
+        return CutoffRecord, (dict(self),)
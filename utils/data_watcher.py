@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.shared_dataset import file_digest, stat_signature
+
+
+class DataFileWatcher:
+    """Polls the data files behind each loaded exam and hot-reloads changed exams.
+
+    Every published dataset records the size and mtime of the files it was
+    read from. A change is acted on once the files have been stable for one
+    full interval, so a scraper still writing a file is not read half way,
+    and files rewritten with identical content do not trigger a reload. Only
+    the changed exam is rebuilt; its old dataset keeps serving requests until
+    the predictor publishes the new one.
+    """
+
+    def __init__(self, predictor, interval: float = 30.0):
+        self.predictor = predictor
+        self.interval = interval
+        # exam -> signature seen changed on the previous poll, waiting to settle
+        self._pending: Dict[str, Tuple] = {}
+        # path -> (stat entry, sha256) of the last content hashed for that file
+        self._digests: Dict[Path, Tuple[Tuple, str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.polls = 0
+        self.reloads: Dict[str, int] = {}
+        self.unchanged_rewrites = 0
+        self.errors: Dict[str, str] = {}
+        self.last_reload: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls, predictor) -> "DataFileWatcher":
+        """Watcher polling every DATA_RELOAD_INTERVAL seconds (0 disables it)"""
+        return cls(predictor, interval=float(os.getenv("DATA_RELOAD_INTERVAL", "30")))
+
+    def start(self) -> Optional[threading.Thread]:
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception as e:  # keep watching; the error shows up in stats()
+                self.errors["watcher"] = str(e)
+
+    def poll_once(self) -> List[str]:
+        """Check every loaded exam once; returns the exams that were reloaded"""
+        self.polls += 1
+        reloaded = []
+        for exam, dataset in list(self.predictor.datasets.items()):
+            paths = self.predictor.source_files(exam, dataset.status)
+            signature = stat_signature(paths)
+            if signature == dataset.sources:
+                self._pending.pop(exam, None)
+                self._remember_digests(paths, signature)
+                continue
+            if self._pending.get(exam) != signature:
+                # Changed since the last poll; wait until the writer is done
+                self._pending[exam] = signature
+                continue
+            self._pending.pop(exam, None)
+            if self._same_content(paths, dataset.sources, signature):
+                self.unchanged_rewrites += 1
+                self.predictor.mark_sources_current(exam, dataset.version, signature)
+                continue
+            try:
+                if not self.predictor.reload_exam(exam):
+                    continue
+            except Exception as e:
+                # Keep serving the old data; try again once the files change again
+                self.errors[exam] = str(e)
+                self.predictor.mark_sources_current(exam, dataset.version, signature)
+                continue
+            self.errors.pop(exam, None)
+            self.reloads[exam] = self.reloads.get(exam, 0) + 1
+            self.last_reload[exam] = time.time()
+            reloaded.append(exam)
+        return reloaded
+
+    def _remember_digests(self, paths: List[Path], signature: Tuple) -> None:
+        """Hash the files a dataset was loaded from, once per version of each file"""
+        for path, entry in zip(paths, signature):
+            cached = self._digests.get(path)
+            if entry[1] is not None and (cached is None or cached[0] != entry):
+                self._digests[path] = (entry, file_digest(path))
+
+    def _same_content(self, paths: List[Path], old: Tuple, new: Tuple) -> bool:
+        """Whether every changed file still has the content it was loaded with"""
+        if len(old) != len(new):
+            return False
+        for path, before, after in zip(paths, old, new):
+            if before == after:
+                continue
+            cached = self._digests.get(path)
+            if cached is None or cached[0] != before or after[1] is None:
+                return False
+            digest = file_digest(path)
+            if digest != cached[1]:
+                return False
+            self._digests[path] = (after, digest)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.interval > 0,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval,
+            "polls": self.polls,
+            "reloads": dict(self.reloads),
+            "last_reload": dict(self.last_reload),
+            "unchanged_rewrites": self.unchanged_rewrites,
+            "pending": sorted(self._pending),
+            "errors": dict(self.errors),
+        }
@@ -0,0 +1,301 @@
+import asyncio
+import os
+import time
+import weakref
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from utils.prediction_cache import PredictionCache
+
+Message = Dict[str, str]  # {"role": ..., "content": ...}
+
+
+class LLMProvider(ABC):
+    """One chat-completion backend. ``complete`` returns the reply text."""
+
+    name = "provider"
+    default_model = ""
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def complete(
+        self, http: httpx.AsyncClient, messages: Sequence[Message], model: Optional[str], temperature: float
+    ) -> str:
+        ...
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    default_model = "gpt-4o-mini"
+
+    def available(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+    async def complete(self, http, messages, model, temperature):
+        r = await http.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
+                "Content-Type": "application/json",
+            },
+            json={"model": model or self.default_model, "messages": list(messages), "temperature": temperature},
+        )
+        r.raise_for_status()
+        return r.json()["choices"][0]["message"]["content"]
+
+
+class GeminiProvider(LLMProvider):
+    name = "google"
+    default_model = "gemini-1.5-flash-latest"
+    # Gemini only knows "user" and "model" turns
+    ROLES = {"assistant": "model", "system": "user"}
+
+    def available(self) -> bool:
+        return bool(os.getenv("GOOGLE_API_KEY"))
+
+    async def complete(self, http, messages, model, temperature):
+        url = (
+            "https://generativelanguage.googleapis.com/v1beta/models/"
+            f"{model or self.default_model}:generateContent?key={os.getenv('GOOGLE_API_KEY')}"
+        )
+        contents = [
+            {"role": self.ROLES.get(m["role"], m["role"]), "parts": [{"text": m["content"]}]} for m in messages
+        ]
+        r = await http.post(url, json={"contents": contents})
+        r.raise_for_status()
+        candidates = r.json().get("candidates", [])
+        return candidates[0]["content"]["parts"][0]["text"] if candidates else ""
+
+
+class StubProvider(LLMProvider):
+    """Local provider with a canned reply, for tests and offline development (LLM_PROVIDERS=stub)"""
+
+    name = "stub"
+    default_model = "stub"
+
+    def __init__(self, reply: str = "1. Stub College", delay: float = 0.0, fail: bool = False):
+        self.reply = reply
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def complete(self, http, messages, model, temperature):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("stub provider failure")
+        return self.reply
+
+
+PROVIDERS = {"openai": OpenAIProvider, "google": GeminiProvider, "stub": StubProvider}
+
+
+def normalize_prompt(messages: Sequence[Message]) -> Tuple[Tuple[str, str], ...]:
+    """Cache key form of a conversation: roles and whitespace-collapsed, lowercased text"""
+    return tuple((m["role"], " ".join(m["content"].lower().split())) for m in messages)
+
+
+class _LoopState:
+    """Connection pool, concurrency caps and in-flight calls of one event loop"""
+
+    def __init__(self, client: "LLMClient"):
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(client.timeout, connect=client.connect_timeout),
+            limits=httpx.Limits(max_connections=client.max_concurrency * len(client.providers) or 1),
+        )
+        # Calls in progress per provider; only touched from this loop's thread
+        self.active: Dict[str, int] = {}
+        self.inflight: Dict[Any, "asyncio.Future[Optional[Tuple[str, str]]]"] = {}
+
+
+class LLMClient:
+    """Async chat-completion client shared by every request.
+
+    - One pooled HTTP client per event loop, so calls reuse connections.
+    - At most ``max_concurrency`` calls per provider. A provider that is
+      already at its cap is skipped rather than queued.
+    - Replies are cached by provider list, model and normalised prompt.
+      Identical prompts that arrive while a call is in flight wait for that
+      call instead of making their own (or take it over if the request that
+      started it is cancelled).
+    - Each provider call has a deadline of ``timeout`` seconds. If the first
+      provider has not answered after ``hedge_after`` seconds, the next
+      available one is started too, and the first good reply wins.
+
+    ``complete`` returns (provider name, reply text), or None when no
+    provider could answer, so callers can fall back to local data.
+    """
+
+    def __init__(
+        self,
+        providers: Optional[List[LLMProvider]] = None,
+        max_concurrency: int = 4,
+        timeout: float = 8.0,
+        connect_timeout: float = 2.0,
+        hedge_after: float = 1.5,
+        cache_size: int = 256,
+        cache_ttl: float = 3600.0,
+    ):
+        self.providers = providers if providers is not None else [OpenAIProvider(), GeminiProvider()]
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.hedge_after = hedge_after
+        self.cache = PredictionCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self.calls: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {}
+        self.hedges = 0
+        self.shared = 0
+        self.total_latency = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        """Client configured by LLM_PROVIDERS (default "openai,google"), LLM_MAX_CONCURRENCY,
+        LLM_TIMEOUT, LLM_HEDGE_AFTER, LLM_CACHE_SIZE and LLM_CACHE_TTL"""
+        names = [n.strip() for n in os.getenv("LLM_PROVIDERS", "openai,google").split(",") if n.strip()]
+        return cls(
+            providers=[PROVIDERS[n]() for n in names if n in PROVIDERS],
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "8")),
+            hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "1.5")),
+            cache_size=int(os.getenv("LLM_CACHE_SIZE", "256")),
+            cache_ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+        )
+
+    def available(self, only: Optional[Sequence[str]] = None) -> List[LLMProvider]:
+        return [p for p in self.providers if p.available() and (only is None or p.name in only)]
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(self)
+        return state
+
+    async def complete(
+        self,
+        messages: Sequence[Message],
+        providers: Optional[Sequence[str]] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+    ) -> Optional[Tuple[str, str]]:
+        """Reply from the first of ``providers`` (default: all, in order) that answers"""
+        candidates = self.available(providers)
+        if not candidates:
+            return None
+        key = (tuple(p.name for p in candidates), model, temperature, normalize_prompt(messages))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[0]["provider"], cached[0]["content"]
+
+        state = self._state()
+        pending = state.inflight.get(key)
+        while pending is not None:
+            self.shared += 1
+            # asyncio.wait neither cancels the shared call when this caller is
+            # cancelled nor raises the owner's cancellation in this caller
+            await asyncio.wait({pending})
+            if not pending.cancelled():
+                return pending.result()
+            # The request that owned the call was cancelled: make (or join) a new one
+            pending = state.inflight.get(key)
+        future = asyncio.get_running_loop().create_future()
+        state.inflight[key] = future
+        try:
+            result = await self._hedged(state, candidates, messages, model, temperature)
+            if result is not None:
+                self.cache.put(key, [{"provider": result[0], "content": result[1]}])
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            state.inflight.pop(key, None)
+
+    async def _hedged(self, state, candidates, messages, model, temperature) -> Optional[Tuple[str, str]]:
+        """Start the first provider; start the next one whenever the running ones are slow or fail"""
+        queue = list(candidates)
+        running: Dict["asyncio.Task", str] = {}
+        try:
+            while queue or running:
+                if queue and (not running or len(running) < 2):
+                    provider = queue.pop(0)
+                    if not self._try_acquire(state, provider):
+                        continue
+                    if running:
+                        self.hedges += 1  # started alongside a slow call
+                    task = asyncio.ensure_future(self._call(state, provider, messages, model, temperature))
+                    # Released when the task ends, even if it is cancelled before it starts
+                    task.add_done_callback(lambda _, name=provider.name: self._release(state, name))
+                    running[task] = provider.name
+                wait = self.hedge_after if queue else None
+                done, _ = await asyncio.wait(running, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    # A call cancelled from outside (e.g. loop shutdown) counts as no answer
+                    content = None if task.cancelled() else task.result()
+                    if content:
+                        return name, content
+            return None
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _try_acquire(self, state: _LoopState, provider: LLMProvider) -> bool:
+        """Take a call slot, or count the provider as shed if all are busy"""
+        if state.active.get(provider.name, 0) >= self.max_concurrency:
+            self.shed[provider.name] = self.shed.get(provider.name, 0) + 1
+            return False
+        state.active[provider.name] = state.active.get(provider.name, 0) + 1
+        return True
+
+    @staticmethod
+    def _release(state: _LoopState, name: str) -> None:
+        state.active[name] -= 1
+
+    async def _call(self, state, provider, messages, model, temperature) -> Optional[str]:
+        started = time.perf_counter()
+        self.calls[provider.name] = self.calls.get(provider.name, 0) + 1
+        try:
+            return await asyncio.wait_for(
+                provider.complete(state.http, messages, model, temperature), timeout=self.timeout
+            )
+        except Exception:
+            self.failures[provider.name] = self.failures.get(provider.name, 0) + 1
+            return None
+        finally:
+            self.total_latency += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        calls = sum(self.calls.values())
+        return {
+            "providers": {p.name: p.available() for p in self.providers},
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "hedge_after_seconds": self.hedge_after,
+            "calls": dict(self.calls),
+            "failures": dict(self.failures),
+            "shed": dict(self.shed),
+            "hedges": self.hedges,
+            "shared_inflight": self.shared,
+            "avg_latency_ms": round(self.total_latency / calls * 1000, 1) if calls else 0.0,
+            "cache": self.cache.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the running event loop"""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.http.aclose()
@@ -1,10 +1,22 @@
 import json
 import os
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterator, Mapping, Sequence, Tuple, NamedTuple
 from datetime import datetime
 import time
 
+import numpy as np
+
+from utils.cutoff_index import CATEGORY_HIERARCHY, CutoffIndex, RankView, normalize_ownership_filter
+from utils.prediction_cache import PredictionCache
+from utils.college_name_index import CollegeNameIndex
+from utils.cutoff_record import CutoffRecord
+from utils.rank_sweep import RankSweep
+from utils import stage_timer
+from utils.shared_dataset import SharedDatasetStore, stat_signature
+from utils.prediction_cursor import CursorError, StaleCursorError, WalkPosition, decode_cursor, encode_cursor, query_key
+
 # Safe print for consoles that don't support unicode emojis (e.g., Windows cp1252)
 def safe_print(message: str) -> None:
     try:
@@ -17,110 +29,365 @@ def safe_print(message: str) -> None:
             fallback = ''.join(ch for ch in str(message) if ord(ch) < 128)
             print(fallback)
 
+class _QueryViews(NamedTuple):
+    """Rank views walked by the prediction phases for one filter set"""
+    strict: RankView
+    state: RankView
+    no_state: RankView
+    has_states: bool
+
+class _ExamDataset(NamedTuple):
+    """One exam's published data. Replaced as a whole, so a reader that took it
+    never sees records, index and version from different loads."""
+    records: Sequence[Dict[str, Any]]
+    index: CutoffIndex
+    status: str
+    # Bumped whenever an exam's dataset is replaced; part of every cache key
+    version: int
+    # (name, size, mtime) of the data files it was read from, taken before reading
+    sources: Tuple[Tuple[str, Optional[int], Optional[int]], ...] = ()
+    # When it was published; reported as last_updated by rows without their own
+    last_updated: str = ""
+
 class CollegePredictorOptimized:
-    def __init__(self, load_essential_only=True):
+    # Files read at startup for fast coverage of every exam
+    ESSENTIAL_DATA_FILES = {
+        "jee": ["jee_massive_cutoffs.json", "jee_comprehensive_cutoffs.json", "jee_10000_cutoffs.json"],
+        "neet": ["neet_massive_cutoffs.json", "neet_comprehensive_cutoffs.json", "neet_10000_cutoffs.json"], 
+        "ielts": ["ielts_massive_cutoffs.json", "ielts_10000_cutoffs.json"],
+        "cat": ["cat_mba_colleges_from_pdf.json"]
+    }
+    # Additional files merged in by load_full_data; exams not listed have no full dataset
+    FULL_DATA_FILES = {
+        "jee": [
+            "jee_10000_cutoffs.json",
+            "jee_massive_cutoffs.json",
+            "jee_main_10000_cutoffs.json",
+            "jee_main_massive_cutoffs.json",
+            "jee_cutoffs_extended.json",
+            "jee_cutoffs_extended_v2.json",
+            "diverse_colleges_jee.json",
+            "gujarat_colleges_jee.json",
+            "uttar_pradesh_colleges_jee.json"
+        ],
+        "neet": [
+            "neet_10000_cutoffs.json",
+            "neet_massive_cutoffs.json",
+            "neet_cutoffs.json",
+            "neet_cutoffs_extended.json"
+        ],
+        "ielts": [
+            "ielts_10000_cutoffs.json",
+            "ielts_massive_cutoffs.json",
+            "ielts_cutoffs.json"
+        ]
+    }
+
+    # Stage names of the proximity phases of _iter_with_views, in order
+    PHASE_NAMES = ("strict", "near", "far", "no_state_near", "no_state_far", "very_far")
+
+    # Fields identifying one cutoff row across data files; location tells campuses apart
+    RECORD_KEY_FIELDS = ("college", "branch", "category", "quota", "year", "exam_type", "location")
+
+    def __init__(self, load_essential_only=True, load_on_init=True, shared_dir: Optional[str] = None):
         # Get the directory of the current script
         script_dir = Path(__file__).parent.parent
         self.data_path = script_dir / "data"
-        self.cutoff_data = {}
-        self.data_loaded = {}
+        # With a shared directory, compiled datasets are built once and memory-mapped
+        # by every worker process instead of being parsed into each one. Without one,
+        # snapshots from the build step (data/snapshots) are used while they match the JSON.
+        shared_dir = shared_dir or os.getenv("CUTOFF_SHARED_DIR")
+        snapshot_dir = Path(os.getenv("CUTOFF_SNAPSHOT_DIR") or self.data_path / "snapshots")
+        if shared_dir:
+            self.shared_store = SharedDatasetStore(Path(shared_dir))
+        elif snapshot_dir.is_dir():
+            self.shared_store = SharedDatasetStore(snapshot_dir, writable=False)
+        else:
+            self.shared_store = None
+        self.datasets: Dict[str, _ExamDataset] = {}
+        # One loader per exam at a time; concurrent callers wait for it instead of re-parsing
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._load_locks_guard = threading.Lock()
+        self._publish_lock = threading.Lock()
+        # exam -> (dataset version, name index); built on first use for each version
+        self._name_indexes: Dict[str, Tuple[int, CollegeNameIndex]] = {}
+        self._name_index_lock = threading.Lock()
+        self.prediction_cache = PredictionCache(
+            max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "2048")),
+            ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "300")),
+        )
         self.load_essential_only = load_essential_only
-        self.load_essential_data()
+        # exam -> data file -> {"records", "duplicates"} from the last time it was parsed
+        # here, or {"missing": True} for a listed file that does not exist
+        self.ingest_report: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # exam -> level -> seconds taken by its last load (reading, cleaning and indexing)
+        self.load_seconds: Dict[str, Dict[str, float]] = {}
+        self.warmup: Dict[str, Any] = {"state": "not_started", "errors": {}}
+        # With load_on_init=False, data is loaded by the caller (e.g. at app startup)
+        # or lazily per exam by the first request that needs it
+        if load_on_init:
+            self.load_essential_data()
+
+    # Read-only per-exam views of the published datasets
+    @property
+    def cutoff_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {exam: ds.records for exam, ds in self.datasets.items()}
+
+    @property
+    def cutoff_index(self) -> Dict[str, CutoffIndex]:
+        return {exam: ds.index for exam, ds in self.datasets.items()}
+
+    @property
+    def data_loaded(self) -> Dict[str, str]:
+        return {exam: ds.status for exam, ds in self.datasets.items()}
+
+    @property
+    def data_version(self) -> Dict[str, int]:
+        return {exam: ds.version for exam, ds in self.datasets.items()}
+
+    def college_name_index(self, exam: str) -> Optional[CollegeNameIndex]:
+        """Name lookup over an exam's current records, built once per dataset version"""
+        dataset = self.datasets.get(exam)
+        if dataset is None:
+            return None
+        with self._name_index_lock:
+            cached = self._name_indexes.get(exam)
+            if cached is None or cached[0] != dataset.version:
+                cached = self._name_indexes[exam] = (dataset.version, CollegeNameIndex(dataset.records))
+        return cached[1]
+
+    def _load_lock(self, exam: str) -> threading.Lock:
+        with self._load_locks_guard:
+            return self._load_locks.setdefault(exam, threading.Lock())
     
-    def load_essential_data(self):
-        """Load only essential data for fast startup"""
+    def load_essential_data(self, exams: Optional[List[str]] = None):
+        """Load only essential data for fast startup.
+        Exams that already have data (essential or full) are left as they are.
+        """
         safe_print("Loading essential college data for fast startup...")
         start_time = time.time()
         
         # Load massive datasets for comprehensive coverage
-        essential_files = {
-            "jee": ["jee_massive_cutoffs.json", "jee_comprehensive_cutoffs.json", "jee_10000_cutoffs.json"],
-            "neet": ["neet_massive_cutoffs.json", "neet_comprehensive_cutoffs.json", "neet_10000_cutoffs.json"], 
-            "ielts": ["ielts_massive_cutoffs.json", "ielts_10000_cutoffs.json"],
-            "cat": ["cat_mba_colleges_from_pdf.json"]
-        }
-        
-        for exam, filenames in essential_files.items():
-            all_data = []
-            
-            for filename in filenames:
-                file_path = self.data_path / filename
-                if file_path.exists():
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            raw_data = json.load(f)
-                            all_data.extend(raw_data)
-                            safe_print(f"Loaded {len(raw_data)} records from {filename}")
-                    except Exception as e:
-                        safe_print(f"Error loading {filename}: {e}")
-                else:
-                    safe_print(f"Data file not found: {filename}")
-            
-            # Clean and store the essential data
-            self.cutoff_data[exam] = self._clean_cutoff_data(all_data, exam)
-            self.data_loaded[exam] = "essential"
-            safe_print(f"Total valid records for {exam}: {len(self.cutoff_data[exam])}")
+        for exam, filenames in self.ESSENTIAL_DATA_FILES.items():
+            if exams is not None and exam not in exams:
+                continue
+            with self._load_lock(exam):
+                if exam not in self.datasets:
+                    self._load_essential_exam_locked(exam, filenames)
         
         load_time = time.time() - start_time
         safe_print(f"Essential data loaded in {load_time:.2f} seconds")
+
+    def _load_essential_exam_locked(self, exam: str, filenames: List[str]):
+        self._store_compiled(exam, "essential", filenames, lambda: self._read_essential_files(exam, filenames))
+        safe_print(f"Total valid records for {exam}: {len(self.datasets[exam].records)}")
+
+    def _read_essential_files(self, exam: str, filenames: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+        sources = [(filename, self._read_data_file(filename, strict)) for filename in filenames]
+        
+        # Clean the essential data
+        self.ingest_report[exam] = {}
+        return self._clean_sources(exam, [], sources)
+
+    def _read_data_file(self, filename: str, strict: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Raw records of one data file, or None if it does not exist. Unreadable files
+        are skipped too, unless strict, so that a reload never publishes a half-written file."""
+        file_path = self.data_path / filename
+        if not file_path.exists():
+            safe_print(f"Data file not found: {filename}")
+            return None
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                raw_data = json.load(f)
+        except Exception as e:
+            if strict:
+                raise
+            safe_print(f"Error loading {filename}: {e}")
+            return []
+        safe_print(f"Loaded {len(raw_data)} records from {filename}")
+        return raw_data
     
     def load_full_data(self, exam: str):
-        """Lazy load full data for a specific exam when needed"""
-        if self.data_loaded.get(exam) == "full":
+        """Lazy load full data for a specific exam when needed.
+        Single-flight: concurrent callers wait for one load and then share its result.
+        """
+        if self._status(exam) == "full":
             return  # Already loaded
-        
+
+        with self._load_lock(exam):
+            if self._status(exam) == "full":
+                return  # Loaded by another caller while we waited
+            self._load_full_data_locked(exam)
+
+    def _status(self, exam: str) -> Optional[str]:
+        dataset = self.datasets.get(exam)
+        return dataset.status if dataset else None
+
+    def _load_full_data_locked(self, exam: str):
         safe_print(f"Loading full data for {exam.upper()}...")
         start_time = time.time()
         
+        # Full data builds on the essential records, even if no request loaded them yet
+        if exam not in self.datasets and exam in self.ESSENTIAL_DATA_FILES:
+            self._load_essential_exam_locked(exam, self.ESSENTIAL_DATA_FILES[exam])
+
         # Load additional data files
-        additional_files = {
-            "jee": [
-                "jee_10000_cutoffs.json",
-                "jee_massive_cutoffs.json",
-                "jee_main_10000_cutoffs.json",
-                "jee_main_massive_cutoffs.json",
-                "jee_cutoffs_extended.json",
-                "jee_cutoffs_extended_v2.json",
-                "diverse_colleges_jee.json",
-                "gujarat_colleges_jee.json",
-                "uttar_pradesh_colleges_jee.json"
-            ],
-            "neet": [
-                "neet_10000_cutoffs.json",
-                "neet_massive_cutoffs.json",
-                "neet_cutoffs.json",
-                "neet_cutoffs_extended.json"
-            ],
-            "ielts": [
-                "ielts_10000_cutoffs.json",
-                "ielts_massive_cutoffs.json",
-                "ielts_cutoffs.json"
-            ]
-        }
-        
-        if exam in additional_files:
-            all_data = list(self.cutoff_data.get(exam, []))  # Start with existing data
-            
-            for filename in additional_files[exam]:
-                file_path = self.data_path / filename
-                if file_path.exists():
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            raw_data = json.load(f)
-                            all_data.extend(raw_data)
-                            safe_print(f"Loaded {len(raw_data)} additional records from {filename}")
-                    except Exception as e:
-                        safe_print(f"Error loading {filename}: {e}")
-            
-            # Clean and store the combined data
-            self.cutoff_data[exam] = self._clean_cutoff_data(all_data, exam)
-            self.data_loaded[exam] = "full"
+        if exam in self.FULL_DATA_FILES:
+            # The full dataset is the essential records plus the additional files
+            sources = self.ESSENTIAL_DATA_FILES.get(exam, []) + self.FULL_DATA_FILES[exam]
+            self._store_compiled(exam, "full", sources, lambda: self._read_full_files(exam))
             
             load_time = time.time() - start_time
             safe_print(f"Full data loaded for {exam} in {load_time:.2f} seconds")
-            safe_print(f"Total records for {exam}: {len(self.cutoff_data[exam])}")
+            safe_print(f"Total records for {exam}: {len(self.datasets[exam].records)}")
     
-    def _clean_cutoff_data(self, raw_data: List[Dict[str, Any]], exam: str) -> List[Dict[str, Any]]:
+    def _read_full_files(
+        self, exam: str, base: Optional[Sequence[Dict[str, Any]]] = None, strict: bool = False
+    ) -> List[Dict[str, Any]]:
+        if base is None:
+            current = self.datasets.get(exam)
+            base = current.records if current else []
+        # The base already holds the (cleaned) essential files; only read the others
+        essential = set(self.ESSENTIAL_DATA_FILES.get(exam, []))
+        sources = [
+            (filename, self._read_data_file(filename, strict))
+            for filename in self.FULL_DATA_FILES[exam]
+            if filename not in essential
+        ]
+        
+        # Clean the additional data and merge it into the existing records
+        return self._clean_sources(exam, base, sources)
+
+    def _clean_sources(
+        self,
+        exam: str,
+        base: Sequence[Dict[str, Any]],
+        sources: List[Tuple[str, Optional[List[Dict[str, Any]]]]],
+    ) -> List[Dict[str, Any]]:
+        """Clean each file's records and append those not already present.
+
+        Rows are keyed on their content (RECORD_KEY_FIELDS); the first file
+        to provide a row wins. Per-file record and duplicate counts are kept
+        in ingest_report for get_data_status; files that do not exist (None)
+        are reported as missing.
+        """
+        cleaned_data = list(base)
+        seen = {self._record_key(record) for record in cleaned_data}
+        report = self.ingest_report.setdefault(exam, {})
+        for filename, raw_data in sources:
+            if raw_data is None:
+                report[filename] = {"missing": True}
+                continue
+            cleaned = self._clean_cutoff_data(raw_data, exam)
+            duplicates = 0
+            for record in cleaned:
+                key = self._record_key(record)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                cleaned_data.append(record)
+            report[filename] = {"records": len(cleaned), "duplicates": duplicates}
+            if duplicates:
+                safe_print(f"Skipped {duplicates} duplicate records from {filename}")
+        return cleaned_data
+
+    @classmethod
+    def _record_key(cls, record: Dict[str, Any]) -> Tuple:
+        key = tuple(record.get(field) for field in cls.RECORD_KEY_FIELDS)
+        try:
+            hash(key)
+        except TypeError:  # e.g. a list where a string is expected
+            key = tuple(json.dumps(value, sort_keys=True, default=str) for value in key)
+        return key
+
+    def source_files(self, exam: str, status: Optional[str] = None) -> List[Path]:
+        """Data files behind an exam's dataset at ``status`` (its current one by default)"""
+        status = status or self._status(exam)
+        filenames = list(self.ESSENTIAL_DATA_FILES.get(exam, []))
+        if status == "full":
+            filenames += self.FULL_DATA_FILES.get(exam, [])
+        return [self.data_path / filename for filename in dict.fromkeys(filenames)]
+
+    def reload_exam(self, exam: str) -> bool:
+        """Rebuild a loaded exam from its data files and swap it in atomically.
+
+        The exam keeps its level (essential or full) and requests keep being
+        served from the old dataset until the new one is published with a new
+        version. A file that cannot be parsed aborts the reload and leaves the
+        old dataset in place. Returns False if the exam was never loaded.
+        """
+        with self._load_lock(exam):
+            status = self._status(exam)
+            if status is None:
+                return False
+            start_time = time.time()
+            sources = stat_signature(self.source_files(exam, status))
+            essential = self.ESSENTIAL_DATA_FILES.get(exam, [])
+            records, index = self._compile(
+                exam, "essential", essential, lambda: self._read_essential_files(exam, essential, strict=True)
+            )
+            if status == "full" and exam in self.FULL_DATA_FILES:
+                base = records
+                records, index = self._compile(
+                    exam, "full", essential + self.FULL_DATA_FILES[exam],
+                    lambda: self._read_full_files(exam, base, strict=True),
+                )
+            self._store_exam_data(exam, records, status, index, sources)
+            self.load_seconds.setdefault(exam, {})[status] = time.time() - start_time
+        safe_print(f"Reloaded {status} data for {exam} in {time.time() - start_time:.2f} seconds")
+        return True
+
+    def mark_sources_current(self, exam: str, version: int, sources: Tuple) -> None:
+        """Record that rewritten data files hold the same content the dataset was built from"""
+        with self._publish_lock:
+            current = self.datasets.get(exam)
+            if current is not None and current.version == version:
+                self.datasets[exam] = current._replace(sources=sources)
+
+    def _store_compiled(self, exam: str, status: str, filenames: List[str], read: Callable[[], List[Dict[str, Any]]]):
+        """Publish an exam's dataset, through the shared store when one is configured"""
+        start_time = time.perf_counter()
+        sources = stat_signature(self.source_files(exam, status))
+        records, index = self._compile(exam, status, filenames, read)
+        self._store_exam_data(exam, records, status, index, sources)
+        self.load_seconds.setdefault(exam, {})[status] = time.perf_counter() - start_time
+
+    def _compile(
+        self, exam: str, status: str, filenames: List[str], read: Callable[[], List[Dict[str, Any]]]
+    ) -> Tuple[Sequence[Dict[str, Any]], Optional[CutoffIndex]]:
+        """Records for a dataset, plus its index when the shared store has one"""
+        if self.shared_store is None:
+            return read(), None
+        compiled = self.shared_store.load_or_build(
+            f"{exam}-{status}", [self.data_path / f for f in filenames], read
+        )
+        if compiled is None:
+            # No snapshot for the current JSON files; parse them as usual
+            return read(), None
+        return compiled
+
+    def _store_exam_data(
+        self,
+        exam: str,
+        records: Sequence[Dict[str, Any]],
+        status: str,
+        index: Optional[CutoffIndex] = None,
+        sources: Tuple = (),
+    ):
+        """Store cleaned records together with the columnar index used for predictions"""
+        if index is None:
+            index = CutoffIndex(records)
+        with self._publish_lock:
+            current = self.datasets.get(exam)
+            version = (current.version if current else 0) + 1
+            # A single assignment publishes the new dataset atomically
+            self.datasets[exam] = _ExamDataset(
+                records, index, status, version, sources, datetime.now().isoformat()
+            )
+        self.prediction_cache.invalidate(exam)
+
+    def _clean_cutoff_data(self, raw_data: List[Dict[str, Any]], exam: str) -> List[CutoffRecord]:
         """Clean and validate cutoff data with optimized processing"""
         cleaned_data = []
         
@@ -192,11 +459,8 @@ class CollegePredictorOptimized:
                 if "exam_type" not in record:
                     record["exam_type"] = exam
                 
-                # Add timestamp for tracking
-                if "last_updated" not in record:
-                    record["last_updated"] = datetime.now().isoformat()
-                
-                cleaned_data.append(record)
+                # Compact, read-only form; the load time is kept once per dataset
+                cleaned_data.append(CutoffRecord(record))
                 
             except Exception as e:
                 # Skip malformed records
@@ -222,171 +486,441 @@ class CollegePredictorOptimized:
         Predict colleges based on exam rank and category
         """
         try:
-            # Load full data if requested or if essential data doesn't have enough results
-            if load_full_data or exam not in self.cutoff_data:
-                self.load_full_data(exam)
-            
-            if exam not in self.cutoff_data:
-                return []
-            
-            # Normalize ownership filter
-            own = (ownership or "").strip().lower()
-            if own in ("any", ""):
-                own = ""
-
-            def ownership_ok(c: Dict[str, Any]) -> bool:
-                if not own:
-                    return True
-                # Try common fields that may encode ownership
-                raw = (
-                    c.get("ownership")
-                    or c.get("ownership_type")
-                    or c.get("college_type")
-                    or c.get("type")
-                    or c.get("management")
-                    or c.get("institute_type")
-                    or ""
-                )
-                val = str(raw).strip().lower()
-                if not val:
-                    return False  # if user asked ownership, skip unknowns
-                # Government synonyms
-                gov_tokens = ["government", "govt", "public", "central", "state", "national"]
-                # Private synonyms
-                prv_tokens = ["private", "self", "deemed", "trust"]
-                is_gov = any(t in val for t in gov_tokens)
-                is_prv = any(t in val for t in prv_tokens) and not is_gov
-                if own.startswith("gov") or own == "government" or own == "public":
-                    return is_gov
-                if own.startswith("priv"):
-                    return is_prv
-                # If an unrecognized ownership string is provided, do not filter out
-                return True
-
-            # Filter cutoffs based on strict criteria first
-            def state_ok(c):
-                if not states:
-                    return True
-                loc = c.get("location") or ""
-                cutoff_state = loc.split(",")[-1].strip() if "," in loc else loc
-                return cutoff_state in states if cutoff_state else False
-
-            # Keep a copy without state filter for later broad fallback
-            all_cutoffs_no_state = [c for c in self.cutoff_data[exam] if ownership_ok(c)]
-            all_cutoffs = [c for c in self.cutoff_data[exam] if state_ok(c) and ownership_ok(c)]
-
-            # If coverage looks thin, auto-load full data once to boost matches
-            if not load_full_data and len(all_cutoffs) < 1000:
-                try:
-                    self.load_full_data(exam)
-                    all_cutoffs_no_state = [c for c in self.cutoff_data[exam] if ownership_ok(c)]
-                    all_cutoffs = [c for c in self.cutoff_data[exam] if state_ok(c) and ownership_ok(c)]
-                except Exception:
-                    pass
-
-            strict_matches: List[Dict[str, Any]] = []
-            for cutoff in all_cutoffs:
-                if self._is_rank_eligible(cutoff, rank, category, gender, quota, tolerance_percent):
-                    strict_matches.append(cutoff)
-
-            # Sort by proximity to rank
-            strict_matches.sort(key=lambda x: abs(x.get("closing_rank", 0) - rank))
-
-            # Start building predictions from strict matches
-            predictions: List[Dict[str, Any]] = []
-            seen_keys = set()
-            cap = max(1, min(limit, 10000))
-            # Track how many entries we have per college to diversify results
-            per_college_limit = max(1, int(per_college_limit))
-            per_college_counts: Dict[str, int] = {}
-
-            def add_cutoff(c):
-                # Less aggressive deduplication - allow different branches and categories
-                k = (c.get("college", "").lower(), c.get("branch", "").lower())
-                if k in seen_keys:
-                    return False
-                college_key = c.get("college", "").strip().lower()
-                if college_key:
-                    count = per_college_counts.get(college_key, 0)
-                    if count >= per_college_limit:
-                        return False
-                predictions.append(self._create_prediction(c, rank, exam))
-                seen_keys.add(k)
-                if college_key:
-                    per_college_counts[college_key] = per_college_counts.get(college_key, 0) + 1
-                return True
-
-            for c in strict_matches:
-                if len(predictions) >= cap:
-                    break
-                add_cutoff(c)
-
-            # If not enough, relax constraints progressively. For NEET, use wider proximity windows
-            if len(predictions) < cap:
-                # Proximity windows (adaptive)
-                near_window = 20000
-                far_window = 80000
-                very_far_window = 120000
-                ex = exam.lower()
-                # NEET needs wider windows; support ranks up to 200k+
-                if ex == "neet":
-                    near_window = 60000 if rank >= 100000 else 50000
-                    far_window = 140000 if rank >= 100000 else 120000
-                    very_far_window = 250000
-                else:  # JEE and others
-                    if rank >= 100000:
-                        near_window = 50000
-                        far_window = 120000
-                        very_far_window = 200000
-
-                # 1) Ignore category/quota, keep branch and state, sort by proximity
-                relaxed = sorted(all_cutoffs, key=lambda x: abs(x.get("closing_rank", 0) - rank))
-                for c in relaxed:
-                    if len(predictions) >= cap:
-                        break
-                    # Only add if the user's rank is within a reasonable range of the closing rank
-                    if abs(c.get("closing_rank", 0) - rank) < near_window:
-                        add_cutoff(c)
-
-            if len(predictions) < cap:
-                # 2) Expand to far window within current state filter
-                for c in relaxed:
-                    if len(predictions) >= cap:
-                        break
-                    if abs(c.get("closing_rank", 0) - rank) < far_window:
-                        add_cutoff(c)
-
-            if len(predictions) < cap and states:
-                # 3) If state was restricting, try without state filter using proximity
-                relaxed_ns = sorted(all_cutoffs_no_state, key=lambda x: abs(x.get("closing_rank", 0) - rank))
-                for c in relaxed_ns:
-                    if len(predictions) >= cap:
-                        break
-                    if abs(c.get("closing_rank", 0) - rank) < near_window:
-                        add_cutoff(c)
-                if len(predictions) < cap:
-                    for c in relaxed_ns:
-                        if len(predictions) >= cap:
-                            break
-                        if abs(c.get("closing_rank", 0) - rank) < far_window:
-                            add_cutoff(c)
-
-            if len(predictions) < cap:
-                # 4) Very broad final fill to ensure enough options
-                # Prefer proximity order from all data
-                relaxed_all = sorted(all_cutoffs_no_state, key=lambda x: abs(x.get("closing_rank", 0) - rank))
-                for c in relaxed_all:
-                    if len(predictions) >= cap:
-                        break
-                    if abs(c.get("closing_rank", 0) - rank) < very_far_window:
-                        add_cutoff(c)
-            
-            return predictions
-            
+            return list(self.iter_predictions(
+                exam, rank, category, gender, quota, tolerance_percent,
+                states, load_full_data, limit, per_college_limit, ownership,
+            ))
         except Exception as e:
             print(f"Error during prediction: {e}")
             return []
-    
+
+    def iter_predictions(
+        self,
+        exam: str,
+        rank: int,
+        category: str = "General",
+        gender: str = "All",
+        quota: str = "All India",
+        tolerance_percent: float = 0.0,
+        states: Optional[List[str]] = None,
+        load_full_data: bool = False,
+        limit: int = 300,
+        per_college_limit: int = 1,
+        ownership: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Same as predict_colleges, but yields each prediction as soon as it is produced.
+        Errors are raised to the caller instead of returning an empty list.
+        """
+        own = normalize_ownership_filter(ownership)
+        with stage_timer.stage("load"):
+            dataset = self._prepare_dataset(exam, states, own, load_full_data)
+        if dataset is None:
+            return
+
+        index = dataset.index
+        cap = max(1, min(limit, 10000))
+        per_college_limit = max(1, int(per_college_limit))
+        cache_key = self._cache_key(
+            exam, dataset.version, rank, category, quota, tolerance_percent, states, own, cap, per_college_limit
+        )
+        # Callers annotate rows in place, so never hand out the cached dicts
+        cached = self.prediction_cache.get(cache_key)
+        stage_timer.count("cache_hits" if cached is not None else "cache_misses", 1)
+        if cached is not None:
+            for p in cached:
+                yield dict(p)
+            return
+
+        with stage_timer.stage("views"):
+            views = self._query_views(index, category, quota, states, own)
+        predictions: List[Dict[str, Any]] = []
+        for p in self._iter_with_views(dataset, views, exam, rank, tolerance_percent, cap, per_college_limit):
+            predictions.append(p)
+            yield dict(p)
+        # Only complete results are cached; an abandoned stream never gets here
+        self.prediction_cache.put(cache_key, predictions)
+
+    def predict_page(
+        self,
+        exam: str,
+        rank: int,
+        category: str = "General",
+        gender: str = "All",
+        quota: str = "All India",
+        tolerance_percent: float = 0.0,
+        states: Optional[List[str]] = None,
+        load_full_data: bool = False,
+        limit: int = 10000,
+        per_college_limit: int = 1,
+        ownership: Optional[str] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of the predict_colleges result list and the cursor for the next page
+        (None on the last page). Concatenated pages equal predict_colleges with the same limit.
+        The cursor records where the proximity walk stopped, so later pages resume it
+        instead of recomputing earlier ones. Raises CursorError for a cursor issued for
+        another query and StaleCursorError once the exam's data has changed.
+        """
+        own = normalize_ownership_filter(ownership)
+        with stage_timer.stage("load"):
+            dataset = self._prepare_dataset(exam, states, own, load_full_data)
+        if dataset is None:
+            return [], None
+
+        index = dataset.index
+        cap = max(1, min(limit, 10000))
+        per_college_limit = max(1, int(per_college_limit))
+        query = query_key(
+            exam, rank, CATEGORY_HIERARCHY.get(category, 1), quota, float(tolerance_percent),
+            sorted(states) if states else None, own, cap, per_college_limit,
+        )
+        position = WalkPosition()
+        if cursor:
+            payload = decode_cursor(cursor)
+            if payload.get("q") != query:
+                raise CursorError("cursor was issued for a different query")
+            if payload.get("d") != index.fingerprint:
+                raise StaleCursorError("prediction data changed since the cursor was issued")
+            position = WalkPosition.from_payload(payload, len(index), cap)
+
+        with stage_timer.stage("views"):
+            views = self._query_views(index, category, quota, states, own)
+        walk = self._iter_with_views(
+            dataset, views, exam, rank, tolerance_percent, cap, per_college_limit, position
+        )
+        page: List[Dict[str, Any]] = []
+        for p in walk:
+            page.append(p)
+            if len(page) >= max(1, page_size):
+                break
+        else:
+            return page, None
+
+        # The walk is paused right after the last row of the page
+        next_cursor = encode_cursor(dict(position.to_payload(), q=query, d=index.fingerprint))
+        has_more = next(walk, None) is not None
+        walk.close()
+        return page, (next_cursor if has_more else None)
+
+    def predict_batch(
+        self,
+        exam: str,
+        candidates: List[Dict[str, Any]],
+        tolerance_percent: float = 0.0,
+        load_full_data: bool = False,
+        limit: int = 100,
+        per_college_limit: int = 1,
+        ownership: Optional[str] = None,
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Predict colleges for many candidates of one exam.
+        Each candidate is a dict with rank and optional category, quota and states.
+        Yields (position in candidates, predictions) as each candidate is answered,
+        grouped by filter set, so positions can come out of order.
+
+        Candidates sharing a filter set share its bucket views, but each rank still
+        runs its own proximity walk: O(log n + rows visited) per candidate rather
+        than one sweep for the whole group.
+        """
+        with stage_timer.stage("load"):
+            dataset = self._loaded_dataset(exam, load_full_data)
+        if dataset is None:
+            for pos in range(len(candidates)):
+                yield pos, []
+            return
+
+        own = normalize_ownership_filter(ownership)
+        cap = max(1, min(limit, 10000))
+        per_college_limit = max(1, int(per_college_limit))
+
+        # Group candidates by filter set; category only matters through its level
+        groups: Dict[Tuple, List[int]] = {}
+        for pos, c in enumerate(candidates):
+            states = c.get("states")
+            group_key = (
+                CATEGORY_HIERARCHY.get(c.get("category", "General"), 1),
+                c.get("quota", "All India"),
+                frozenset(states) if states else None,
+            )
+            groups.setdefault(group_key, []).append(pos)
+
+        # Same thin-coverage rule as predict_colleges, applied once for the whole batch
+        if not load_full_data and any(
+            dataset.index.count(candidates[positions[0]].get("states"), own) < 1000
+            for positions in groups.values()
+        ):
+            try:
+                self.load_full_data(exam)
+            except Exception:
+                pass
+            dataset = self.datasets[exam]
+
+        index = dataset.index
+        for positions in groups.values():
+            first = candidates[positions[0]]
+            category = first.get("category", "General")
+            quota = first.get("quota", "All India")
+            states = first.get("states")
+            # Bucket views are resolved once per group and shared by its ranks
+            with stage_timer.stage("views"):
+                views = self._query_views(index, category, quota, states, own)
+            for pos in positions:
+                rank = candidates[pos]["rank"]
+                try:
+                    cache_key = self._cache_key(
+                        exam, dataset.version, rank, category, quota, tolerance_percent, states, own,
+                        cap, per_college_limit,
+                    )
+                    predictions = self.prediction_cache.get(cache_key)
+                    stage_timer.count("cache_hits" if predictions is not None else "cache_misses", 1)
+                    if predictions is None:
+                        predictions = list(self._iter_with_views(
+                            dataset, views, exam, rank, tolerance_percent, cap, per_college_limit
+                        ))
+                        self.prediction_cache.put(cache_key, predictions)
+                    yield pos, [dict(p) for p in predictions]
+                except Exception as e:
+                    print(f"Error during batch prediction: {e}")
+                    yield pos, []
+
+    def sweep_ranks(
+        self,
+        exam: str,
+        ranks: List[int],
+        category: str = "General",
+        quota: str = "All India",
+        tolerance_percent: float = 0.0,
+        states: Optional[List[str]] = None,
+        load_full_data: bool = False,
+        ownership: Optional[str] = None,
+        window: int = 20000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Walk ``ranks`` in order and yield, per rank, the colleges that entered and left
+        the set within reach of it (eligible, cutoff rank at most ``rank + window``).
+        The first step reports every college within reach as entered.
+        Raises ValueError for a negative window.
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+        own = normalize_ownership_filter(ownership)
+        with stage_timer.stage("load"):
+            dataset = self._prepare_dataset(exam, states, own, load_full_data)
+        if dataset is None:
+            for rank in ranks:
+                yield {"rank": rank, "entered": [], "left": [], "total_colleges": 0}
+            return
+        with stage_timer.stage("views"):
+            views = self._query_views(dataset.index, category, quota, states, own)
+        sweep = RankSweep(dataset.index, views.strict, tolerance_percent)
+        yield from sweep.steps(ranks, int(window))
+
+    def _loaded_dataset(self, exam: str, load_full_data: bool) -> Optional[_ExamDataset]:
+        """The exam's published dataset, loading full data first if requested or missing"""
+        if exam not in self.datasets and exam in self.ESSENTIAL_DATA_FILES:
+            # Not loaded at startup (load_on_init=False); load this exam on demand
+            self.load_essential_data([exam])
+        # Load full data if requested or if essential data doesn't have enough results
+        if load_full_data or exam not in self.datasets:
+            self.load_full_data(exam)
+        return self.datasets.get(exam)
+
+    def _prepare_dataset(
+        self, exam: str, states: Optional[List[str]], own: Optional[int], load_full_data: bool
+    ) -> Optional[_ExamDataset]:
+        """Make sure the exam's data is loaded enough to answer a query and return it"""
+        dataset = self._loaded_dataset(exam, load_full_data)
+        if dataset is None:
+            return None
+
+        # If coverage looks thin, auto-load full data once to boost matches
+        if not load_full_data and dataset.index.count(states, own) < 1000:
+            try:
+                self.load_full_data(exam)
+            except Exception:
+                pass
+            dataset = self.datasets[exam]
+
+        return dataset
+
+    def _cache_key(
+        self,
+        exam: str,
+        version: int,
+        rank: int,
+        category: str,
+        quota: str,
+        tolerance_percent: float,
+        states: Optional[List[str]],
+        own: Optional[int],
+        cap: int,
+        per_college_limit: int,
+    ) -> Tuple:
+        """Normalized prediction cache key; only inputs that influence the result are included"""
+        return (
+            exam,
+            version,
+            rank,
+            CATEGORY_HIERARCHY.get(category, 1),
+            quota,
+            float(tolerance_percent),
+            frozenset(states) if states else None,
+            own,
+            cap,
+            per_college_limit,
+        )
+
+    def _query_views(
+        self,
+        index: CutoffIndex,
+        category: str,
+        quota: str,
+        states: Optional[List[str]],
+        own: Optional[int],
+    ) -> "_QueryViews":
+        """Resolve the bucket views walked by the strict, state and no-state phases"""
+        state_view = index.view(index.select_buckets(states, own))
+        return _QueryViews(
+            strict=index.view(index.select_buckets(states, own, category, quota)),
+            state=state_view,
+            no_state=index.view(index.select_buckets(None, own)) if states else state_view,
+            has_states=bool(states),
+        )
+
+    def _iter_with_views(
+        self,
+        dataset: _ExamDataset,
+        views: "_QueryViews",
+        exam: str,
+        rank: int,
+        tolerance_percent: float,
+        cap: int,
+        per_college_limit: int,
+        position: Optional[WalkPosition] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run the strict and relaxed proximity phases over one exam's dataset, yielding predictions.
+        If ``position`` is given it is kept up to date after every yielded row, and a
+        position taken from an earlier walk resumes right after that walk's last row.
+        """
+        index = dataset.index
+        records = index.records
+
+        def rank_ok(rows: np.ndarray) -> np.ndarray:
+            return index.rank_ok_mask(rows, rank, tolerance_percent)
+
+        # Start building predictions from strict matches
+        emitted = 0
+        seen_keys = set()
+        # Track how many entries we have per college to diversify results
+        per_college_counts: Dict[int, int] = {}
+
+        # Proximity windows (adaptive). For NEET, use wider proximity windows.
+        near_window = 20000
+        far_window = 80000
+        very_far_window = 120000
+        ex = exam.lower()
+        # NEET needs wider windows; support ranks up to 200k+
+        if ex == "neet":
+            near_window = 60000 if rank >= 100000 else 50000
+            far_window = 140000 if rank >= 100000 else 120000
+            very_far_window = 250000
+        else:  # JEE and others
+            if rank >= 100000:
+                near_window = 50000
+                far_window = 120000
+                very_far_window = 200000
+
+        # If not enough strict matches, relax constraints progressively. Each window
+        # continues the previous walk: closer rows were already offered to add_rows.
+        state_walk = views.state.walk(rank)
+        no_state_walk = views.no_state.walk(rank) if views.has_states else state_walk
+        phases = [
+            # Strict matches, nearest closing rank first
+            (views.strict.walk(rank, rank_ok), None),
+            # 1) Ignore category/quota, keep branch and state, sort by proximity
+            (state_walk, near_window),
+            # 2) Expand to far window within current state filter
+            (state_walk, far_window),
+            # 3) If state was restricting, try without state filter using proximity
+            #    (without a state filter these continue the walk above and add nothing)
+            (no_state_walk, near_window),
+            (no_state_walk, far_window),
+            # 4) Very broad final fill to ensure enough options (without state filter)
+            (no_state_walk, very_far_window),
+        ]
+
+        start_phase, skip = 0, 0
+        if position is not None and position.step is not None:
+            if position.phase >= len(phases):
+                raise CursorError("cursor position out of range")
+            try:
+                phases[position.phase][0].restore(*position.step)
+            except ValueError as e:
+                raise CursorError(str(e)) from e
+            start_phase, skip = position.phase, position.offset
+            emitted = len(position.rows)
+            if position.rows:
+                rows = np.asarray(position.rows, dtype=np.int64)
+                seen_keys.update(index.pair_codes[rows].tolist())
+                for college_key in index.college_codes[rows].tolist():
+                    if college_key >= 0:
+                        per_college_counts[college_key] = per_college_counts.get(college_key, 0) + 1
+
+        def add_rows(phase: int, walk, batches) -> Iterator[Dict[str, Any]]:
+            # Less aggressive deduplication - allow different branches and categories
+            nonlocal emitted, skip
+            for rows in batches:
+                # A resumed walk replays its last batch; drop the part already handled
+                offset, skip = skip, 0
+                batch = rows[offset:]
+                # Confidence and admission probability of the whole batch in one pass
+                confidence = index.confidence_scores(batch, rank)
+                levels = np.where(confidence >= 0.8, "High", np.where(confidence >= 0.5, "Medium", "Low"))
+                for j, i, k, college_key, score, level, chance in zip(
+                    range(offset + 1, offset + 1 + len(rows)),
+                    batch.tolist(),
+                    index.pair_codes[batch].tolist(),
+                    index.college_codes[batch].tolist(),
+                    confidence.tolist(),
+                    levels.tolist(),
+                    index.admission_probability(batch, rank).tolist(),
+                ):
+                    if emitted >= cap:
+                        return
+                    if k in seen_keys:
+                        continue
+                    if college_key >= 0 and per_college_counts.get(college_key, 0) >= per_college_limit:
+                        continue
+                    emitted += 1
+                    seen_keys.add(k)
+                    if college_key >= 0:
+                        per_college_counts[college_key] = per_college_counts.get(college_key, 0) + 1
+                    if position is not None:
+                        position.mark(phase, walk.batch_start, j, i)
+                    yield self._create_prediction(
+                        records[i], rank, exam, dataset.last_updated,
+                        None if score != score else (score, level),
+                        None if chance != chance else round(chance, 4),
+                    )
+                if emitted >= cap:
+                    return
+
+        timer = stage_timer.current()
+        for phase in range(start_phase, len(phases)):
+            if emitted >= cap:
+                return
+            walk, window = phases[phase]
+            rows = add_rows(phase, walk, walk.rows(window))
+            if timer is not None:
+                # Time spent walking, filtering and building rows, and rows produced, per phase
+                name = self.PHASE_NAMES[phase]
+                rows = stage_timer.timed_iter(timer, name, rows, f"rows_{name}")
+            yield from rows
+
     def _is_rank_eligible(
         self,
         cutoff: Dict[str, Any],
@@ -454,18 +988,25 @@ class CollegePredictorOptimized:
     
     def _create_prediction(
         self, 
-        cutoff: Dict[str, Any], 
+        cutoff: Mapping[str, Any],
         rank: int, 
-        exam: str
+        exam: str,
+        last_updated: Optional[str] = None,
+        confidence: Optional[Tuple[float, str]] = None,
+        admission_probability: Optional[float] = None,
     ) -> Dict[str, Any]:
-        """Create a prediction result from cutoff data"""
+        """Create a prediction result from cutoff data.
+        ``confidence`` is the (score, level) pair when already computed for a batch of rows."""
         try:
             closing_rank = cutoff.get("closing_rank", 0)
             opening_rank = cutoff.get("opening_rank", 0)
             
             # Calculate confidence
-            confidence_score = self._calculate_confidence(rank, closing_rank, opening_rank)
-            confidence_level = self._get_confidence_level(confidence_score)
+            if confidence is None:
+                confidence_score = self._calculate_confidence(rank, closing_rank, opening_rank)
+                confidence_level = self._get_confidence_level(confidence_score)
+            else:
+                confidence_score, confidence_level = confidence
             
             return {
                 "college": cutoff.get("college", "Unknown"),
@@ -476,11 +1017,13 @@ class CollegePredictorOptimized:
                 "your_rank": rank,
                 "confidence_score": confidence_score,
                 "confidence_level": confidence_level,
+                # Modelled chance of admission from the cutoff's history across years
+                "admission_probability": admission_probability,
                 "location": cutoff.get("location", "Unknown"),
                 "category": cutoff.get("category", "General"),
                 "quota": cutoff.get("quota", "All India"),
                 "ownership": cutoff.get("ownership") or cutoff.get("ownership_type") or cutoff.get("college_type") or cutoff.get("type") or cutoff.get("management") or cutoff.get("institute_type"),
-                "last_updated": cutoff.get("last_updated", datetime.now().isoformat())
+                "last_updated": cutoff.get("last_updated") or last_updated or datetime.now().isoformat()
             }
         except Exception as e:
             print(f"Error creating prediction: {e}")
@@ -516,12 +1059,60 @@ class CollegePredictorOptimized:
     
     def get_data_status(self) -> Dict[str, Any]:
         """Get current data loading status"""
+        datasets = dict(self.datasets)
         return {
-            "data_loaded": self.data_loaded,
-            "record_counts": {exam: len(data) for exam, data in self.cutoff_data.items()},
-            "load_essential_only": self.load_essential_only
+            "data_loaded": {exam: ds.status for exam, ds in datasets.items()},
+            "record_counts": {exam: len(ds.records) for exam, ds in datasets.items()},
+            "load_essential_only": self.load_essential_only,
+            "data_version": {exam: ds.version for exam, ds in datasets.items()},
+            "shared_store": str(self.shared_store.root) if self.shared_store else None,
+            # Only exams parsed by this process; snapshots are built already deduplicated
+            "ingest": {exam: dict(files) for exam, files in self.ingest_report.items()},
+            "load_seconds": {exam: dict(levels) for exam, levels in self.load_seconds.items()},
+            "prediction_cache": self.prediction_cache.stats(),
         }
     
+    def start_background_preload(self, exams: Optional[List[str]] = None) -> threading.Thread:
+        """Load full data for the given exams (default: all) on a daemon thread.
+        Requests keep being served from the essential data meanwhile; see readiness().
+        """
+        exams = list(exams or self.FULL_DATA_FILES)
+        errors: Dict[str, str] = {}
+        self.warmup = {"state": "running", "exams": exams, "started_at": time.time(), "finished_at": None, "errors": errors}
+
+        def run():
+            for exam in exams:
+                try:
+                    self.load_full_data(exam)
+                except Exception as e:
+                    safe_print(f"Background preload failed for {exam}: {e}")
+                    errors[exam] = str(e)
+            self.warmup["finished_at"] = time.time()
+            self.warmup["state"] = "failed" if errors else "done"
+
+        thread = threading.Thread(target=run, name="full-data-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def readiness(self) -> Dict[str, Any]:
+        """Per-exam load state: ready once every exam has data, fully_loaded once each has all it can get"""
+        exams: Dict[str, Dict[str, Any]] = {}
+        for exam in {**self.ESSENTIAL_DATA_FILES, **self.FULL_DATA_FILES}:
+            dataset = self.datasets.get(exam)
+            exams[exam] = {
+                "status": dataset.status if dataset else "missing",
+                "loading": self._load_lock(exam).locked(),
+                "records": len(dataset.records) if dataset else 0,
+                "version": dataset.version if dataset else 0,
+                "complete": dataset is not None and (dataset.status == "full" or exam not in self.FULL_DATA_FILES),
+            }
+        return {
+            "ready": all(e["status"] != "missing" for e in exams.values()),
+            "fully_loaded": all(e["complete"] for e in exams.values()),
+            "warmup": dict(self.warmup, errors=dict(self.warmup.get("errors", {}))),
+            "exams": exams,
+        }
+
     def preload_full_data(self, exam: str = None):
         """Preload full data for better performance"""
         if exam:
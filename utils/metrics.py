@@ -0,0 +1,178 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.stage_timer import route_template
+
+# Upper bounds (seconds) of the request latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Dict[str, Any]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_metric(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> str:
+    """One metric family in the Prometheus text exposition format"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple, List[Any]] = {}
+
+    def observe(self, label_values: Tuple, value: float) -> None:
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            series = {key: ([*counts], total, n) for key, (counts, total, n) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, n) in sorted(series.items()):
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(dict(labels, le=_number(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(labels)} {n}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """Latency histogram per route and in-flight gauge of the HTTP requests served"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.latency = Histogram(
+            "collink_http_request_duration_seconds",
+            "Time from receiving a request to sending the last byte of its response",
+            ("method", "route", "status"),
+            buckets,
+        )
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+
+    def started(self, method: str) -> None:
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self._in_flight[method] -= 1
+        self.latency.observe((method, route, f"{status // 100}xx"), seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            in_flight = sorted(self._in_flight.items())
+        return self.latency.render() + format_metric(
+            "collink_http_requests_in_flight",
+            "gauge",
+            "Requests being handled (by method; the route is only known once routing is done)",
+            [({"method": method}, n) for method, n in in_flight],
+        )
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording every HTTP request in a RequestMetrics.
+
+    Requests are labelled with their route template, so ids in paths and
+    unknown URLs do not create new series. The latency covers the whole
+    response, including a streamed body.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        status = 500  # reported if the app fails before starting a response
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.started(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.finished(method, route_template(scope), status, time.perf_counter() - started)
+
+
+def status_metrics(data_status: Dict[str, Any], pool: Dict[str, Any], llm: Optional[Dict[str, Any]] = None) -> str:
+    """Gauges and counters of the predictor (get_data_status), worker pool and LLM client stats"""
+    cache = data_status.get("prediction_cache", {})
+    families = [
+        ("collink_dataset_records", "gauge", "Cleaned cutoff records loaded per exam",
+         [({"exam": exam, "status": data_status["data_loaded"].get(exam, "")}, n)
+          for exam, n in sorted(data_status.get("record_counts", {}).items())]),
+        ("collink_dataset_version", "gauge", "Times each exam's dataset has been published",
+         [({"exam": exam}, v) for exam, v in sorted(data_status.get("data_version", {}).items())]),
+        ("collink_dataset_load_seconds", "gauge", "Duration of the last load of each exam's dataset, per level",
+         [({"exam": exam, "status": status}, seconds)
+          for exam, levels in sorted(data_status.get("load_seconds", {}).items())
+          for status, seconds in sorted(levels.items())]),
+        ("collink_prediction_cache_hits_total", "counter", "Prediction cache lookups answered from the cache",
+         [({}, cache.get("hits", 0))]),
+        ("collink_prediction_cache_misses_total", "counter", "Prediction cache lookups that had to compute",
+         [({}, cache.get("misses", 0))]),
+        ("collink_prediction_cache_evictions_total", "counter", "Prediction cache entries dropped to stay in bounds",
+         [({}, cache.get("evictions", 0))]),
+        ("collink_prediction_cache_entries", "gauge", "Prediction cache entries held", [({}, cache.get("size", 0))]),
+        ("collink_worker_pool_queue_depth", "gauge", "Admitted jobs waiting for a worker thread",
+         [({}, pool.get("queue_depth", 0))]),
+        ("collink_worker_pool_running", "gauge", "Jobs running on worker threads", [({}, pool.get("running", 0))]),
+        ("collink_worker_pool_workers", "gauge", "Worker threads", [({}, pool.get("workers", 0))]),
+        ("collink_worker_pool_jobs_total", "counter", "Finished or rejected worker pool jobs by outcome",
+         [({"outcome": outcome}, pool.get(outcome, 0)) for outcome in ("completed", "failed", "rejected")]),
+    ]
+    if llm is not None:
+        llm_cache = llm.get("cache", {})
+        families += [
+            ("collink_llm_cache_hits_total", "counter", "LLM replies served from the cache",
+             [({}, llm_cache.get("hits", 0))]),
+            ("collink_llm_cache_misses_total", "counter", "LLM lookups that went to a provider",
+             [({}, llm_cache.get("misses", 0))]),
+        ]
+    return "".join(format_metric(*family) for family in families)
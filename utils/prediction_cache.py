@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a TTL for prediction results.
+
+    Entries are weighted by their number of rows so a handful of
+    ``limit=10000`` responses cannot pin an unbounded amount of memory.
+    Keys are expected to start with the exam name so a data reload can drop
+    that exam's entries with ``invalidate(exam)``.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 300.0, max_rows: int = 500000):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_rows = max(0, int(max_rows))
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_rows > 0
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: List[Dict[str, Any]]) -> None:
+        if not self.enabled or len(value) > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), value)
+            self._rows += len(value)
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, exam: Optional[str] = None) -> None:
+        """Drop all entries, or only those whose key starts with ``exam``"""
+        with self._lock:
+            if exam is None:
+                stale = list(self._entries)
+            else:
+                stale = [k for k in self._entries if isinstance(k, tuple) and k and k[0] == exam]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def _remove(self, key: Hashable) -> None:
+        _, value = self._entries.pop(key)
+        self._rows -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "rows": self._rows,
+                "max_entries": self.max_entries,
+                "max_rows": self.max_rows,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,103 @@
+import base64
+import binascii
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+CURSOR_VERSION = 1
+# Decoded cursors never need more than this; anything larger is rejected unread
+MAX_CURSOR_BYTES = 1 << 20
+
+
+class CursorError(ValueError):
+    """The cursor is malformed or was issued for a different query"""
+
+
+class StaleCursorError(CursorError):
+    """The prediction data changed since the cursor was issued"""
+
+
+def query_key(*parts: Any) -> str:
+    """Short stable digest of the query parameters a cursor is bound to"""
+    raw = json.dumps(parts, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(dict(payload, v=CURSOR_VERSION), separators=(",", ":"))
+    token = base64.urlsafe_b64encode(zlib.compress(raw.encode("utf-8")))
+    return token.rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        inflater = zlib.decompressobj()
+        raw = inflater.decompress(data, MAX_CURSOR_BYTES)
+        if inflater.unconsumed_tail:
+            raise CursorError("cursor is too large")
+        payload = json.loads(raw)
+    except (binascii.Error, zlib.error, ValueError, UnicodeDecodeError) as e:
+        if isinstance(e, CursorError):
+            raise
+        raise CursorError("malformed cursor") from e
+    if not isinstance(payload, dict) or payload.get("v") != CURSOR_VERSION:
+        raise CursorError("unsupported cursor version")
+    return payload
+
+
+class WalkPosition:
+    """Where a prediction walk stopped: the relaxation phase, the walk step that
+    produced the current batch, how far into that batch it got, and the rows
+    emitted so far (from which the per-college dedup state is rebuilt).
+
+    The emitted rows make the cursor grow with page depth, but never past the
+    query's limit: a walk stops after ``cap`` rows (at most 10000), which is
+    about 25 KB of cursor even on a 10M-row dataset. Positions that claim more
+    rows than the cap are rejected."""
+
+    __slots__ = ("phase", "step", "offset", "rows")
+
+    def __init__(
+        self,
+        phase: int = 0,
+        step: Optional[Tuple[int, int, int]] = None,
+        offset: int = 0,
+        rows: Optional[List[int]] = None,
+    ):
+        self.phase = phase
+        self.step = step
+        self.offset = offset
+        self.rows = rows if rows is not None else []
+
+    def mark(self, phase: int, step: Tuple[int, int, int], offset: int, row: int) -> None:
+        self.phase, self.step, self.offset = phase, step, offset
+        self.rows.append(row)
+
+    def to_payload(self) -> Dict[str, Any]:
+        # Emitted rows only matter as a set; sorted deltas compress far better
+        rows = sorted(self.rows)
+        deltas = [b - a for a, b in zip([0] + rows, rows)]
+        return {"p": self.phase, "w": list(self.step) if self.step else None, "o": self.offset, "e": deltas}
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], n_rows: int, max_rows: int) -> "WalkPosition":
+        try:
+            phase, step, offset = int(payload["p"]), payload["w"], int(payload["o"])
+            deltas = [int(d) for d in payload["e"]]
+            if step is not None:
+                left, right, block = (int(v) for v in step)
+                step = (left, right, block)
+        except (KeyError, TypeError, ValueError) as e:
+            raise CursorError("malformed cursor") from e
+        if len(deltas) > max_rows:
+            raise CursorError("cursor position out of range")
+        if phase < 0 or offset < 0 or any(d < 0 for d in deltas) or sum(deltas) >= max(n_rows, 1):
+            raise CursorError("cursor position out of range")
+        rows: List[int] = []
+        row = 0
+        for delta in deltas:
+            row += delta
+            rows.append(row)
+        return cls(phase, step, offset, rows)
@@ -0,0 +1,75 @@
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from utils.cutoff_index import CutoffIndex, RankView
+
+Interval = Tuple[int, int]
+
+
+def _difference(a: Interval, b: Interval) -> List[Interval]:
+    """Parts of the position range ``a`` outside ``b`` (both half-open)"""
+    return [(a[0], min(a[1], b[0])), (max(a[0], b[1]), a[1])]
+
+
+class RankSweep:
+    """Colleges within reach of a rank as it moves along a sweep.
+
+    A row is within reach of rank ``r`` when ``r`` is eligible for it (the strict
+    phase of a prediction) and its cutoff rank is at most ``r + window``. The
+    rows of one filter set are sorted by effective cutoff rank once; each step
+    of the sweep then moves two pointers, and only the rows that cross either
+    pointer are looked at. A college is in the window while at least one of its
+    rows is.
+    """
+
+    def __init__(self, index: CutoffIndex, view: RankView, tolerance_percent: float = 0.0):
+        self.records = index.records
+        rows = view.order if view.accept is None else view.order[view.accept(view.order)]
+        rows = rows[(index.college_codes[rows] >= 0) & (index.cutoff_rank[rows] > 0)]
+        cutoff = index.cutoff_rank[rows]
+        if tolerance_percent > 0:
+            cutoff = (cutoff * (1 + (tolerance_percent / 100))).astype(np.int64)
+        order = np.argsort(cutoff, kind="stable")
+        self.cutoff = cutoff[order]
+        self.rows = rows[order]
+        self.colleges = index.college_codes[self.rows]
+        self.college_count = int(index.college_codes.max()) + 1 if len(index.college_codes) else 0
+
+    def steps(self, ranks: Iterable[int], window: int) -> Iterator[Dict[str, Any]]:
+        """For each rank: the colleges that entered and left the window since the previous step"""
+        counts = np.zeros(self.college_count, dtype=np.int64)
+        names: Dict[int, str] = {}
+        total = 0
+        current: Interval = (0, 0)
+        for rank in ranks:
+            new = (
+                int(np.searchsorted(self.cutoff, rank, side="left")),
+                int(np.searchsorted(self.cutoff, rank + window, side="right")),
+            )
+            removed = [self.colleges[lo:hi] for lo, hi in _difference(current, new) if lo < hi]
+            added = [(lo, self.colleges[lo:hi]) for lo, hi in _difference(new, current) if lo < hi]
+            current = new
+
+            changed = removed + [codes for _, codes in added]
+            touched = np.unique(np.concatenate(changed)) if changed else self.colleges[:0]
+            before = counts[touched]
+            for codes in removed:
+                np.subtract.at(counts, codes, 1)
+            for lo, codes in added:
+                np.add.at(counts, codes, 1)
+                firsts, at = np.unique(codes, return_index=True)
+                for code, pos in zip(firsts.tolist(), at.tolist()):
+                    if code not in names:
+                        names[code] = self.records[int(self.rows[lo + pos])].get("college", "")
+            after = counts[touched]
+
+            entered = touched[(before == 0) & (after > 0)].tolist()
+            left = touched[(before > 0) & (after == 0)].tolist()
+            total += len(entered) - len(left)
+            yield {
+                "rank": rank,
+                "entered": sorted(names[c] for c in entered),
+                "left": sorted(names[c] for c in left),
+                "total_colleges": total,
+            }
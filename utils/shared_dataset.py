@@ -0,0 +1,241 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+from collections.abc import Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from utils.cutoff_index import CutoffIndex
+
+# Bump when the on-disk layout, the record cleaning rules or a stored column's meaning change
+FORMAT_VERSION = 5
+
+
+class SharedRecords(Sequence):
+    """Read-only list of cutoff records stored as JSON lines in a memory-mapped file.
+
+    Records are decoded on access, so each worker only holds the rows it is
+    currently turning into predictions; the file pages themselves live in the
+    OS page cache and are shared by every process that maps them.
+    """
+
+    def __init__(self, blob: mmap.mmap, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("record index out of range")
+        return json.loads(self._blob[int(self._offsets[i]):int(self._offsets[i + 1])])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        offsets = self._offsets.tolist()
+        blob = self._blob
+        for start, end in zip(offsets, offsets[1:]):
+            yield json.loads(blob[start:end])
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_sources(paths: List[Path]) -> List[Dict[str, Any]]:
+    """Name, size and content hash of each source file (missing files have no size or hash)"""
+    sources = []
+    for path in paths:
+        if path.exists():
+            sources.append({"name": path.name, "size": path.stat().st_size, "sha256": file_digest(path)})
+        else:
+            sources.append({"name": path.name, "size": None, "sha256": None})
+    return sources
+
+
+def stat_signature(paths: List[Path]) -> Tuple[Tuple[str, Optional[int], Optional[int]], ...]:
+    """(name, size, mtime) of each source file; None fields for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            st = path.stat()
+            signature.append((path.name, st.st_size, st.st_mtime_ns))
+        except OSError:
+            signature.append((path.name, None, None))
+    return tuple(signature)
+
+
+def source_signature(name: str, paths: List[Path]) -> str:
+    """Digest of the source files (name, size, mtime) a compiled dataset was built from"""
+    parts: List[Any] = [FORMAT_VERSION, name, *stat_signature(paths)]
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive inter-process lock held on ``path`` for the duration of the block"""
+    with open(path, "a+b") as f:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SharedDatasetStore:
+    """Directory of compiled cutoff snapshots, memory-mapped by every worker process.
+
+    A snapshot holds the index columns as fixed-width ``.npy`` arrays, the
+    cleaned records as JSON lines and a ``meta.json`` with the format version
+    and the size and SHA-256 of every source file it was built from. It is
+    only used while those sources are unchanged.
+
+    A writable store builds missing snapshots on demand: the first process
+    to need one builds it under a file lock and every process (the builder
+    included) then maps the files read-only. A read-only store only attaches
+    snapshots made by the build step (``python -m utils.shared_dataset``) and
+    returns None otherwise, so the caller falls back to the JSON files.
+    """
+
+    def __init__(self, root: Path, writable: bool = True):
+        self.root = Path(root)
+        self.writable = writable
+        if writable:
+            self.root.mkdir(parents=True, exist_ok=True)
+
+    def load_or_build(
+        self,
+        name: str,
+        sources: List[Path],
+        build: Callable[[], List[Dict[str, Any]]],
+    ) -> Optional[Tuple[SharedRecords, CutoffIndex]]:
+        """Attach the snapshot for ``sources``, building it with ``build()`` if missing and writable"""
+        directory = self._find(name, sources)
+        if directory is None and self.writable:
+            with _file_lock(self.root / f"{name}.lock"):
+                # Another process may have finished the build while we waited
+                directory = self._find(name, sources)
+                if directory is None:
+                    directory = self.root / f"{name}-{source_signature(name, sources)}"
+                    self._write(directory, build(), sources)
+                    self._remove_stale(name, keep=directory)
+        return self.attach(directory) if directory is not None else None
+
+    def _find(self, name: str, sources: List[Path]) -> Optional[Path]:
+        """Snapshot directory built from the current contents of ``sources``, if any"""
+        directory = self.root / f"{name}-{source_signature(name, sources)}"
+        if self._read_meta(directory) is not None:
+            return directory
+        # Same sizes but different mtimes (touched, copied, checked out): compare content hashes
+        sizes = [path.stat().st_size if path.exists() else None for path in sources]
+        current: Optional[List[Dict[str, Any]]] = None
+        for candidate in sorted(self.root.glob(f"{name}-*")):
+            meta = self._read_meta(candidate)
+            if meta is None or [s["size"] for s in meta["sources"]] != sizes:
+                continue
+            if current is None:
+                current = describe_sources(sources)
+            if meta["sources"] == current:
+                return candidate
+        return None
+
+    @staticmethod
+    def _read_meta(directory: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(directory / "meta.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("format") == FORMAT_VERSION else None
+
+    def _write(self, directory: Path, records: List[Mapping[str, Any]], sources: List[Path]) -> None:
+        index = CutoffIndex(records)
+        tmp = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        with open(tmp / "records.jsonl", "wb") as f:
+            position = 0
+            for i, record in enumerate(records):
+                line = json.dumps(dict(record), separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+                f.write(line)
+                position += len(line)
+                offsets[i + 1] = position
+        np.save(tmp / "record_offsets.npy", offsets)
+        for column, values in index.columns.items():
+            np.save(tmp / f"{column}.npy", np.ascontiguousarray(values))
+
+        meta = {
+            "format": FORMAT_VERSION,
+            "sources": describe_sources(sources),
+            "rows": len(records),
+            "fingerprint": index.fingerprint,
+            "tables": index.tables,
+            "columns": sorted(index.columns),
+        }
+        # meta.json is written last: its presence marks a complete dataset
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, directory)
+
+    def attach(self, directory: Path) -> Tuple[SharedRecords, CutoffIndex]:
+        meta = self._read_meta(directory)
+        if meta is None:
+            raise ValueError(f"{directory} is not a complete snapshot of format {FORMAT_VERSION}")
+        columns = {column: np.load(directory / f"{column}.npy", mmap_mode="r") for column in meta["columns"]}
+        offsets = np.load(directory / "record_offsets.npy", mmap_mode="r")
+        with open(directory / "records.jsonl", "rb") as f:
+            # An empty file cannot be mapped; an empty dataset has nothing to read anyway
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if meta["rows"] else b""
+        records = SharedRecords(blob, offsets)
+        return records, CutoffIndex.from_columns(records, columns, meta["tables"], meta["fingerprint"])
+
+    def _remove_stale(self, name: str, keep: Path) -> None:
+        """Drop older builds of ``name``; processes still mapping them keep their pages"""
+        for path in self.root.glob(f"{name}-*"):
+            if path != keep and path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Build step: `python -m utils.shared_dataset [DIR]` compiles every exam's snapshots.
+    # DIR defaults to CUTOFF_SHARED_DIR, then to data/snapshots, which the predictor
+    # picks up on its own (read-only) when present.
+    import sys
+
+    from utils.match_logic_optimized import CollegePredictorOptimized
+
+    target = (
+        sys.argv[1] if len(sys.argv) > 1
+        else os.getenv("CUTOFF_SHARED_DIR") or str(Path(__file__).parent.parent / "data" / "snapshots")
+    )
+    loader = CollegePredictorOptimized(load_essential_only=True, shared_dir=target)
+    loader.preload_full_data()
+    print(f"Compiled datasets in {target}: {loader.get_data_status()['record_counts']}")
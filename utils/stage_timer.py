@@ -0,0 +1,183 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Timer of the request being served; None outside a request (scripts, tests, warmup)
+_current: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Seconds spent per named stage, and row counts, of one request.
+
+    Stages may be added from worker threads (combined predictions run one
+    exam per thread), so updates take a lock.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per stage, row counts as descriptions"""
+        with self._lock:
+            parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+            parts += [f'{name};desc="{n}"' for name, n in self.counts.items()]
+        return ", ".join(parts)
+
+
+def current() -> Optional[StageTimer]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as stage ``name`` of the current request (no-op outside one)"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def add(name: str, seconds: float) -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def count(name: str, n: int) -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.count(name, n)
+
+
+def timed_iter(timer: StageTimer, name: str, items: Iterable[T], rows_name: Optional[str] = None) -> Iterator[T]:
+    """Yield from ``items``, charging the time spent producing them (not consuming
+    them) to stage ``name`` and counting them as ``rows_name``. Totals are recorded
+    once, when the iterator is exhausted or closed."""
+    elapsed, n = 0.0, 0
+    started = time.perf_counter()
+    try:
+        for item in items:
+            elapsed += time.perf_counter() - started
+            n += 1
+            yield item
+            started = time.perf_counter()
+        elapsed += time.perf_counter() - started
+    finally:
+        timer.add(name, elapsed)
+        if rows_name:
+            timer.count(rows_name, n)
+
+
+class StageStats:
+    """Per-endpoint totals of the stage timers of finished requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, endpoint: str, timer: StageTimer) -> None:
+        with timer._lock:
+            stages, counts = dict(timer.stages), dict(timer.counts)
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {"requests": 0, "stages": {}, "counts": {}})
+            entry["requests"] += 1
+            for name, seconds in stages.items():
+                total = entry["stages"].setdefault(name, {"requests": 0, "total": 0.0, "max": 0.0})
+                total["requests"] += 1
+                total["total"] += seconds
+                total["max"] = max(total["max"], seconds)
+            for name, n in counts.items():
+                entry["counts"][name] = entry["counts"].get(name, 0) + n
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per endpoint: request count, and per stage the requests that had it and their
+        average and maximum milliseconds; row counts are averaged over all requests"""
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": entry["requests"],
+                    "stages": {
+                        name: {
+                            "requests": s["requests"],
+                            "avg_ms": round(s["total"] / s["requests"] * 1000, 3),
+                            "max_ms": round(s["max"] * 1000, 3),
+                        }
+                        for name, s in entry["stages"].items()
+                    },
+                    "avg_rows": {
+                        name: round(n / entry["requests"], 2) for name, n in entry["counts"].items()
+                    },
+                }
+                for endpoint, entry in self._endpoints.items()
+            }
+
+
+def route_template(scope) -> str:
+    """Path template of the route that served a request ("unmatched" if none did).
+    Templates rather than raw paths, so ids and unknown URLs do not add endpoints."""
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    # A route of an included router may only know its own part of the path;
+    # keep the leading segments of the request path it was mounted under
+    segments = scope.get("path", "").split("/")
+    depth = template.count("/")
+    prefix = "/".join(segments[:len(segments) - depth]) if depth < len(segments) else ""
+    return prefix + template
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware giving each HTTP request a StageTimer.
+
+    The stages recorded while the request is handled are sent in a
+    ``Server-Timing`` response header, together with the total time until the
+    response started. A streamed body is still being produced after the
+    header has been sent; its stages only show up in ``stats``, which is
+    updated when the response has finished.
+    """
+
+    def __init__(self, app, stats: StageStats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer()
+        token = _current.set(timer)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timer.add("total", time.perf_counter() - started)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.stats.record(f"{scope.get('method', '')} {route_template(scope)}", timer)
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, TypeVar
+
+from utils import stage_timer
+
+T = TypeVar("T")
+
+
+class PoolSaturatedError(RuntimeError):
+    """More work is pending than the pool admits; the caller should retry later"""
+
+
+def _timed_job(wait: float, fn: Callable[..., T], args, kwargs) -> T:
+    stage_timer.add("queue", wait)
+    return fn(*args, **kwargs)
+
+
+class WorkerPool:
+    """Bounded thread pool for CPU-bound request work.
+
+    Handlers ``await pool.run(fn, ...)`` so the event loop stays free for
+    health checks and cheap endpoints while predictions run. At most
+    ``max_pending`` jobs may be admitted (running or queued); beyond that
+    ``run`` raises PoolSaturatedError instead of growing the queue.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 64, name: str = "worker"):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(self.workers, int(max_pending))
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.peak_queue_depth = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def from_env(cls, prefix: str = "PREDICTION") -> "WorkerPool":
+        """Pool sized by <prefix>_WORKERS and <prefix>_MAX_PENDING"""
+        workers = int(os.getenv(f"{prefix}_WORKERS", str(min(8, os.cpu_count() or 2))))
+        max_pending = int(os.getenv(f"{prefix}_MAX_PENDING", str(workers * 16)))
+        return cls(workers=workers, max_pending=max_pending, name=prefix.lower())
+
+    @property
+    def queue_depth(self) -> int:
+        """Admitted jobs still waiting for a worker thread"""
+        return self._pending - self._running
+
+    def _admit(self) -> None:
+        with self._lock:
+            self._check_locked()
+            self._pending += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+
+    def _check_locked(self) -> None:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is busy ({self._pending} jobs pending)")
+
+    def _finish(self, ok: bool) -> None:
+        with self._lock:
+            self._pending -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on a worker thread once admitted"""
+        self._admit()
+        admitted_at = time.perf_counter()
+        # The job sees the caller's context, e.g. the request's stage timer
+        context = contextvars.copy_context()
+
+        def job() -> T:
+            wait = time.perf_counter() - admitted_at
+            with self._lock:
+                self._running += 1
+                self.started += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return context.run(_timed_job, wait, fn, args, kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            self._finish(False)
+            raise
+        # Released when the job ends, not when the caller stops waiting: a cancelled
+        # request leaves its job running (or drops it if it never started)
+        future.add_done_callback(lambda f: self._finish(not f.cancelled() and f.exception() is None))
+        return await asyncio.wrap_future(future)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Count work that runs on another thread (e.g. a streamed response) as running.
+        Admitted like ``run``: raises PoolSaturatedError when max_pending jobs are pending."""
+        with self._lock:
+            self._check_locked()
+            self._pending += 1
+            self._running += 1
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._finish(ok)
+
+    def stream(self, items: Iterable[T]) -> Iterator[T]:
+        """Take a slot now and hold it while ``items`` is consumed, e.g. as a response body.
+        Raises PoolSaturatedError here, before the response starts, if not admitted. The slot
+        is released when the iterator is exhausted, closed or garbage collected."""
+        held = self._held(items)
+        next(held)
+        return held
+
+    def _held(self, items: Iterable[T]) -> Iterator[T]:
+        with self.slot():
+            # Started by stream(): from here on, closing the generator releases the slot
+            yield  # type: ignore[misc]
+            yield from items
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.started
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "peak_queue_depth": self.peak_queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / started * 1000, 3) if started else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker threads; a pool used again (e.g. by a restarted app) starts new ones"""
+        executor, self._executor = self._executor, ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=self.name
+        )
+        executor.shutdown(wait=wait)